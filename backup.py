@@ -0,0 +1,231 @@
+"""Резервные копии базы без остановки приложения.
+
+Копия снимается через backup API SQLite небольшими пачками страниц с
+паузами между ними: писатели и окна продолжают работать, а копия
+получается целостной, в отличие от копирования файла во время записи.
+Поддерживаются сжатие (zlib — файл .gz, lzma — файл .xz), копии по
+расписанию с ротацией (BackupThread) и восстановление.
+
+    python backup.py backup [--db путь] [--dir каталог] [--keep 7] [--compress zlib|lzma]
+    python backup.py restore копия [--db путь]
+"""
+import argparse
+import datetime
+import gzip
+import logging
+import lzma
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('cookbook.backup')
+
+# Сжатие → (расширение файла, функция открытия)
+COMPRESSION = {'zlib': ('.gz', gzip.open), 'lzma': ('.xz', lzma.open)}
+
+CHUNK_SIZE = 1 << 20
+
+
+def backup_database(conn, target_path, pages_per_step=256, pause=0.01, compression=None,
+                    progress=None):
+    """Целостная копия базы соединения conn в файл target_path.
+
+    Между шагами по pages_per_step страниц — пауза pause секунд. Обычно
+    backup API начинает копирование заново, если базу изменило другое
+    соединение, и под постоянной записью копия могла бы не закончиться
+    никогда. Поэтому на время копирования на conn держится транзакция
+    чтения: в режиме WAL она фиксирует снимок базы и не мешает писателям.
+    compression — None, 'zlib' или 'lzma' (к имени добавляется .gz / .xz).
+    progress(осталось страниц, всего страниц) вызывается после каждого шага.
+    Копия пишется во временный файл и переименовывается в конце, поэтому
+    по имени target_path никогда не лежит недописанный файл.
+    Возвращает путь к готовой копии.
+    """
+    if compression is not None:
+        suffix, open_compressed = COMPRESSION[compression]
+        target_path += suffix
+    partial_path = target_path + '.partial'
+    copy_path = partial_path if compression is None else partial_path + '.raw'
+
+    def on_step(status, remaining, total):
+        if progress is not None:
+            progress(remaining, total)
+        if remaining:
+            time.sleep(pause)
+
+    start = time.perf_counter()
+    try:
+        target = sqlite3.connect(copy_path)
+        try:
+            conn.execute('BEGIN')
+            try:
+                conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+                conn.backup(target, pages=pages_per_step, progress=on_step)
+            finally:
+                conn.execute('COMMIT')
+            # Копия — самостоятельный файл, без -wal рядом
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+
+        if compression is not None:
+            with open(copy_path, 'rb') as source, open_compressed(partial_path, 'wb') as packed:
+                shutil.copyfileobj(source, packed, CHUNK_SIZE)
+            os.remove(copy_path)
+        os.replace(partial_path, target_path)
+    except BaseException:
+        for path in {copy_path, partial_path}:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    logger.info("Резервная копия %s: %.1f МБ за %.1f с", target_path,
+                os.path.getsize(target_path) / 2**20, time.perf_counter() - start)
+    return target_path
+
+
+def _unpacked(backup_path, directory):
+    """Путь к несжатой копии (сжатая распаковывается во временный файл рядом с базой)"""
+    for suffix, open_compressed in COMPRESSION.values():
+        if backup_path.endswith(suffix):
+            unpacked_path = os.path.join(directory, os.path.basename(backup_path) + '.restore')
+            with open_compressed(backup_path, 'rb') as packed, open(unpacked_path, 'wb') as target:
+                shutil.copyfileobj(packed, target, CHUNK_SIZE)
+            return unpacked_path, True
+    return backup_path, False
+
+
+def restore_database(backup_path, db_path):
+    """Восстановление базы db_path из копии (сжатой или нет).
+
+    Копия проверяется PRAGMA integrity_check и переносится в базу через
+    backup API одним шагом: соединения с базой увидят новое содержимое
+    целиком или не увидят вовсе. Кэш и индексы уже открытого
+    DatabaseManager после этого устарели — восстанавливать лучше при
+    закрытом приложении. Схема старой копии обновится миграциями при
+    следующем открытии. Возвращает True при успехе.
+    """
+    unpacked_path, temporary = _unpacked(backup_path, os.path.dirname(os.path.abspath(db_path)))
+    try:
+        source = sqlite3.connect(unpacked_path)
+        try:
+            result = source.execute('PRAGMA integrity_check').fetchone()[0]
+            if result != 'ok':
+                logger.error("Копия %s повреждена: %s", backup_path, result)
+                return False
+            target = sqlite3.connect(db_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+        logger.info("База %s восстановлена из %s", db_path, backup_path)
+        return True
+    finally:
+        if temporary:
+            os.remove(unpacked_path)
+
+
+def backup_name(db_path, directory, now=None):
+    """Имя копии по расписанию: <база>-ГГГГММДД-ЧЧММСС.db"""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    stamp = (now or datetime.datetime.now()).strftime('%Y%m%d-%H%M%S')
+    return os.path.join(directory, f"{stem}-{stamp}.db")
+
+
+def list_backups(db_path, directory):
+    """Готовые копии базы в каталоге, от старых к новым"""
+    prefix = os.path.splitext(os.path.basename(db_path))[0] + '-'
+    suffixes = ('.db',) + tuple(suffix for suffix, _ in COMPRESSION.values())
+    if not os.path.isdir(directory):
+        return []
+    # Отметка времени в имени сортируется так же, как время
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith(prefix) and name.endswith(suffixes))
+
+
+def rotate_backups(db_path, directory, keep):
+    """Удаление всех копий, кроме keep последних; возвращает удалённые пути"""
+    backups = list_backups(db_path, directory)
+    removed = backups[:-keep] if keep else backups
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+class BackupThread(threading.Thread):
+    """Резервные копии по расписанию с ротацией.
+
+    Как и MaintenanceThread, работает на собственном соединении из пула
+    DatabaseManager. Хранит keep последних копий в каталоге directory.
+    """
+
+    def __init__(self, db_manager, directory, interval=3600.0, keep=7, compression='zlib',
+                 pages_per_step=256, pause=0.01):
+        super().__init__(name='db-backup', daemon=True)
+        self.db_manager = db_manager
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self.compression = compression
+        self.pages_per_step = pages_per_step
+        self.pause = pause
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.backup_now()
+            except Exception as e:
+                logger.error("Ошибка резервного копирования: %s", e)
+
+    def backup_now(self):
+        """Копия сейчас и удаление лишних старых копий; возвращает путь к копии"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = backup_database(self.db_manager.pool.get(),
+                               backup_name(self.db_manager.db_name, self.directory),
+                               self.pages_per_step, self.pause, self.compression)
+        rotate_backups(self.db_manager.db_name, self.directory, self.keep)
+        return path
+
+    def stop(self, wait=True):
+        self._stop_event.set()
+        if wait and self.is_alive():
+            self.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Резервные копии базы рецептов")
+    parser.add_argument('command', choices=['backup', 'restore'])
+    parser.add_argument('path', nargs='?', help="копия для восстановления")
+    parser.add_argument('--db', help="путь к базе (по умолчанию — база приложения)")
+    parser.add_argument('--dir', default='backups', help="каталог копий")
+    parser.add_argument('--keep', type=int, default=7, help="сколько последних копий хранить")
+    parser.add_argument('--compress', choices=sorted(COMPRESSION), help="сжатие копии")
+    args = parser.parse_args()
+
+    from db_manager import DB_NAME, DatabaseManager
+    db_path = args.db or DB_NAME
+
+    if args.command == 'restore':
+        if not args.path:
+            parser.error("укажите файл копии")
+        if restore_database(args.path, db_path):
+            print(f"✅ База {db_path} восстановлена из {args.path}")
+        else:
+            print(f"❌ Не удалось восстановить базу из {args.path}")
+        return
+
+    db_manager = DatabaseManager(db_path)
+    try:
+        thread = BackupThread(db_manager, args.dir, keep=args.keep, compression=args.compress)
+        path = thread.backup_now()
+        print(f"✅ Резервная копия: {path} ({os.path.getsize(path) / 2**20:.1f} МБ)")
+    finally:
+        db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1 @@
+"""Бенчмарки производительности книги рецептов"""
\ No newline at end of file
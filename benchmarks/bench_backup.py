@@ -0,0 +1,115 @@
+"""Задержка записи во время резервного копирования большой базы.
+
+База добивается до заданного размера (по умолчанию 1 ГБ) таблицей со
+случайными данными. Писатель в отдельном потоке добавляет рецепт каждые
+5 мс; задержка каждой записи замеряется без копирования, во время копии
+пачками страниц с паузами (как у BackupThread), во время копии одним
+шагом и во время копирования файла под блокировкой записи (без неё копия
+работающей базы может оказаться рваной).
+
+Запуск: python -m benchmarks.bench_backup [размер_МБ] [zlib|lzma]
+"""
+import os
+import shutil
+import sys
+import threading
+import time
+
+from backup import backup_database
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db
+
+ROW_BYTES = 8000
+
+
+def fill_to_size(manager, size_mb):
+    """Добивка базы строками случайных данных до size_mb мегабайт"""
+    conn = manager.pool.get()
+    conn.execute('CREATE TABLE IF NOT EXISTS Bench_Filler (data BLOB)')
+    while os.path.getsize(manager.db_name) < size_mb * 2**20:
+        with manager.transaction() as conn:
+            conn.execute('''
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000)
+                INSERT INTO Bench_Filler SELECT randomblob(?) FROM n
+            ''', (ROW_BYTES,))
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+def locked_file_copy(conn, db_path, target):
+    """Копирование файлов базы и WAL, пока писатели ждут блокировку"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        shutil.copyfile(db_path, target)
+        if os.path.exists(db_path + '-wal'):
+            shutil.copyfile(db_path + '-wal', target + '-wal')
+    finally:
+        conn.execute('COMMIT')
+
+
+class Writer(threading.Thread):
+    """Поток, добавляющий рецепты и замеряющий задержку каждой записи"""
+
+    def __init__(self, manager, interval=0.005):
+        super().__init__(daemon=True)
+        self.manager = manager
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.busy = threading.Lock()
+
+    def run(self):
+        number = 0
+        while not self.stopped.wait(self.interval):
+            with self.busy:
+                start = time.perf_counter()
+                self.manager.add_recipe(f'Запись во время копии {number}', '', 10)
+                self.samples.append((time.perf_counter() - start) * 1e6)
+            number += 1
+
+    def measure(self, action):
+        """Задержки записей, пока выполняется action; возвращает (замеры, время action)"""
+        self.samples = []
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        # Запись, начатая во время action, тоже относится к замеру
+        with self.busy:
+            return self.samples, elapsed
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    compression = sys.argv[2] if len(sys.argv) > 2 else None
+
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, 20_000)
+        start = time.perf_counter()
+        fill_to_size(manager, size_mb)
+        print(f"База {os.path.getsize(db_path) / 2**20:.0f} МБ, "
+              f"построена за {time.perf_counter() - start:.0f} с")
+
+        writer = Writer(manager)
+        writer.start()
+        conn = manager.pool.get()
+        target = os.path.join(os.path.dirname(db_path), 'backup.db')
+        phases = [
+            ('Без копирования', lambda: time.sleep(5)),
+            ('Копия пачками (256 стр., пауза 10 мс)',
+             lambda: backup_database(conn, target, 256, 0.01, compression)),
+            ('Копия одним шагом', lambda: backup_database(conn, target, -1, 0, compression)),
+            ('Копирование файла под блокировкой', lambda: locked_file_copy(conn, db_path, target)),
+        ]
+        for title, action in phases:
+            samples, elapsed = writer.measure(action)
+            print_summary(title, summarize(samples))
+            print(f"{'':<40} записей {len(samples)}, худшая {max(samples) / 1000:.1f} мс, "
+                  f"длительность {elapsed:.1f} с")
+            for name in os.listdir(os.path.dirname(db_path)):
+                if name.startswith('backup.db'):
+                    os.remove(os.path.join(os.path.dirname(db_path), name))
+        writer.stopped.set()
+        writer.join()
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Массовый импорт и потоковый экспорт против add_recipe по одному.
+
+Запуск: python -m benchmarks.bench_bulk_io [число_рецептов] [размер_пакета]
+"""
+import contextlib
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import DISHES, PRODUCTS, STYLES, UNITS, temp_db
+from db_manager import DatabaseManager
+from recipe_io import RecipeImporter, export_file, import_file
+
+
+def synthetic_recipes(count, seed=7):
+    """Генератор рецептов для импорта"""
+    rnd = random.Random(seed)
+    # У ингредиента одна единица во всех рецептах: несовместимые единицы
+    # импорт отклоняет
+    ingredients = [(f'{product} {number}', UNITS[(position + number) % len(UNITS)])
+                   for position, product in enumerate(PRODUCTS) for number in range(41)]
+    for i in range(count):
+        yield {
+            'name': f'{rnd.choice(DISHES)} {rnd.choice(STYLES)} №{i}',
+            'description': f'{rnd.choice(STYLES).capitalize()} вариант',
+            'cooking_time': rnd.randint(5, 180),
+            'ingredients': [
+                {'name': name, 'unit': unit, 'quantity': rnd.randint(1, 500)}
+                for name, unit in (rnd.choice(ingredients) for _ in range(rnd.randint(2, 12)))
+            ],
+        }
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    n_single = min(n_recipes, 2_000)
+
+    with temp_db() as db_path, open(os.devnull, 'w') as devnull:
+        manager = DatabaseManager(db_path)
+
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for recipe in synthetic_recipes(n_single):
+                manager.add_recipe(recipe['name'], recipe['description'], recipe['cooking_time'])
+            single = n_single / (time.perf_counter() - start)
+        print(f"add_recipe по одному: {single:10.0f} рецептов/с (без ингредиентов)")
+
+        stats = RecipeImporter(manager, batch_size).import_recipes(synthetic_recipes(n_recipes))
+        print(f"Пакетный импорт:     {stats['recipes'] / stats['seconds']:10.0f} рецептов/с "
+              f"(пакет {batch_size})")
+
+        for extension in ('jsonl', 'csv'):
+            path = os.path.join(os.path.dirname(db_path), f'export.{extension}')
+            export_file(manager, path)
+
+            # Отдельный проход под tracemalloc: он сильно замедляет выполнение
+            tracemalloc.start()
+            with contextlib.redirect_stdout(devnull):
+                export_file(manager, path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"Пик памяти при экспорте {extension}: {peak / 1024:.0f} КиБ")
+
+            target = DatabaseManager(os.path.join(os.path.dirname(db_path), f'copy_{extension}.db'))
+            import_file(target, path, batch_size)
+            target.close()
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""Задержка одного вызова DatabaseManager: соединение на вызов против пула.
+
+Запуск: python -m benchmarks.bench_connection [число_рецептов] [число_вызовов]
+"""
+import contextlib
+import os
+import random
+import sqlite3
+import sys
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+
+
+def legacy_get_recipe_details(db_name, recipe_id):
+    """Прежняя реализация: новое соединение на каждый вызов"""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, name, description, cooking_time, created_at
+        FROM Recipes WHERE id = ?
+    ''', (recipe_id,))
+    recipe = cursor.fetchone()
+    conn.close()
+    return recipe
+
+
+def legacy_update_recipe(db_name, recipe_id, name, description, cooking_time):
+    """Прежняя реализация обновления рецепта"""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE Recipes
+        SET name = ?, description = ?, cooking_time = ?
+        WHERE id = ?
+    ''', (name, description, cooking_time, recipe_id))
+    conn.commit()
+    conn.close()
+    return True
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rnd = random.Random(1)
+    ids = [rnd.randint(1, n_recipes) for _ in range(n_calls)]
+    updates = [(recipe_id, f'Рецепт {recipe_id}', 'Обновлено', 30) for recipe_id in ids]
+
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes)
+        print(f"База: {n_recipes} рецептов, {n_calls} вызовов на замер")
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            read_before = time_calls(legacy_get_recipe_details, [(db_path, i) for i in ids])
+            read_after = time_calls(manager.get_recipe_details, [(i,) for i in ids])
+            write_before = time_calls(legacy_update_recipe, [(db_path,) + u for u in updates])
+            write_after = time_calls(manager.update_recipe, updates)
+
+        print_summary('get_recipe_details: соединение на вызов', summarize(read_before))
+        print_summary('get_recipe_details: пул', summarize(read_after))
+        print_summary('update_recipe: соединение на вызов', summarize(write_before))
+        print_summary('update_recipe: пул', summarize(write_after))
+        print(f"Открыто соединений пулом: {manager.pool.connections_opened}")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Скорость удаления рецептов: по одному и пакетом, затем обслуживание базы.
+
+Связи с ингредиентами и позиции списка покупок удаляются каскадом
+(ON DELETE CASCADE). Для сравнения — прежнее удаление: отдельные DELETE
+для связей и рецепта в транзакции на каждый рецепт.
+
+Запуск: python -m benchmarks.bench_delete [число_рецептов] [размер_пакета]
+"""
+import os
+import random
+import sys
+import time
+
+from benchmarks.bench_shopping_list import fill_shopping_list
+from benchmarks.common import make_cookbook, temp_db
+from maintenance import run_maintenance
+
+
+def legacy_delete_recipe(conn, recipe_id):
+    """Прежнее удаление: связи и рецепт отдельными запросами"""
+    conn.execute('BEGIN')
+    conn.execute('DELETE FROM Recipe_Ingredients WHERE recipe_id = ?', (recipe_id,))
+    conn.execute('DELETE FROM Recipes WHERE id = ?', (recipe_id,))
+    conn.execute('COMMIT')
+
+
+def report(title, count, seconds):
+    print(f"{title:<45} {count:>7} рецептов за {seconds * 1000:9.1f} мс   "
+          f"{count / seconds:10.0f} рецептов/с")
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    n_single = min(1_000, n_recipes // 10)
+    ids = list(range(1, n_recipes + 1))
+    random.Random(11).shuffle(ids)
+
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes)
+        conn = manager.pool.get()
+        fill_shopping_list(conn, n_recipes // 5, n_recipes, 500)
+        print(f"База: {n_recipes} рецептов, "
+              f"{conn.execute('SELECT COUNT(*) FROM Recipe_Ingredients').fetchone()[0]} связей, "
+              f"{conn.execute('SELECT COUNT(*) FROM Shopping_List').fetchone()[0]} позиций списка покупок")
+
+        chunks = [ids[i:i + n_single] for i in range(0, 3 * n_single, n_single)]
+        batch = ids[3 * n_single:3 * n_single + batch_size]
+
+        # Как до включения внешних ключей: позиции списка покупок остаются
+        conn.execute('PRAGMA foreign_keys = OFF')
+        start = time.perf_counter()
+        for recipe_id in chunks[0]:
+            legacy_delete_recipe(conn, recipe_id)
+        report('Прежнее удаление по одному', len(chunks[0]), time.perf_counter() - start)
+        conn.execute('PRAGMA foreign_keys = ON')
+
+        start = time.perf_counter()
+        for recipe_id in chunks[1]:
+            manager.delete_recipe(recipe_id)
+        report('delete_recipe (каскад) по одному', len(chunks[1]), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        manager.delete_recipes(chunks[2])
+        report(f'delete_recipes: пакет из {len(chunks[2])}', len(chunks[2]), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        manager.delete_recipes(batch)
+        report(f'delete_recipes: пакет из {len(batch)}', len(batch), time.perf_counter() - start)
+
+        orphans = conn.execute('''
+            SELECT COUNT(*) FROM Shopping_List
+            WHERE recipe_id NOT IN (SELECT id FROM Recipes)
+        ''').fetchone()[0]
+        print(f"Позиций списка покупок без рецепта после прежнего удаления: {orphans}")
+
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size_before = os.path.getsize(db_path)
+        start = time.perf_counter()
+        result = run_maintenance(manager)
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        print(f"Обслуживание: {(time.perf_counter() - start) * 1000:.0f} мс, удалено {result['removed']}, "
+              f"освобождено страниц: {result['freed_pages']}, "
+              f"файл {size_before / 1e6:.1f} → {os.path.getsize(db_path) / 1e6:.1f} МБ")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""Подсказки ингредиентов с опечатками и поиск дублей на 100 000 названий.
+
+Названия — продукт и случайное «слово» из слогов; к ним добавлено 5 %
+дублей с типичным мусором: другой регистр, пробелы по краям, «ё» вместо
+«е» и одна опечатка. Замеряются построение индекса, подсказка на каждое
+нажатие клавиши (цель — меньше 10 мс) в сравнении с LIKE в SQL, поиск
+дублей (с долей найденных заведомых дублей) и объединение в одной
+транзакции.
+
+Запуск: python -m benchmarks.bench_ingredient_index [число_названий]
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import PRODUCTS, UNITS, make_cookbook, print_summary, summarize, temp_db, time_calls
+from ingredient_index import IngredientIndex, normalize_name
+
+# Слоги «согласная + гласная» и несколько закрытых: распределение
+# триграмм похоже на настоящие названия сортов и марок
+SYLLABLES = [consonant + vowel for consonant in 'бвгдзклмнпрстфхчш' for vowel in 'аеиоуя']
+SYLLABLES += ['ман', 'тор', 'сал', 'лан', 'пас', 'бер', 'вин', 'сте', 'крас', 'грин']
+
+
+def make_names(n_names, rnd):
+    """Уникальные названия и заведомые дубли: [(название, ID оригинала или None)]"""
+    names, seen = [], set()
+    while len(names) < n_names * 0.95:
+        word = ''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+        name = f"{rnd.choice(PRODUCTS)} {word}"
+        if normalize_name(name) not in seen:
+            seen.add(normalize_name(name))
+            names.append((name, None))
+    originals = len(names)
+    while len(names) < n_names:
+        original = rnd.randrange(originals)
+        names.append((garble(names[original][0], rnd), original + 1))
+    return names
+
+
+def garble(name, rnd):
+    """Дубль названия с «пользовательскими» искажениями"""
+    variant = rnd.choice([str.lower, str.upper, str.capitalize])(name)
+    if rnd.random() < 0.5:
+        variant = variant.replace('е', 'ё', 1)
+    if rnd.random() < 0.5:
+        position = rnd.randrange(1, len(variant))
+        variant = variant[:position] + rnd.choice('аеоиу') + variant[position + 1:]
+    return f" {variant}  " if rnd.random() < 0.5 else variant
+
+
+def keystrokes(names, rnd, count):
+    """Ввод названий по буквам, иногда с опечаткой"""
+    typed = []
+    while len(typed) < count:
+        name = rnd.choice(names)[0]
+        if rnd.random() < 0.3:
+            name = garble(name, rnd).strip()
+        typed.extend((name[:length],) for length in range(2, len(name) + 1))
+    return typed[:count]
+
+
+def main():
+    n_names = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rnd = random.Random(11)
+    names = make_names(n_names, rnd)
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, 20_000, n_ingredients=0, per_recipe=0)
+        with manager.transaction() as conn:
+            conn.executemany('INSERT INTO Ingredients (name, unit) VALUES (?, ?)',
+                             [(name, rnd.choice([UNITS[0], None])) for name, _ in names])
+            conn.executemany('''
+                INSERT OR IGNORE INTO Recipe_Ingredients (recipe_id, ingredient_id, quantity)
+                VALUES (?, ?, ?)
+            ''', [(rnd.randint(1, 20_000), rnd.randint(1, n_names), rnd.randint(1, 500))
+                  for _ in range(100_000)])
+        print(f"Названий ингредиентов: {n_names}, из них заведомых дублей: "
+              f"{sum(original is not None for _, original in names)}")
+
+        start = time.perf_counter()
+        index = manager.get_ingredient_index()
+        print(f"{'Построение индекса':<40} {(time.perf_counter() - start) * 1000:9.1f} мс")
+
+        typed = keystrokes(names, rnd, 3_000)
+        print_summary('Подсказка на нажатие (индекс)', summarize(time_calls(manager.suggest_ingredients, typed)))
+        like = lambda text: conn.execute(
+            "SELECT id, name FROM Ingredients WHERE name LIKE ? LIMIT 10", (f'%{text}%',)).fetchall()
+        print_summary('LIKE %ввод% (без опечаток)', summarize(time_calls(like, typed[:500])))
+
+        start = time.perf_counter()
+        merges = manager.find_duplicate_ingredients()
+        print(f"{'Поиск дублей':<40} {(time.perf_counter() - start) * 1000:9.1f} мс")
+        planted = {row + 1: original for row, (_, original) in enumerate(names) if original is not None}
+        found = sum(1 for duplicate_id, original in planted.items()
+                    if merges.get(duplicate_id, duplicate_id) == merges.get(original, original))
+        print(f"Найдено заведомых дублей: {found} из {len(planted)}, всего к объединению: {len(merges)}")
+
+        links = conn.execute('SELECT COUNT(*) FROM Recipe_Ingredients').fetchone()[0]
+        start = time.perf_counter()
+        merged = manager.merge_ingredients(merges)
+        print(f"{'Объединение в одной транзакции':<40} {(time.perf_counter() - start) * 1000:9.1f} мс "
+              f"(удалено {merged}, связей {links} → "
+              f"{conn.execute('SELECT COUNT(*) FROM Recipe_Ingredients').fetchone()[0]})")
+        assert isinstance(index, IngredientIndex)
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
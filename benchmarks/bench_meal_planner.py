@@ -0,0 +1,78 @@
+"""Подбор меню: длина списка покупок и время поиска.
+
+По умолчанию 50 000 рецептов по 5 ингредиентов в среднем. Для каждого
+набора ограничений сравниваются случайный выбор подходящих рецептов,
+один жадный проход (time_limit=0) и полный поиск с заменами и повторами.
+
+Запуск: python -m benchmarks.bench_meal_planner [число_рецептов]
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+
+CASES = [
+    ('7 ужинов', dict(count=7)),
+    ('7 ужинов, всего до 5 ч', dict(count=7, max_total_time=300)),
+    ('21 блюдо, каждое до 30 мин', dict(count=21, max_time=30)),
+    ('7 ужинов с ингредиентами 3 и 40, без 1', dict(count=7, required=[3, 40], excluded=[1])),
+]
+
+
+def random_plan(links, cooking_times, rnd, count, max_total_time=None, max_time=None,
+                required=(), excluded=()):
+    """Лучший из 100 случайных планов, удовлетворяющих ограничениям"""
+    candidates = [recipe_id for recipe_id, ingredients in links.items()
+                  if (max_time is None or cooking_times[recipe_id] <= max_time)
+                  and not ingredients & set(excluded)]
+    best = None
+    for _ in range(100):
+        plan = rnd.sample(candidates, count)
+        ingredients = set().union(*(links[recipe_id] for recipe_id in plan))
+        total = sum(cooking_times[recipe_id] for recipe_id in plan)
+        if set(required) <= ingredients and (max_total_time is None or total <= max_total_time):
+            best = min(best or (len(ingredients), total), (len(ingredients), total))
+    return best
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rnd = random.Random(3)
+
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes)
+        conn = manager.pool.get()
+        links = {}
+        for recipe_id, ingredient_id in conn.execute('SELECT recipe_id, ingredient_id FROM Recipe_Ingredients'):
+            links.setdefault(recipe_id, set()).add(ingredient_id)
+        cooking_times = dict(conn.execute('SELECT id, cooking_time FROM Recipes'))
+
+        start = time.perf_counter()
+        planner = manager.get_meal_planner()
+        print(f"База: {n_recipes} рецептов; матрица и обратный индекс построены "
+              f"за {(time.perf_counter() - start) * 1000:.0f} мс")
+
+        for title, case in CASES:
+            print(f"\n{title}")
+            found = random_plan(links, cooking_times, rnd, **case)
+            print(f"   {'Лучший из 100 случайных':<36} " + (
+                f"позиций {found[0]:3d}, время {found[1]} мин" if found else "не найден"))
+            for name, time_limit in (('Жадный проход', 0.0), ('Жадный + замены', 0.5)):
+                start = time.perf_counter()
+                found = planner.plan(cooking_times=cooking_times, time_limit=time_limit, **case)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"   {name:<36} " + (
+                    f"позиций {found[1]:3d}, время {found[2]} мин" if found else "не найден")
+                      + f"   ({elapsed:.0f} мс)")
+
+        print()
+        print_summary('plan_meals(7)', summarize(time_calls(manager.plan_meals, [(7,)] * 10)))
+        plans = [[recipe_id for recipe_id, _, _ in manager.plan_meals(7)[0]]] * 10
+        print_summary('add_plan_to_shopping_list(7)',
+                      summarize(time_calls(manager.add_plan_to_shopping_list, [(plan,) for plan in plans])))
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
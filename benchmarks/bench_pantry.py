@@ -0,0 +1,67 @@
+"""Подбор рецептов по имеющимся ингредиентам: обратный индекс против GROUP BY.
+
+По умолчанию 200 000 рецептов по 5 ингредиентов в среднем (~1 млн связей).
+Запрос — случайный набор продуктов «в холодильнике».
+
+Запуск: python -m benchmarks.bench_pantry [число_рецептов] [размер_набора]
+"""
+import json
+import random
+import sys
+import time
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+from recipe_matching import PantryIndex
+
+N_INGREDIENTS = 500
+
+
+def sql_group_by(conn, available, limit=50):
+    """Наивный подбор одним запросом с группировкой"""
+    return conn.execute('''
+        SELECT ri.recipe_id, COUNT(*) AS matched, t.total, t.total - COUNT(*) AS missing
+        FROM Recipe_Ingredients ri
+        JOIN (SELECT recipe_id, COUNT(*) AS total
+              FROM Recipe_Ingredients GROUP BY recipe_id) t ON t.recipe_id = ri.recipe_id
+        WHERE ri.ingredient_id IN (SELECT value FROM json_each(?))
+        GROUP BY ri.recipe_id
+        ORDER BY missing, matched * 1.0 / t.total DESC, ri.recipe_id
+        LIMIT ?
+    ''', (json.dumps(list(available)), limit)).fetchall()
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    pantry_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rnd = random.Random(5)
+    pantries = [rnd.sample(range(1, N_INGREDIENTS + 1), pantry_size) for _ in range(50)]
+
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes, N_INGREDIENTS)
+        conn = manager.pool.get()
+
+        start = time.perf_counter()
+        index = PantryIndex.from_connection(conn)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"База: {n_recipes} рецептов, {len(index)} связей, набор из {pantry_size} "
+              f"ингредиентов; индекс построен за {build_ms:.0f} мс")
+
+        for pantry in pantries[:5]:
+            expected = [row[3] for row in sql_group_by(conn, pantry)]
+            actual = [row[3] for row in index.match(pantry)]
+            assert expected == actual, "Результаты индекса и GROUP BY расходятся"
+
+        print_summary('SQL GROUP BY', summarize(time_calls(sql_group_by, [(conn, p) for p in pantries])))
+        print_summary('PantryIndex.match', summarize(time_calls(index.match, [(p,) for p in pantries])))
+        print_summary('PantryIndex.match, не больше 2 недостающих',
+                      summarize(time_calls(index.match, [(p, 50, 2) for p in pantries])))
+
+        ids = [rnd.randint(1, n_recipes) for _ in range(1_000)]
+        print_summary('PantryIndex.set_recipe (правка рецепта)', summarize(time_calls(
+            index.set_recipe,
+            [(i, rnd.sample(range(1, N_INGREDIENTS + 1), 6)) for i in ids])))
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
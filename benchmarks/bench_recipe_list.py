@@ -0,0 +1,95 @@
+"""Время до первой отрисовки и пиковая память списка рецептов.
+
+Сравниваются загрузка всего списка (get_all_recipes) и постраничная
+модель RecipeListModel. Каждый режим запускается в отдельном процессе,
+чтобы пиковый RSS не смешивался.
+
+Запуск: python -m benchmarks.bench_recipe_list [число_рецептов]
+Без PyQt6 измеряется только загрузка данных.
+"""
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import make_cookbook, temp_db
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def peak_rss_mb():
+    """Пиковый RSS процесса в МБ (None, если модуль resource недоступен)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode, db_path):
+    """Замер в текущем процессе; результат печатается как JSON"""
+    from db_manager import DatabaseManager
+
+    try:
+        from PyQt6.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+        app = QApplication(sys.argv)
+    except ImportError:
+        app = None
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        manager = DatabaseManager(db_path)
+        if mode == 'all':
+            recipes = manager.get_all_recipes()
+            if app is not None:
+                view = QTableWidget(len(recipes), 1)
+                for row, (recipe_id, name) in enumerate(recipes):
+                    view.setItem(row, 0, QTableWidgetItem(name))
+        else:
+            if app is not None:
+                from recipe_list_model import RecipeListModel
+                view = QTableView()
+                view.setModel(RecipeListModel(manager))
+            else:
+                recipes = manager.get_recipes_page(None, 200)
+
+        if app is not None:
+            view.show()
+            app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': mode,
+        'qt': app is not None,
+        'first_paint_ms': elapsed * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with temp_db() as db_path:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            make_cookbook(db_path, n_recipes, per_recipe=0).close()
+        print(f"База: {n_recipes} рецептов")
+
+        for mode in ('all', 'paged'):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_recipe_list', '--measure', mode, db_path],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rss = result['peak_rss_mb']
+            print(f"{mode:<6} первая отрисовка {result['first_paint_ms']:9.1f} мс   "
+                  f"пиковый RSS {rss if rss is None else round(rss, 1)} МБ"
+                  f"{'' if result['qt'] else '   (без Qt)'}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Калорийность и стоимость всех рецептов: матрица RollupEngine против построчного расчёта.
+
+По умолчанию 200 000 рецептов по 5 ингредиентов в среднем (~1 млн связей),
+у всех ингредиентов заполнены свойства. Для сравнения — расчёт через
+get_ingredients по каждому рецепту и один SQL-запрос с группировкой.
+С установленным NumPy суммы по строкам считает np.add.reduceat, без
+него — префиксные суммы над array.
+
+Запуск: python -m benchmarks.bench_rollup [число_рецептов]
+"""
+import random
+import sys
+import time
+
+import rollup
+from benchmarks.common import make_cookbook, temp_db
+from rollup import ATTRIBUTES, RollupEngine
+
+N_INGREDIENTS = 500
+
+
+def fill_attributes(conn, n_ingredients, seed=3):
+    rnd = random.Random(seed)
+    conn.execute('BEGIN')
+    conn.executemany(f'''
+        INSERT OR REPLACE INTO Ingredient_Attributes (ingredient_id, per_quantity, {', '.join(ATTRIBUTES)})
+        VALUES (?, 100, ?, ?, ?, ?, ?)
+    ''', [(i, rnd.uniform(20, 900), rnd.uniform(0, 30), rnd.uniform(0, 60),
+           rnd.uniform(0, 80), rnd.uniform(5, 300)) for i in range(1, n_ingredients + 1)])
+    conn.execute('COMMIT')
+
+
+def sql_totals(conn):
+    """Итоги калорийности одним запросом с группировкой"""
+    return dict(conn.execute('''
+        SELECT ri.recipe_id, SUM(ri.quantity * a.calories / a.per_quantity)
+        FROM Recipe_Ingredients ri
+        JOIN Ingredient_Attributes a ON a.ingredient_id = ri.ingredient_id
+        GROUP BY ri.recipe_id
+    '''))
+
+
+def row_by_row_totals(manager, recipe_ids, values):
+    """Прежний путь: ингредиенты каждого рецепта отдельным запросом"""
+    totals = {}
+    for recipe_id in recipe_ids:
+        rows = manager.pool.get().execute('''
+            SELECT ingredient_id, quantity FROM Recipe_Ingredients WHERE recipe_id = ?
+        ''', (recipe_id,))
+        totals[recipe_id] = sum((quantity or 0) * values.get(ingredient_id, 0.0)
+                                for ingredient_id, quantity in rows)
+    return totals
+
+
+def report(title, seconds):
+    print(f"{title:<55} {seconds * 1000:9.1f} мс")
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes, N_INGREDIENTS)
+        conn = manager.pool.get()
+        fill_attributes(conn, N_INGREDIENTS)
+        print(f"База: {n_recipes} рецептов, "
+              f"{conn.execute('SELECT COUNT(*) FROM Recipe_Ingredients').fetchone()[0]} связей; "
+              f"NumPy: {'да' if rollup.np is not None else 'нет'}")
+
+        start = time.perf_counter()
+        engine = RollupEngine.from_connection(conn)
+        report('Загрузка матрицы', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for name in ATTRIBUTES:
+            engine.totals(name)
+        report(f'Итоги {len(ATTRIBUTES)} свойств по всем рецептам', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        engine.totals('calories')
+        report('Повторный запрос (кэш)', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        expected = sql_totals(conn)
+        report('SQL GROUP BY, одно свойство', time.perf_counter() - start)
+
+        values = {ingredient_id: calories / per_quantity for ingredient_id, calories, per_quantity
+                  in conn.execute('SELECT ingredient_id, calories, per_quantity FROM Ingredient_Attributes')}
+        sample = random.Random(7).sample(list(engine.recipe_ids), min(5_000, len(engine.recipe_ids)))
+        start = time.perf_counter()
+        row_by_row = row_by_row_totals(manager, sample, values)
+        seconds = time.perf_counter() - start
+        report(f'Построчно, {len(sample)} рецептов (оценка на все)', seconds * len(engine.recipe_ids) / len(sample))
+
+        actual = engine.recipe_totals(sample, ['calories'])
+        for recipe_id in sample:
+            assert abs(actual[recipe_id]['calories'] - expected[recipe_id]) < 1e-6 * max(1.0, expected[recipe_id])
+            assert abs(actual[recipe_id]['calories'] - row_by_row[recipe_id]) < 1e-6 * max(1.0, row_by_row[recipe_id])
+
+        plan = {recipe_id: 2.0 for recipe_id in sample[:7]}
+        start = time.perf_counter()
+        engine.scaled_quantities(plan)
+        engine.plan_totals(plan)
+        report('План на 7 рецептов: количества и итоги', time.perf_counter() - start)
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Поиск рецептов: FTS5 с bm25 против прежнего LIKE '%...%'.
+
+Запуск: python -m benchmarks.bench_search [размеры через запятую]
+"""
+import contextlib
+import os
+import sys
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+
+# Частые слова совпадают с заметной долей базы, номера — с единицами рецептов
+TERMS = ['борщ', 'пир', 'грибной', 'котлеты мяс', 'Омлет сырный',
+         '4242', 'плов 777', 'салат 9001']
+
+
+def legacy_search(conn, search_term):
+    """Прежний поиск: полный просмотр таблицы по LIKE"""
+    return conn.execute('''
+        SELECT id, name FROM Recipes
+        WHERE name LIKE ?
+        ORDER BY name
+    ''', (f'%{search_term}%',)).fetchall()
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 \
+        else [10_000, 100_000, 1_000_000]
+
+    for size in sizes:
+        with temp_db() as db_path:
+            manager = make_cookbook(db_path, size)
+            conn = manager.pool.get()
+            print(f"\nБаза: {size} рецептов")
+
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                like = time_calls(legacy_search, [(conn, term) for term in TERMS * 5])
+                fts = time_calls(manager.search_recipes, [(term,) for term in TERMS * 5])
+                fts_top = time_calls(manager.search_recipes, [(term, 20) for term in TERMS * 5])
+
+            print_summary('LIKE по названию', summarize(like))
+            print_summary('FTS5 + bm25', summarize(fts))
+            print_summary('FTS5 + bm25, первые 20', summarize(fts_top))
+            manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Поиск по мере ввода: запрос на каждое нажатие против SearchController.
+
+Имитируется набор нескольких запросов с паузами между нажатиями
+(длиннее — после пробела), опечатками и стиранием. Для каждого режима
+выводится число запросов к базе, время, на которое нажатие занимает
+GUI-поток, и задержка от последнего нажатия до окончательного результата.
+
+Запуск: python -m benchmarks.bench_search_typing [число_рецептов]
+"""
+import random
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.common import make_cookbook, temp_db
+from search_controller import SearchController
+
+PHRASES = ['борщ домашний', 'пирог с грибами', 'котлеты мяс', 'салат 9001', 'омлет сырный']
+
+
+def keystrokes(phrase, rnd):
+    """Тексты поля и паузы после нажатий: набор с редкими опечатками и стиранием"""
+    text = ''
+    for char in phrase:
+        if rnd.random() < 0.1:
+            yield text + 'ж', rnd.uniform(0.03, 0.09)
+        text += char
+        # После слова человек задумывается дольше
+        yield text, rnd.uniform(0.2, 0.4) if char == ' ' else rnd.uniform(0.03, 0.09)
+
+
+def simulate(phrases, on_key, wait_result, rnd):
+    """Набор фраз; возвращает время обработки нажатий и ожидания результата (мс)"""
+    blocking, latencies = [], []
+    for phrase in phrases:
+        for text, pause in keystrokes(phrase, rnd):
+            start = time.perf_counter()
+            on_key(text)
+            elapsed = time.perf_counter() - start
+            blocking.append(elapsed * 1000)
+            time.sleep(max(0.0, pause - elapsed))
+        start = time.perf_counter()
+        wait_result(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return blocking, latencies
+
+
+def report(title, queries, samples):
+    blocking, latencies = samples
+    print(f"{title:<36} запросов {queries:4d} на {len(blocking):4d} нажатий   "
+          f"нажатие: среднее {statistics.fmean(blocking):6.1f} мс, макс {max(blocking):6.1f} мс   "
+          f"ожидание результата: среднее {statistics.fmean(latencies):6.1f} мс")
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes)
+        print(f"База: {n_recipes} рецептов")
+
+        # Без контроллера: синхронный запрос на каждое нажатие
+        samples = simulate(PHRASES, lambda text: manager.search_recipes(text, 50),
+                           lambda text: None, random.Random(1))
+        report('search_recipes на каждое нажатие', len(samples[0]), samples)
+
+        # С контроллером: результат приходит в callback
+        arrived = threading.Condition()
+        results = {}
+
+        def callback(term, rows):
+            with arrived:
+                results[term] = rows
+                arrived.notify_all()
+
+        def wait_result(text):
+            with arrived:
+                arrived.wait_for(lambda: text in results, timeout=30)
+
+        controller = SearchController(manager, callback)
+        samples = simulate(PHRASES, controller.set_term, wait_result, random.Random(1))
+        stats = controller.stats
+        report('SearchController', stats['queries'], samples)
+        print(f"  уточнено в памяти: {stats['refined']}, из кэша: {stats['cache_hits']}, "
+              f"прервано запросов: {stats['interrupted']}")
+
+        # Повторный набор тех же фраз обслуживается кэшем
+        controller.stats.update(queries=0, keystrokes=0, refined=0, cache_hits=0, interrupted=0)
+        results.clear()
+        samples = simulate(PHRASES, controller.set_term, wait_result, random.Random(1))
+        report('SearchController, повторный набор', stats['queries'], samples)
+        controller.shutdown()
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
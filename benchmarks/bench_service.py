@@ -0,0 +1,116 @@
+"""Нагрузочный тест HTTP/JSON-сервиса рецептов (service.py).
+
+Клиенты — отдельные процессы с постоянным HTTP/1.1-соединением; смесь
+запросов: карточка рецепта, поиск, страница списка, подбор по
+ингредиентам и доля изменений рецептов (--writes). Без --url сервис
+запускается на временной базе с 1 и с --workers обработчиками, чтобы
+было видно масштабирование чтения по ядрам.
+
+Запуск: python -m benchmarks.bench_service [--url URL] [--recipes N]
+        [--workers N] [--clients N] [--seconds S] [--writes доля]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from urllib.parse import quote, urlsplit
+
+from benchmarks.bench_search import TERMS
+from benchmarks.common import make_cookbook, temp_db
+from service import RecipeServer
+
+
+def client(url, seconds, n_recipes, writes, seed):
+    """Один клиент: запросы подряд до истечения времени; задержки в мс"""
+    rnd = random.Random(seed)
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        roll = rnd.random()
+        body = None
+        if roll < writes:
+            method, path = 'PUT', f'/recipes/{rnd.randint(1, n_recipes)}'
+            body = json.dumps({'cooking_time': rnd.randint(5, 180)})
+        elif roll < 0.5:
+            method, path = 'GET', f'/recipes/{rnd.randint(1, n_recipes)}'
+        elif roll < 0.75:
+            method, path = 'GET', f'/search?q={quote(rnd.choice(TERMS))}&limit=20'
+        elif roll < 0.9:
+            method, path = 'GET', f'/recipes?limit=50&after_id={rnd.randint(1, n_recipes)}&after_name={quote("Пирог")}'
+        else:
+            ingredients = ','.join(str(rnd.randint(1, 500)) for _ in range(15))
+            method, path = 'GET', f'/match?ingredients={ingredients}&limit=20'
+
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body, {'Content-Type': 'application/json'} if body else {})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    return latencies, errors
+
+
+def load(url, clients, seconds, n_recipes, writes):
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.starmap(client, [(url, seconds, n_recipes, writes, seed)
+                                        for seed in range(clients)])
+    latencies = sorted(value for samples, _ in results for value in samples)
+    errors = sum(count for _, count in results)
+    return latencies, errors
+
+
+def report(title, latencies, errors, seconds):
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+    print(f"{title:<28} {len(latencies) / seconds:8.0f} запр/с   "
+          f"p50 {percentile(0.5):6.1f} мс   p95 {percentile(0.95):6.1f} мс   "
+          f"p99 {percentile(0.99):6.1f} мс   среднее {statistics.fmean(latencies):6.1f} мс   "
+          f"ошибок {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="адрес запущенного сервиса")
+    parser.add_argument('--recipes', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--writes', type=float, default=0.02, help="доля запросов на изменение")
+    args = parser.parse_args()
+
+    if args.url:
+        latencies, errors = load(args.url, args.clients, args.seconds, args.recipes, args.writes)
+        report(args.url, latencies, errors, args.seconds)
+        return
+
+    with temp_db() as db_path:
+        make_cookbook(db_path, args.recipes).close()
+        print(f"База: {args.recipes} рецептов, клиентов: {args.clients}, "
+              f"изменений: {args.writes:.0%}, по {args.seconds:.0f} с")
+        for workers in sorted({1, args.workers}):
+            server = RecipeServer(db_path, port=0, workers=workers, maintenance_interval=0).start()
+            try:
+                # Прогрев: процессы открывают соединения и строят индекс подбора
+                load(server.url, args.clients, 1.0, args.recipes, 0.0)
+                latencies, errors = load(server.url, args.clients, args.seconds, args.recipes, args.writes)
+            finally:
+                server.stop()
+            report(f'обработчиков: {workers}', latencies, errors, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""Архив купленных позиций: загрузка списка покупок до и после переноса.
+
+В список покупок добавляются 200 000 купленных позиций за два года и 300
+текущих. Замеряются запрос загрузки окна списка покупок (как в
+ShoppingListModel.fetch_rows) и сводный список, затем перенос старых
+покупок в архив — вместе с задержкой записи из другого потока во время
+переноса, — и те же запросы после него, а также запросы истории покупок.
+
+Запуск: python -m benchmarks.bench_shopping_archive [число_покупок]
+"""
+import datetime
+import random
+import sys
+import threading
+import time
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+from shopping_aggregation import aggregate_shopping_list
+from shopping_archive import archive_purchased, purchase_frequency, purchase_history, restock_predictions
+
+N_RECIPES = 2_000
+N_INGREDIENTS = 500
+N_CURRENT = 300
+
+LOAD_QUERY = '''
+    SELECT sl.id, i.name, sl.quantity, sl.unit, r.name, sl.purchased
+    FROM Shopping_List sl
+    JOIN Ingredients i ON sl.ingredient_id = i.id
+    JOIN Recipes r ON sl.recipe_id = r.id
+    ORDER BY sl.purchased, i.name
+'''
+
+
+def fill_history(conn, n_purchases, rnd):
+    """Купленные позиции за последние два года и текущий список"""
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+    def added(max_days):
+        return (now - datetime.timedelta(seconds=rnd.randrange(max_days * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+    rows = [(rnd.randint(1, N_RECIPES), rnd.randint(1, N_INGREDIENTS), rnd.randint(1, 500), 1, added(730))
+            for _ in range(n_purchases)]
+    rows += [(rnd.randint(1, N_RECIPES), rnd.randint(1, N_INGREDIENTS), rnd.randint(1, 500),
+              rnd.random() < 0.3, added(7)) for _ in range(N_CURRENT)]
+    conn.execute('BEGIN')
+    conn.executemany('''
+        INSERT INTO Shopping_List (recipe_id, ingredient_id, quantity, unit, purchased, added_date)
+        VALUES (?, ?, ?, 'г', ?, ?)
+    ''', rows)
+    conn.execute('COMMIT')
+    conn.execute('ANALYZE')
+
+
+def measure_reads(title, conn):
+    print_summary(f'{title}: загрузка окна списка',
+                  summarize(time_calls(lambda: conn.execute(LOAD_QUERY).fetchall(), [()] * 10)))
+    print_summary(f'{title}: сводный список',
+                  summarize(time_calls(lambda: aggregate_shopping_list(conn), [()] * 10)))
+
+
+def main():
+    n_purchases = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rnd = random.Random(5)
+
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, N_RECIPES, N_INGREDIENTS)
+        conn = manager.pool.get()
+        fill_history(conn, n_purchases, rnd)
+        print(f"Список покупок: {n_purchases} купленных позиций за два года и {N_CURRENT} текущих")
+        measure_reads('Без архива', conn)
+
+        # Писатель отмечает покупки, пока идёт перенос
+        current = [item_id for (item_id,) in conn.execute(
+            'SELECT id FROM Shopping_List ORDER BY id DESC LIMIT ?', (N_CURRENT,))]
+        samples, stopped = [], threading.Event()
+
+        def writer():
+            while not stopped.wait(0.005):
+                start = time.perf_counter()
+                with manager.transaction() as writer_conn:
+                    writer_conn.execute('UPDATE Shopping_List SET purchased = 1 - purchased WHERE id = ?',
+                                        (rnd.choice(current),))
+                samples.append((time.perf_counter() - start) * 1e6)
+
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        start = time.perf_counter()
+        moved = archive_purchased(conn, 30)
+        elapsed = time.perf_counter() - start
+        stopped.set()
+        thread.join()
+        print(f"\nВ архив перенесено {moved} позиций за {elapsed:.1f} с")
+        print_summary('Запись во время переноса', summarize(samples))
+        print(f"{'':<40} записей {len(samples)}, худшая {max(samples) / 1000:.1f} мс\n")
+
+        measure_reads('С архивом', conn)
+        today = datetime.date.today()
+        month = (today - datetime.timedelta(days=30), today)
+        print_summary('История за 30 дней', summarize(time_calls(
+            lambda: purchase_history(conn, *month), [()] * 10)))
+        print_summary('История ингредиента за год', summarize(time_calls(
+            lambda ingredient_id: purchase_history(conn, today - datetime.timedelta(days=365), today,
+                                                   ingredient_id),
+            [(rnd.randint(1, N_INGREDIENTS),) for _ in range(50)])))
+        print_summary('Частота покупок за всё время', summarize(time_calls(
+            lambda: purchase_frequency(conn), [()] * 5)))
+        print_summary('Прогноз покупок', summarize(time_calls(
+            lambda: restock_predictions(conn), [()] * 5)))
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
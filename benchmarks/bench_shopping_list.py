@@ -0,0 +1,105 @@
+"""Переключение «куплено» в списке покупок из 5000 позиций.
+
+Сравниваются прежняя полная перезагрузка таблицы с виджетами в ячейках
+и точечное обновление одной строки модели.
+
+Запуск: python -m benchmarks.bench_shopping_list [число_позиций] [число_переключений]
+Требуется PyQt6 (используется платформа offscreen).
+"""
+import contextlib
+import os
+import random
+import sys
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def fill_shopping_list(conn, n_items, n_recipes, n_ingredients, seed=3):
+    """Заполнение списка покупок случайными позициями"""
+    rnd = random.Random(seed)
+    conn.execute('BEGIN')
+    conn.executemany('''
+        INSERT INTO Shopping_List (recipe_id, ingredient_id, quantity, unit, purchased)
+        VALUES (?, ?, ?, ?, ?)
+    ''', ((rnd.randint(1, n_recipes), rnd.randint(1, n_ingredients), rnd.randint(1, 500),
+           'г', rnd.random() < 0.3) for _ in range(n_items)))
+    conn.execute('COMMIT')
+
+
+def legacy_reload(table, conn):
+    """Прежняя загрузка: новый QCheckBox и QPushButton в каждой строке"""
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtWidgets import QCheckBox, QPushButton, QTableWidgetItem
+
+    items = conn.execute('''
+        SELECT sl.id, i.name, sl.quantity, sl.unit, r.name, sl.purchased
+        FROM Shopping_List sl
+        JOIN Ingredients i ON sl.ingredient_id = i.id
+        JOIN Recipes r ON sl.recipe_id = r.id
+        ORDER BY sl.purchased, i.name
+    ''').fetchall()
+    table.setRowCount(len(items))
+    for row, (item_id, ingredient_name, quantity, unit, recipe_name, purchased) in enumerate(items):
+        checkbox = QCheckBox()
+        checkbox.setChecked(bool(purchased))
+        table.setCellWidget(row, 0, checkbox)
+        table.setItem(row, 1, QTableWidgetItem(ingredient_name))
+        table.setItem(row, 2, QTableWidgetItem(f"{quantity} {unit}"))
+        table.setItem(row, 3, QTableWidgetItem(recipe_name))
+        table.setCellWidget(row, 4, QPushButton("🗑️"))
+        if purchased:
+            for col in range(5):
+                item = table.item(row, col)
+                if item:
+                    item.setBackground(Qt.GlobalColor.lightGray)
+
+
+def legacy_toggle(table, conn, item_id, purchased):
+    """Прежнее переключение: UPDATE и перезагрузка всей таблицы"""
+    conn.execute('UPDATE Shopping_List SET purchased = ? WHERE id = ?', (purchased, item_id))
+    legacy_reload(table, conn)
+
+
+def main():
+    try:
+        from PyQt6.QtWidgets import QApplication, QTableWidget
+    except ImportError:
+        print("❌ Для этого бенчмарка нужен PyQt6")
+        return
+
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    n_toggles = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    app = QApplication(sys.argv)
+
+    from shopping_list_window import ShoppingListWindow
+
+    with temp_db() as db_path, open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            manager = make_cookbook(db_path, 2_000)
+        conn = manager.pool.get()
+        fill_shopping_list(conn, n_items, 2_000, 500)
+        rnd = random.Random(5)
+        toggles = [(rnd.randint(1, n_items), rnd.random() < 0.5) for _ in range(n_toggles)]
+
+        table = QTableWidget(0, 5)
+        legacy_reload(table, conn)
+        before = time_calls(lambda *args: (legacy_toggle(table, conn, *args), app.processEvents()),
+                            toggles)
+
+        window = ShoppingListWindow(conn)
+        window.show()
+        app.processEvents()
+        after = time_calls(lambda *args: (window.toggle_purchased(args[0], 2 if args[1] else 0),
+                                          app.processEvents()),
+                           toggles)
+
+        print(f"Список покупок: {n_items} позиций, {n_toggles} переключений")
+        print_summary('Полная перезагрузка таблицы', summarize(before))
+        print_summary('Обновление одной строки модели', summarize(after))
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
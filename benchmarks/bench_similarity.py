@@ -0,0 +1,102 @@
+"""Похожие рецепты: MinHash/LSH против точного перебора.
+
+По умолчанию 100 000 рецептов по 5 ингредиентов в среднем; каждый десятый
+рецепт переписан как вариант другого (один ингредиент заменён), чтобы у
+запросов были действительно похожие соседи. Точный перебор считает общие
+ингредиенты со всеми рецептами через обратный индекс; полнота — доля
+точного top-k (с похожестью не ниже 0.3), найденная индексом.
+
+Запуск: python -m benchmarks.bench_similarity [число_рецептов] [k]
+"""
+import random
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+from recipe_similarity import SimilarityIndex
+
+N_INGREDIENTS = 500
+MIN_SIMILARITY = 0.3
+
+
+def plant_variants(manager, n_recipes, rnd):
+    """Каждый десятый рецепт — копия другого с одним заменённым ингредиентом"""
+    conn = manager.pool.get()
+    links = {}
+    for recipe_id, ingredient_id in conn.execute('SELECT recipe_id, ingredient_id FROM Recipe_Ingredients'):
+        links.setdefault(recipe_id, []).append(ingredient_id)
+    sources = [recipe_id for recipe_id in links if recipe_id % 10]
+    variants = {}
+    for recipe_id in range(10, n_recipes + 1, 10):
+        ingredients = list(links[rnd.choice(sources)])
+        ingredients[rnd.randrange(len(ingredients))] = rnd.randint(1, N_INGREDIENTS)
+        variants[recipe_id] = links[recipe_id] = list(dict.fromkeys(ingredients))
+    with manager.transaction() as conn:
+        conn.executemany('DELETE FROM Recipe_Ingredients WHERE recipe_id = ?', [(i,) for i in variants])
+        conn.executemany('INSERT INTO Recipe_Ingredients (recipe_id, ingredient_id, quantity) VALUES (?, ?, 1)',
+                         [(recipe_id, ingredient_id) for recipe_id, ingredients in variants.items()
+                          for ingredient_id in ingredients])
+    return links
+
+
+def exact_similar(links, postings, recipe_id, limit):
+    """Точный top-k: общие ингредиенты со всеми рецептами через обратный индекс"""
+    target = links[recipe_id]
+    shared = Counter()
+    for ingredient_id in target:
+        shared.update(postings[ingredient_id])
+    del shared[recipe_id]
+    scored = sorted((-count / (len(target) + len(links[other]) - count), other)
+                    for other, count in shared.items())
+    return [(other, -negative) for negative, other in scored[:limit]]
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rnd = random.Random(9)
+
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes, N_INGREDIENTS)
+        links = plant_variants(manager, n_recipes, rnd)
+        postings = {}
+        for recipe_id, ingredients in links.items():
+            for ingredient_id in ingredients:
+                postings.setdefault(ingredient_id, []).append(recipe_id)
+
+        start = time.perf_counter()
+        index = SimilarityIndex.from_connection(manager.pool.get())
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"База: {n_recipes} рецептов; индекс {index.bands}×{index.rows} "
+              f"построен за {build_ms:.0f} мс")
+
+        queries = [(rnd.choice(list(links)),) for _ in range(300)]
+        found = expected = 0
+        for (recipe_id,) in queries:
+            ranked = exact_similar(links, postings, recipe_id, len(links))
+            # При равной похожести на границе top-k годится любой из рецептов
+            cutoff = max(MIN_SIMILARITY, ranked[k - 1][1] if len(ranked) >= k else 0)
+            relevant = {other for other, similarity in ranked if similarity >= cutoff}
+            approx = {other for other, _ in index.similar(recipe_id, k)}
+            found += len(approx & relevant)
+            expected += min(k, len(relevant))
+        print(f"Полнота top-{k} (похожесть не ниже {MIN_SIMILARITY}): {found / max(expected, 1):.1%}")
+
+        print_summary('Точный перебор', summarize(time_calls(
+            lambda recipe_id: exact_similar(links, postings, recipe_id, k), queries[:100])))
+        print_summary('SimilarityIndex.similar', summarize(time_calls(
+            lambda recipe_id: index.similar(recipe_id, k), queries)))
+        manager.similarity_index = index
+        print_summary('get_similar_recipes (с названиями)', summarize(time_calls(
+            lambda recipe_id: manager.get_similar_recipes(recipe_id, k), queries)))
+
+        edits = [(recipe_id, rnd.sample(range(1, N_INGREDIENTS + 1), rnd.randint(2, 8)))
+                 for recipe_id in rnd.sample(range(1, n_recipes + 1), 1_000)]
+        print_summary('SimilarityIndex.set_recipe (правка рецепта)',
+                      summarize(time_calls(index.set_recipe, edits)))
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
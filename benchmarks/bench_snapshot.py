@@ -0,0 +1,91 @@
+"""Снимок каталога: память на рецепт и время загрузки.
+
+Сравниваются три способа держать весь каталог в памяти: словари деталей
+(как в RecipeCache), колонки CatalogueSnapshot, построенные по базе, и
+тот же снимок, открытый из файла через mmap (данные не копируются в
+кучу Python — память на рецепт почти нулевая, страницы файла читает ОС).
+Затем — чтение деталей и страниц из снимка против запросов к базе и
+догоняющее обновление после записи.
+
+Запуск: python -m benchmarks.bench_snapshot [число_рецептов]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+from catalogue_snapshot import CatalogueSnapshot
+
+
+def measure_memory(build):
+    """Результат build() и прирост памяти Python (байты) после сборки"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, used, seconds
+
+
+def report(title, n_recipes, used, seconds):
+    print(f"{title:<40} {used / n_recipes:8.1f} байт/рецепт   загрузка {seconds * 1000:9.1f} мс")
+
+
+def dict_catalogue(conn):
+    """Каталог словарями — по объекту на рецепт"""
+    columns = ('id', 'name', 'description', 'cooking_time', 'created_at')
+    return {row[0]: dict(zip(columns, row)) for row in conn.execute(
+        'SELECT id, name, description, cooking_time, created_at FROM Recipes')}
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rnd = random.Random(5)
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, n_recipes)
+        conn = manager.pool.get()
+        snapshot_path = f"{db_path}.snapshot"
+        print(f"База: {n_recipes} рецептов")
+
+        catalogue, used, seconds = measure_memory(lambda: dict_catalogue(conn))
+        report('Словари деталей', n_recipes, used, seconds)
+        del catalogue
+
+        snapshot, used, seconds = measure_memory(lambda: CatalogueSnapshot.from_connection(conn))
+        report('Снимок: построение по базе', n_recipes, used, seconds)
+        start = time.perf_counter()
+        snapshot.save(snapshot_path)
+        print(f"{'Снимок: сохранение':<40} {os.path.getsize(snapshot_path) / n_recipes:8.1f} байт/рецепт "
+              f"в файле   {(time.perf_counter() - start) * 1000:9.1f} мс")
+        snapshot.close()
+
+        snapshot, used, seconds = measure_memory(lambda: CatalogueSnapshot.open(snapshot_path))
+        report('Снимок: открытие файла (mmap)', n_recipes, used, seconds)
+        snapshot.close()
+
+        # Рабочий режим DatabaseManager: сравнение с запросами к базе
+        ids = [(rnd.randint(1, n_recipes),) for _ in range(5_000)]
+        middle = manager.get_recipes_page(None, n_recipes // 2)[-1:]
+        manager.cache.max_entries = 0
+        print_summary('get_recipe_details: база', summarize(time_calls(manager.get_recipe_details, ids)))
+        print_summary('get_recipes_page: середина, база',
+                      summarize(time_calls(manager.get_recipes_page, [(middle[0], 200)] * 500)))
+
+        manager.enable_snapshot(snapshot_path)
+        print_summary('get_recipe_details: снимок', summarize(time_calls(manager.get_recipe_details, ids)))
+        print_summary('get_recipes_page: середина, снимок',
+                      summarize(time_calls(manager.get_recipes_page, [(middle[0], 200)] * 500)))
+        print_summary('add_recipe + обновление снимка', summarize(time_calls(
+            manager.add_recipe, [(f'Бенчмарк {i}', 'Описание', 30) for i in range(500)])))
+
+        expected = conn.execute('SELECT id, name FROM Recipes ORDER BY name, id LIMIT 1000').fetchall()
+        assert manager.get_recipes_page(None, 1000) == expected
+        manager.close()
+        os.remove(snapshot_path)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
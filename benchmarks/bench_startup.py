@@ -0,0 +1,125 @@
+"""Время запуска: импорт модулей (-X importtime) и время до первого окна.
+
+Каждый замер — отдельный процесс Python, как при настоящем запуске.
+Первое окно — список рецептов (QTableView с RecipeListModel) на базе
+из 10 000 рецептов; время считается от старта процесса до первой
+обработки событий после show().
+
+Запуск: python -m benchmarks.bench_startup [число_запусков]
+Замеры окна требуют PyQt6 (используется платформа offscreen).
+"""
+import contextlib
+import importlib
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import make_cookbook, print_summary, summarize, temp_db, time_calls
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def has_qt():
+    return importlib.util.find_spec('PyQt6') is not None
+
+
+def import_time_us(*modules):
+    """Суммарное время импорта модулей по отчёту -X importtime, мкс"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() in modules:
+            cumulative[parts[2].strip()] = float(parts[1])
+    missing = set(modules) - cumulative.keys()
+    if missing:
+        raise RuntimeError(f"Модули не найдены в отчёте -X importtime: {', '.join(missing)}")
+    return sum(cumulative.values())
+
+
+def first_window_us(db_path):
+    """Время от запуска процесса до показа первого окна, мкс"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    start = time.perf_counter()
+    child = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_startup', '--child', db_path],
+                             cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    line = child.stdout.readline()
+    elapsed = (time.perf_counter() - start) * 1e6
+    child.wait()
+    if line.strip() != 'shown':
+        raise RuntimeError("Окно не было показано")
+    return elapsed
+
+
+def show_first_window(db_path):
+    """Дочерний процесс: главный путь запуска приложения"""
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication, QTableView
+
+    # Окна загружаются лениво, импорт dialogs почти бесплатный
+    importlib.import_module('dialogs')
+    from db_manager import DatabaseManager
+    from recipe_list_model import RecipeListModel
+
+    app = QApplication(sys.argv)
+    manager = DatabaseManager(db_path)
+    view = QTableView()
+    view.setModel(RecipeListModel(manager))
+    view.show()
+
+    def shown():
+        print('shown', flush=True)
+        app.quit()
+
+    QTimer.singleShot(0, shown)
+    app.exec()
+    manager.close()
+
+
+def measure_startup(runs=5, db_path=None):
+    """Замеры запуска для общего прогона (benchmarks.run)"""
+    results = {
+        'import db_manager': summarize(
+            [import_time_us('db_manager') for _ in range(runs)]),
+        'import dialogs': summarize(
+            [import_time_us('dialogs') for _ in range(runs)]),
+    }
+    if not has_qt():
+        print("⚠️ PyQt6 не установлен — замеры окон при запуске пропущены")
+        return results
+
+    results['import всех окон сразу'] = summarize(
+        [import_time_us('recipe_detail_window', 'shopping_list_window', 'recipe_form_window')
+         for _ in range(runs)])
+    with contextlib.ExitStack() as stack:
+        if db_path is None:
+            db_path = stack.enter_context(temp_db())
+            make_cookbook(db_path, 10_000).close()
+        results['запуск до первого окна'] = summarize([first_window_us(db_path) for _ in range(runs)])
+    return results
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        show_first_window(sys.argv[2])
+        return
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with temp_db() as db_path:
+        make_cookbook(db_path, 10_000).close()
+
+        from db_manager import DatabaseManager
+        # Схема уже актуальна: открытие не должно выполнять миграций
+        print_summary('DatabaseManager(): схема актуальна', summarize(
+            time_calls(lambda: DatabaseManager(db_path).close(), [()] * runs * 10)))
+
+        for title, summary in measure_startup(runs, db_path).items():
+            print_summary(title, summary)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Замирание цикла событий Qt при медленном запросе к базе.
+
+Таймер тикает каждые 5 мс; самый длинный промежуток между тиками —
+это время, на которое замер интерфейс. Запрос get_ingredients искусственно
+замедлен до 200 мс и выполняется сначала прямо в GUI-потоке, затем через
+DatabaseWorker.
+
+Запуск: python -m benchmarks.bench_ui_stall [задержка_мс]
+Требуется PyQt6 (используется платформа offscreen).
+"""
+import contextlib
+import os
+import sys
+import time
+
+from benchmarks.common import make_cookbook, temp_db
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+class StallMeter:
+    """Максимальный промежуток между тиками таймера в мс"""
+
+    def __init__(self, app, interval_ms=5):
+        from PyQt6.QtCore import QTimer
+
+        self.app = app
+        self.max_gap_ms = 0.0
+        self._last = time.perf_counter()
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._tick)
+        self.timer.start(interval_ms)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.max_gap_ms = max(self.max_gap_ms, (now - self._last) * 1000)
+        self._last = now
+
+    def run_for(self, seconds, action):
+        """Выполнение action внутри работающего цикла событий"""
+        from PyQt6.QtCore import QEventLoop, QTimer
+
+        self.max_gap_ms = 0.0
+        self._last = time.perf_counter()
+        loop = QEventLoop()
+        QTimer.singleShot(20, action)
+        QTimer.singleShot(int(seconds * 1000), loop.quit)
+        loop.exec()
+        return self.max_gap_ms
+
+
+def main():
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        print("❌ Для этого бенчмарка нужен PyQt6")
+        return
+
+    from db_worker import DatabaseWorker, QtDispatcher
+
+    delay_ms = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = QApplication(sys.argv)
+
+    with temp_db() as db_path, open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            manager = make_cookbook(db_path, 1_000)
+        manager.cache.max_entries = 0      # каждый вызов идёт в базу
+
+        # Имитация медленного запроса: функция SQLite, которая спит
+        original = manager.get_ingredients
+
+        def slow_get_ingredients(recipe_id):
+            manager.pool.get().create_function('sleep_ms', 1, lambda ms: time.sleep(ms / 1000))
+            manager.pool.get().execute('SELECT sleep_ms(?)', (delay_ms,)).fetchone()
+            return original(recipe_id)
+
+        manager.get_ingredients = slow_get_ingredients
+        meter = StallMeter(app)
+        worker = DatabaseWorker(manager, QtDispatcher())
+        received = []
+
+        with contextlib.redirect_stdout(devnull):
+            sync_gap = meter.run_for(0.6, lambda: received.append(manager.get_ingredients(1)))
+            async_gap = meter.run_for(0.6, lambda: worker.get_ingredients(1, callback=received.append))
+
+        print(f"Запрос {delay_ms} мс, тик таймера 5 мс")
+        print(f"В GUI-потоке:        замирание {sync_gap:7.1f} мс")
+        print(f"Через DatabaseWorker: замирание {async_gap:7.1f} мс "
+              f"(ответов получено: {len(received)})")
+        worker.shutdown()
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""Проверка планов запросов: каждый горячий запрос должен идти по индексу.
+
+Запуск: python -m benchmarks.check_query_plans
+Код возврата 1, если хотя бы один запрос просматривает таблицу целиком
+или сортирует результат во временном B-дереве.
+"""
+import sys
+
+from benchmarks.common import make_cookbook, temp_db
+
+HOT_QUERIES = {
+    'get_all_recipes': 'SELECT id, name FROM Recipes ORDER BY name',
+    'get_recipe_details': '''
+        SELECT id, name, description, cooking_time, created_at
+        FROM Recipes WHERE id = 1
+    ''',
+    'get_ingredients': '''
+        SELECT i.name, i.unit, ri.quantity
+        FROM Ingredients i
+        JOIN Recipe_Ingredients ri ON i.id = ri.ingredient_id
+        WHERE ri.recipe_id = 1
+    ''',
+    'recipes_by_ingredient': 'SELECT recipe_id, quantity FROM Recipe_Ingredients WHERE ingredient_id = 1',
+    'ingredient_by_name': "SELECT id, unit FROM Ingredients WHERE name = 'Мука 0'",
+    'delete_recipe_links': 'DELETE FROM Recipe_Ingredients WHERE recipe_id = 1',
+    'shopping_list_by_recipe': 'SELECT id FROM Shopping_List WHERE recipe_id = 1',
+    'shopping_list_by_ingredient': 'SELECT id FROM Shopping_List WHERE ingredient_id = 1',
+    'shopping_list_purchased': 'SELECT id FROM Shopping_List WHERE purchased = 1',
+}
+
+
+def plan_problems(conn, sql):
+    """Строки плана с полным просмотром таблицы или сортировкой"""
+    plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+    problems = [step for step in plan
+                if 'TEMP B-TREE' in step
+                or (step.startswith('SCAN') and 'INDEX' not in step)]
+    return plan, problems
+
+
+def main():
+    failed = False
+    with temp_db() as db_path:
+        manager = make_cookbook(db_path, 2_000)
+        conn = manager.pool.get()
+        conn.execute('ANALYZE')
+
+        for name, sql in HOT_QUERIES.items():
+            plan, problems = plan_problems(conn, sql)
+            status = '❌' if problems else '✅'
+            print(f"{status} {name}: {' | '.join(plan)}")
+            failed = failed or bool(problems)
+        manager.close()
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Проверка единиц: один ингредиент, сохранённый в разных единицах.
+
+Количество в совместимой единице пересчитывается в единицу ингредиента
+в базе (1 л «Воды» при единице «мл» — это 1000 мл), ингредиент ищется
+без учёта регистра и «ё» («свекла» — это «Свёкла»), а рецепт с
+несовместимой единицей не сохраняется — ни формой, ни импортом.
+
+Запуск: python -m benchmarks.check_units
+Код возврата 1, если хотя бы одна проверка не прошла.
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks.common import temp_db
+from db_manager import DatabaseManager
+from recipe_io import RecipeImporter, iter_recipes, read_csv, write_csv
+from shopping_aggregation import aggregate_shopping_list
+
+
+def checks(manager):
+    """Пары (описание, результат проверки)"""
+    first = manager.save_recipe_with_ingredients('Рецепт А', '', 10, [('Вода', 'мл', 1000)])
+    second = manager.save_recipe_with_ingredients('Рецепт Б', '', 10, [('Вода', 'л', 1)])
+    yield "1 л сохраняется как 1000 мл", manager.get_ingredients(second) == [('Вода', 'мл', 1000.0)]
+
+    third = manager.save_recipe_with_ingredients('Рецепт В', '', 10, [('Вода', 'Л', 0.5), ('Вода', 'мл', 250)])
+    yield "«Л» и повтор в мл складываются в 750 мл", manager.get_ingredients(third) == [('Вода', 'мл', 750.0)]
+
+    wrong = manager.save_recipe_with_ingredients('Рецепт Г', '', 10, [('Вода', 'г', 100)])
+    names = [name for _, name in manager.get_all_recipes()]
+    yield "рецепт с несовместимой единицей не сохраняется", wrong is None and 'Рецепт Г' not in names
+
+    beet = manager.save_recipe_with_ingredients('Рецепт Д', '', 10, [('Свёкла', 'г', 300), ('Мука', 'кг', 1)])
+    spelled = manager.save_recipe_with_ingredients('Рецепт Е', '', 10, [('Свекла', 'кг', 0.5), ('мука ', 'г', 200)])
+    yield ("«Свекла» и «мука » — те же «Свёкла» и «Мука»",
+           sorted(manager.get_ingredients(spelled)) == [('Мука', 'кг', 0.2), ('Свёкла', 'г', 500.0)]
+           and sorted(manager.get_ingredients(beet)) == [('Мука', 'кг', 1.0), ('Свёкла', 'г', 300.0)])
+
+    manager.add_plan_to_shopping_list([first, second])
+    yield ("сводный список: 2 л воды",
+           aggregate_shopping_list(manager.pool.get()) == [('Вода', 2000.0, 'мл')])
+
+    stats = RecipeImporter(manager).import_recipes([
+        {'name': 'Импорт А', 'ingredients': [{'name': 'Вода', 'unit': 'л', 'quantity': 2}]},
+        {'name': 'Импорт Б', 'ingredients': [{'name': 'Соль', 'unit': 'г', 'quantity': 5},
+                                             {'name': 'Вода', 'unit': 'шт', 'quantity': 1}]},
+    ])
+    imported = dict((name, recipe_id) for recipe_id, name in manager.get_all_recipes())
+    yield ("импорт: 2 л сохраняются как 2000 мл",
+           manager.get_ingredients(imported['Импорт А']) == [('Вода', 'мл', 2000.0)])
+    yield ("импорт: рецепт с несовместимой единицей пропущен",
+           stats['skipped'] == 1 and 'Импорт Б' not in imported)
+
+    manager.delete_recipe(imported['Импорт А'])
+    RecipeImporter(manager).import_recipes([{'name': 'Импорт В', 'ingredients': []}])
+    reimported = dict((name, recipe_id) for recipe_id, name in manager.get_all_recipes())
+    yield "импорт не выдаёт ID удалённого рецепта повторно", reimported['Импорт В'] > imported['Импорт А']
+
+    RecipeImporter(manager).import_recipes([
+        {'name': 'Импорт Г', 'ingredients': [{'name': 'Крупа', 'unit': 'г', 'quantity': 300}]},
+        {'name': 'Импорт Д', 'ingredients': [{'name': 'крупа', 'unit': 'кг', 'quantity': 1},
+                                             {'name': 'Свекла', 'unit': 'кг', 'quantity': 1}]},
+    ])
+    imported = dict((name, recipe_id) for recipe_id, name in manager.get_all_recipes())
+    yield ("импорт: «крупа» в кг — та же «Крупа» в г, «Свекла» — «Свёкла»",
+           sorted(manager.get_ingredients(imported['Импорт Д'])) == [('Крупа', 'г', 1000.0), ('Свёкла', 'г', 1000.0)])
+
+    # Два одинаковых соседних рецепта переживают экспорт и импорт CSV
+    twins = [{'name': 'Близнец', 'description': '', 'cooking_time': 5,
+              'ingredients': [{'name': 'Соль', 'unit': 'г', 'quantity': 1}]}] * 2
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'recipes.csv')
+        write_csv(twins, path)
+        read_back = list(read_csv(path))
+        count = write_csv(iter_recipes(manager), path)
+        round_trip = sum(1 for _ in read_csv(path))
+    yield ("CSV: соседние одинаковые рецепты не сливаются",
+           len(read_back) == 2 and all(len(recipe['ingredients']) == 1 for recipe in read_back)
+           and round_trip == count)
+
+
+def main():
+    failed = False
+    with temp_db() as db_path:
+        manager = DatabaseManager(db_path)
+        for title, ok in checks(manager):
+            print(f"{'✅' if ok else '❌'} {title}")
+            failed = failed or not ok
+        manager.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,129 @@
+import itertools
+import logging
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from db_manager import DatabaseManager
+
+# Медленные операции в бенчмарках ожидаемы — не выводим их в stderr
+logging.getLogger('cookbook.db.slow').addHandler(logging.NullHandler())
+
+UNITS = ['г', 'кг', 'мл', 'л', 'шт', 'ст. л.', 'ч. л.']
+DISHES = ['Борщ', 'Суп', 'Салат', 'Пирог', 'Блины', 'Каша', 'Рагу', 'Котлеты',
+          'Запеканка', 'Оладьи', 'Плов', 'Пельмени', 'Вареники', 'Омлет', 'Жаркое']
+STYLES = ['домашний', 'быстрый', 'праздничный', 'постный', 'летний', 'бабушкин',
+          'острый', 'сырный', 'грибной', 'овощной', 'мясной', 'рыбный']
+PRODUCTS = ['Мука', 'Молоко', 'Яйцо', 'Сахар', 'Соль', 'Масло', 'Свёкла', 'Картофель',
+            'Морковь', 'Лук', 'Чеснок', 'Говядина', 'Курица', 'Рис', 'Гречка', 'Сыр',
+            'Сметана', 'Капуста', 'Томат', 'Грибы', 'Перец', 'Укроп', 'Творог', 'Рыба']
+
+
+@contextmanager
+def temp_db():
+    """Путь к временной базе данных, удаляемой после бенчмарка"""
+    directory = tempfile.mkdtemp(prefix='cookbook_bench_')
+    try:
+        yield os.path.join(directory, 'cookbook.db')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# Разумные количества для каждой единицы измерения
+QUANTITY_RANGES = {'г': (10, 1000), 'кг': (1, 3), 'мл': (10, 1000), 'л': (1, 3),
+                   'шт': (1, 12), 'ст. л.': (1, 5), 'ч. л.': (1, 4)}
+
+
+def ingredient_count(rnd, mean):
+    """Число ингредиентов рецепта: не меньше двух, с длинным хвостом.
+
+    В настоящих книгах рецептов большинство блюд укладывается в 4–10
+    ингредиентов, но встречаются и рецепты на 20–30 позиций.
+    """
+    if mean <= 0:
+        return 0
+    if mean <= 2:
+        return int(mean)
+    return min(2 + round(rnd.expovariate(1 / (mean - 2))), 30)
+
+
+def popularity_weights(n_ingredients, exponent=0.8):
+    """Накопленные веса Ципфа: соль и лук встречаются чаще шафрана"""
+    weights = itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(n_ingredients))
+    return list(weights)
+
+
+def make_cookbook(db_path, n_recipes, n_ingredients=500, per_recipe=5, seed=42):
+    """Заполнение базы синтетическими рецептами и ингредиентами.
+
+    Результат детерминирован: одинаковые параметры и seed дают одинаковую
+    базу. per_recipe — среднее число ингредиентов в рецепте; число и
+    выбор ингредиентов распределены неравномерно (см. ingredient_count и
+    popularity_weights).
+    """
+    rnd = random.Random(seed)
+    manager = DatabaseManager(db_path)
+    units = [rnd.choice(UNITS) for _ in range(n_ingredients)]
+    cum_weights = popularity_weights(n_ingredients)
+    ingredient_ids = range(1, n_ingredients + 1)
+
+    def links():
+        for recipe_id in range(1, n_recipes + 1):
+            count = ingredient_count(rnd, per_recipe)
+            if not count:
+                continue
+            chosen = dict.fromkeys(rnd.choices(ingredient_ids, cum_weights=cum_weights, k=count * 2))
+            for ingredient_id in list(chosen)[:count]:
+                yield recipe_id, ingredient_id, rnd.randint(*QUANTITY_RANGES[units[ingredient_id - 1]])
+
+    with manager.transaction() as conn:
+        conn.executemany(
+            'INSERT INTO Ingredients (name, unit) VALUES (?, ?)',
+            ((f'{PRODUCTS[i % len(PRODUCTS)]} {i // len(PRODUCTS)}', units[i])
+             for i in range(n_ingredients))
+        )
+        conn.executemany(
+            'INSERT INTO Recipes (name, description, cooking_time) VALUES (?, ?, ?)',
+            ((f'{rnd.choice(DISHES)} {rnd.choice(STYLES)} №{i}',
+              f'{rnd.choice(STYLES).capitalize()} вариант, подаётся {rnd.choice(STYLES)}',
+              rnd.randint(5, 180))
+             for i in range(n_recipes))
+        )
+        conn.executemany(
+            'INSERT OR IGNORE INTO Recipe_Ingredients (recipe_id, ingredient_id, quantity) '
+            'VALUES (?, ?, ?)',
+            links()
+        )
+        conn.execute('ANALYZE')
+    return manager
+
+
+def time_calls(func, args_list):
+    """Время выполнения каждого вызова в микросекундах"""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def summarize(samples):
+    """Сводная статистика по замерам"""
+    ordered = sorted(samples)
+    return {
+        'calls': len(ordered),
+        'mean_us': statistics.fmean(ordered),
+        'p50_us': ordered[len(ordered) // 2],
+        'p95_us': ordered[int(len(ordered) * 0.95) - 1],
+    }
+
+
+def print_summary(title, summary):
+    """Вывод строки с результатами замера"""
+    print(f"{title:<40} mean {summary['mean_us']:9.1f} мкс   "
+          f"p50 {summary['p50_us']:9.1f} мкс   p95 {summary['p95_us']:9.1f} мкс")
\ No newline at end of file
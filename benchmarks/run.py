@@ -0,0 +1,278 @@
+"""Полный прогон бенчмарков с записью результатов в JSON и сравнение прогонов.
+
+Каждая операция DatabaseManager замеряется на детерминированной
+синтетической базе (см. make_cookbook). Если установлен PyQt6, замеряется
+и загрузка окон на платформе offscreen. Время запуска (импорт модулей и
+показ первого окна) — см. bench_startup.
+
+Запуск:
+    python -m benchmarks.run [--recipes N] [--calls N] [--seed N] [--output файл.json]
+    python -m benchmarks.run compare базовый.json новый.json [--threshold 0.25]
+
+В режиме compare операция считается регрессией, если её медиана выросла
+больше чем на threshold (и больше чем на --min-us микросекунд, чтобы не
+реагировать на шум в быстрых операциях). При регрессиях код выхода — 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+
+from benchmarks.common import DISHES, PRODUCTS, make_cookbook, summarize, temp_db, time_calls
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def git_revision():
+    """Короткий хеш текущего коммита (если доступен git)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_database(manager, n_recipes, n_calls, rnd):
+    """Замеры всех публичных операций DatabaseManager"""
+    results = {}
+    ids = [rnd.randint(1, n_recipes) for _ in range(n_calls)]
+    all_ids = range(1, n_recipes + 1)
+    batches = [rnd.sample(all_ids, min(50, n_recipes)) for _ in range(n_calls // 50 or 1)]
+    plans = [dict.fromkeys(rnd.sample(all_ids, min(10, n_recipes)), rnd.choice([1, 2, 4]))
+             for _ in range(n_calls // 10 or 1)]
+    terms = [rnd.choice(PRODUCTS + DISHES)[:rnd.randint(3, 6)] for _ in range(n_calls // 10 or 1)]
+    middle = manager.get_recipes_page(None, n_recipes // 2)[-1:]
+
+    def measure(name, func, args_list):
+        results[name] = summarize(time_calls(func, args_list))
+
+    measure('get_all_recipes', manager.get_all_recipes, [()] * 10)
+    measure('get_recipes_page: первая', manager.get_recipes_page, [(None, 200)] * n_calls)
+    if middle:
+        measure('get_recipes_page: середина', manager.get_recipes_page, [(middle[0], 200)] * n_calls)
+
+    # Без кэша — каждый вызов идёт в базу, затем с прогретым кэшем
+    max_entries = manager.cache.max_entries
+    manager.cache.max_entries = 0
+    measure('get_recipe_details: без кэша', manager.get_recipe_details, [(i,) for i in ids])
+    measure('get_ingredients: без кэша', manager.get_ingredients, [(i,) for i in ids])
+    measure('get_recipes_with_ingredients(50): без кэша', manager.get_recipes_with_ingredients,
+            [(batch,) for batch in batches])
+    manager.cache.max_entries = max_entries
+    manager.get_recipes_with_ingredients(ids)
+    measure('get_recipe_details: кэш', manager.get_recipe_details, [(i,) for i in ids])
+    measure('get_ingredients: кэш', manager.get_ingredients, [(i,) for i in ids])
+
+    measure('get_consolidated_ingredients(10)', manager.get_consolidated_ingredients,
+            [(plan,) for plan in plans])
+    measure('search_recipes', manager.search_recipes, [(term, 50) for term in terms])
+
+    new_ids = []
+    measure('add_recipe', lambda i: new_ids.append(manager.add_recipe(f'Бенчмарк {i}', 'Описание', 30)),
+            [(i,) for i in range(n_calls)])
+    measure('update_recipe', manager.update_recipe,
+            [(recipe_id, f'Бенчмарк {recipe_id}*', 'Изменено', 45) for recipe_id in new_ids])
+    measure('delete_recipe', manager.delete_recipe, [(recipe_id,) for recipe_id in new_ids])
+    return results
+
+
+def bench_snapshot(manager, n_recipes, n_calls, rnd, meta):
+    """Чтение каталога из снимка в памяти; память и загрузка — в meta"""
+    import tracemalloc
+    from catalogue_snapshot import CatalogueSnapshot
+
+    conn = manager.pool.get()
+    tracemalloc.start()
+    start = time.perf_counter()
+    snapshot = CatalogueSnapshot.from_connection(conn)
+    meta['snapshot_build_seconds'] = time.perf_counter() - start
+    meta['snapshot_bytes_per_recipe'] = tracemalloc.get_traced_memory()[0] / n_recipes
+    tracemalloc.stop()
+    path = f"{manager.db_name}.snapshot"
+    snapshot.save(path)
+    snapshot.close()
+    start = time.perf_counter()
+    CatalogueSnapshot.open(path).close()
+    meta['snapshot_open_seconds'] = time.perf_counter() - start
+    print(f"Снимок каталога: {meta['snapshot_bytes_per_recipe']:.1f} байт/рецепт, "
+          f"построение {meta['snapshot_build_seconds'] * 1000:.1f} мс, "
+          f"открытие файла {meta['snapshot_open_seconds'] * 1000:.2f} мс")
+
+    results = {}
+    ids = [(rnd.randint(1, n_recipes),) for _ in range(n_calls)]
+    middle = manager.get_recipes_page(None, n_recipes // 2)[-1:]
+    manager.enable_snapshot(path)
+    results['get_recipe_details: снимок'] = summarize(time_calls(manager.get_recipe_details, ids))
+    results['get_recipes_page: первая, снимок'] = summarize(
+        time_calls(manager.get_recipes_page, [(None, 200)] * n_calls))
+    if middle:
+        results['get_recipes_page: середина, снимок'] = summarize(
+            time_calls(manager.get_recipes_page, [(middle[0], 200)] * n_calls))
+    manager.snapshot.close()
+    manager.snapshot = None
+    os.remove(path)
+    return results
+
+
+def bench_windows(manager, n_recipes, n_calls, rnd):
+    """Загрузка окон на платформе offscreen (нужен PyQt6)"""
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        print("⚠️ PyQt6 не установлен — замеры окон пропущены")
+        return {}
+
+    from benchmarks.bench_shopping_list import fill_shopping_list
+    from db_worker import DatabaseWorker, QtDispatcher
+    from recipe_detail_window import RecipeDetailWindow
+    from recipe_list_model import RecipeListModel
+    from shopping_list_window import ShoppingListWindow
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    worker = DatabaseWorker(manager, QtDispatcher())
+    conn = manager.pool.get()
+    fill_shopping_list(conn, 2_000, n_recipes, 500)
+    results = {}
+    n_windows = max(n_calls // 20, 10)
+
+    def drain():
+        """Ожидание фоновых запросов и доставки их callback'ов в GUI-поток"""
+        worker.run(lambda conn: None).result()
+        app.processEvents()
+
+    def open_detail(recipe_id):
+        window = RecipeDetailWindow(manager.get_recipe_details(recipe_id), manager, db_worker=worker)
+        drain()
+        window.deleteLater()
+
+    def open_shopping_list(db_worker):
+        window = ShoppingListWindow(conn, db_worker=db_worker)
+        if db_worker:
+            drain()
+        window.deleteLater()
+
+    def open_recipe_list():
+        model = RecipeListModel(manager)
+        while model.canFetchMore():
+            model.fetchMore()
+        model.deleteLater()
+
+    ids = [(rnd.randint(1, n_recipes),) for _ in range(n_windows)]
+    results['RecipeDetailWindow: открытие'] = summarize(time_calls(open_detail, ids))
+    results['ShoppingListWindow(2000): открытие'] = summarize(
+        time_calls(open_shopping_list, [(None,)] * n_windows))
+    results['ShoppingListWindow(2000): открытие с DatabaseWorker'] = summarize(
+        time_calls(open_shopping_list, [(worker,)] * n_windows))
+    results['RecipeListModel: прокрутка до конца'] = summarize(time_calls(open_recipe_list, [()] * 5))
+    app.processEvents()
+    worker.shutdown()
+    return results
+
+
+def run(args):
+    rnd = random.Random(args.seed)
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'recipes': args.recipes,
+            'calls': args.calls,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+
+    with temp_db() as db_path:
+        start = time.perf_counter()
+        manager = make_cookbook(db_path, args.recipes, seed=args.seed)
+        report['meta']['build_seconds'] = time.perf_counter() - start
+        print(f"База: {args.recipes} рецептов, построена за {report['meta']['build_seconds']:.1f} с")
+
+        report['results'].update(bench_database(manager, args.recipes, args.calls, rnd))
+        report['results'].update(bench_snapshot(manager, args.recipes, args.calls, rnd,
+                                                report['meta']))
+        if not args.no_windows:
+            report['results'].update(bench_windows(manager, args.recipes, args.calls, rnd))
+        manager.close()
+
+    if not args.no_startup:
+        from benchmarks.bench_startup import measure_startup
+        report['results'].update(measure_startup())
+
+    for name, summary in report['results'].items():
+        print(f"{name:<52} p50 {summary['p50_us']:10.1f} мкс   p95 {summary['p95_us']:10.1f} мкс")
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"✅ Результаты записаны в {args.output}")
+
+
+def compare(args):
+    """Сравнение двух прогонов по медиане каждой операции"""
+    with open(args.base, encoding='utf-8') as file:
+        base = json.load(file)
+    with open(args.new, encoding='utf-8') as file:
+        new = json.load(file)
+
+    for key in ('recipes', 'calls', 'seed'):
+        if base['meta'].get(key) != new['meta'].get(key):
+            print(f"⚠️ Прогоны с разными параметрами: {key} "
+                  f"{base['meta'].get(key)} → {new['meta'].get(key)}")
+
+    regressions = []
+    for name, summary in new['results'].items():
+        before = base['results'].get(name)
+        if before is None:
+            print(f"   {name:<52} новая операция")
+            continue
+        old_p50, new_p50 = before['p50_us'], summary['p50_us']
+        change = (new_p50 - old_p50) / old_p50 if old_p50 else 0.0
+        regressed = change > args.threshold and new_p50 - old_p50 > args.min_us
+        if regressed:
+            regressions.append(name)
+        print(f"{'❌' if regressed else '  '} {name:<52} {old_p50:10.1f} → {new_p50:10.1f} мкс "
+              f"({change:+.0%})")
+    for name in base['results'].keys() - new['results'].keys():
+        print(f"   {name:<52} нет в новом прогоне")
+
+    if regressions:
+        print(f"❌ Регрессий: {len(regressions)}")
+        return 1
+    print("✅ Регрессий нет")
+    return 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        parser = argparse.ArgumentParser(prog='benchmarks.run compare',
+                                         description='Сравнение двух прогонов')
+        parser.add_argument('base')
+        parser.add_argument('new')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='допустимый рост медианы (доля), по умолчанию 0.25')
+        parser.add_argument('--min-us', type=float, default=10.0,
+                            help='минимальный абсолютный рост медианы, мкс')
+        sys.exit(compare(parser.parse_args(sys.argv[2:])))
+
+    parser = argparse.ArgumentParser(prog='benchmarks.run', description='Прогон бенчмарков')
+    parser.add_argument('--recipes', type=int, default=20_000)
+    parser.add_argument('--calls', type=int, default=1_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--no-windows', action='store_true', help='без замеров окон')
+    parser.add_argument('--no-startup', action='store_true', help='без замеров запуска')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
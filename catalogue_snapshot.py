@@ -0,0 +1,337 @@
+"""Компактный снимок каталога рецептов в памяти.
+
+Вместо кортежа и словаря на каждый рецепт — колонки: ID, время
+приготовления и смещения строк в массивах array('q'), а все названия,
+описания и даты — в трёх общих буферах UTF-8. Словарь деталей рецепта
+собирается только при обращении. Снимок сохраняется в двоичный файл и
+открывается через mmap без разбора данных: колонки — это memoryview
+прямо на страницы файла, поэтому повторный запуск почти мгновенный.
+
+Изменения после построения (или после сохранения файла) догоняются по
+журналу изменений (changes.read_changes) и хранятся поверх колонок до
+следующего compact() или save().
+"""
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from itertools import accumulate, islice
+
+from changes import DELETED, last_change_id, read_changes
+from db_instrumentation import logger
+
+MAGIC = b'CBSNAP01'
+# Магия, порядок байт, число рецептов, позиция журнала изменений
+# и длины секций в байтах
+_HEADER = struct.Struct('<8s8sqq10q')
+_SECTIONS = ('ids', 'cooking_times', 'flags', 'by_name',
+             'name_offsets', 'description_offsets', 'created_offsets',
+             'names', 'descriptions', 'created')
+_FORMATS = {'flags': 'B', 'names': 'B', 'descriptions': 'B', 'created': 'B'}
+
+# Биты flags: NULL в колонках рецепта
+_NO_DESCRIPTION, _NO_COOKING_TIME, _NO_CREATED = 1, 2, 4
+
+
+class _Columns:
+    """Колонки снимка: array при построении или memoryview на файл"""
+
+    def __init__(self):
+        self.ids = array('q')            # по возрастанию: поиск через bisect
+        self.cooking_times = array('q')
+        self.flags = array('B')
+        self.by_name = array('q')        # номера строк в порядке (название, id)
+        self.name_offsets = array('q', [0])
+        self.description_offsets = array('q', [0])
+        self.created_offsets = array('q', [0])
+        self.names = bytearray()
+        self.descriptions = bytearray()
+        self.created = bytearray()
+        self._mmap = None
+        self._views = []
+
+    def extend(self, rows):
+        """Добавление строк (id, name, description, cooking_time, created_at) по колонкам"""
+        if not rows:
+            return
+        ids, names, descriptions, cooking_times, created = zip(*rows)
+        self.ids.extend(ids)
+        self.cooking_times.extend(time or 0 for time in cooking_times)
+        self.flags.extend((_NO_DESCRIPTION if description is None else 0)
+                          | (_NO_COOKING_TIME if time is None else 0)
+                          | (_NO_CREATED if created_at is None else 0)
+                          for description, time, created_at in zip(descriptions, cooking_times, created))
+        for buffer, offsets, texts in ((self.names, self.name_offsets, names),
+                                       (self.descriptions, self.description_offsets, descriptions),
+                                       (self.created, self.created_offsets, created)):
+            encoded = [(text or '').encode('utf-8') for text in texts]
+            # Начальное смещение (len(buffer)) уже лежит в offsets
+            offsets.extend(islice(accumulate(map(len, encoded), initial=len(buffer)), 1, None))
+            buffer += b''.join(encoded)
+
+    def sort_by_name(self):
+        names = [self.name(row) for row in range(len(self.ids))]
+        ids = self.ids
+        self.by_name = array('q', sorted(range(len(ids)), key=lambda row: (names[row], ids[row])))
+
+    @staticmethod
+    def _text(buffer, offsets, row):
+        return str(buffer[offsets[row]:offsets[row + 1]], 'utf-8')
+
+    def name(self, row):
+        return self._text(self.names, self.name_offsets, row)
+
+    def details(self, row):
+        """Словарь в формате DatabaseManager.get_recipe_details"""
+        flags = self.flags[row]
+        return {
+            'id': self.ids[row],
+            'name': self.name(row),
+            'description': None if flags & _NO_DESCRIPTION
+            else self._text(self.descriptions, self.description_offsets, row),
+            'cooking_time': None if flags & _NO_COOKING_TIME else self.cooking_times[row],
+            'created_at': None if flags & _NO_CREATED
+            else self._text(self.created, self.created_offsets, row),
+        }
+
+    def row_of(self, recipe_id):
+        row = bisect.bisect_left(self.ids, recipe_id)
+        return row if row < len(self.ids) and self.ids[row] == recipe_id else -1
+
+    def nbytes(self):
+        """Объём данных колонок в байтах"""
+        return sum(len(memoryview(getattr(self, name)).cast('B')) for name in _SECTIONS)
+
+    def write(self, file, count, change_id):
+        lengths = [len(memoryview(getattr(self, name)).cast('B')) for name in _SECTIONS]
+        file.write(_HEADER.pack(MAGIC, sys.byteorder.encode().ljust(8), count, change_id, *lengths))
+        for name, length in zip(_SECTIONS, lengths):
+            file.write(getattr(self, name))
+            # Выравнивание по 8 байт, чтобы memoryview.cast('q') работал на месте
+            file.write(b'\0' * (-length % 8))
+
+    @classmethod
+    def map(cls, path):
+        """Колонки поверх файла, отображённого в память"""
+        columns = cls()
+        with open(path, 'rb') as file:
+            columns._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(columns._mmap)
+        columns._views.append(view)
+        try:
+            if len(view) < _HEADER.size:
+                raise ValueError(f"{path}: файл снимка обрезан")
+            magic, byteorder, count, change_id, *lengths = _HEADER.unpack_from(view)
+            if magic != MAGIC or byteorder.rstrip(b' ').decode() != sys.byteorder:
+                raise ValueError(f"{path}: не файл снимка каталога или другой порядок байт")
+            position = _HEADER.size
+            for name, length in zip(_SECTIONS, lengths):
+                if position + length > len(view):
+                    raise ValueError(f"{path}: файл снимка обрезан")
+                section = view[position:position + length].cast(_FORMATS.get(name, 'q'))
+                columns._views.append(section)
+                setattr(columns, name, section)
+                position += length + (-length % 8)
+        except Exception:
+            columns.close()
+            raise
+        return columns, count, change_id
+
+    def close(self):
+        """Освобождение отображения файла (все memoryview — до закрытия mmap)"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class CatalogueSnapshot:
+    """Каталог рецептов для просмотра без запросов к базе.
+
+    Поверх колонок лежат изменения: _overlay — новые и изменённые рецепты
+    (словари деталей), _shadowed — ID строк колонок, которые изменены
+    или удалены. compact() переносит изменения в колонки.
+    """
+
+    def __init__(self, columns, count, change_id, path=None):
+        self._columns = columns
+        self._count = count
+        self.change_id = change_id
+        self.path = path
+        self._overlay = {}
+        self._shadowed = set()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_connection(cls, conn, path=None, fetch_size=10_000):
+        """Построение по таблице Recipes в одной транзакции чтения"""
+        columns = _Columns()
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute('BEGIN')
+        try:
+            # Позиция журнала и строки — из одного и того же состояния базы
+            change_id = last_change_id(conn)
+            cursor = conn.execute('''
+                SELECT id, name, description, cooking_time, created_at FROM Recipes ORDER BY id
+            ''')
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                columns.extend(rows)
+        finally:
+            if own_transaction:
+                conn.execute('COMMIT')
+        columns.sort_by_name()
+        return cls(columns, len(columns.ids), change_id, path)
+
+    @classmethod
+    def open(cls, path):
+        """Снимок из файла (без чтения данных — через mmap)"""
+        columns, count, change_id = _Columns.map(path)
+        return cls(columns, count, change_id, path)
+
+    @classmethod
+    def load(cls, db_manager, path=None):
+        """Снимок из файла, догнанный по журналу, или построенный по базе"""
+        snapshot = None
+        if path and os.path.exists(path):
+            try:
+                snapshot = cls.open(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Файл снимка каталога не прочитан, строим заново: %s", e)
+        if snapshot is None:
+            return cls.from_connection(db_manager.pool.get(), path)
+        snapshot.sync(db_manager.pool.get())
+        return snapshot
+
+    def __len__(self):
+        return self._count - len(self._shadowed) + len(self._overlay)
+
+    def __contains__(self, recipe_id):
+        return self.get(recipe_id) is not None
+
+    def get(self, recipe_id):
+        """Детали рецепта (новый словарь) или None"""
+        with self._lock:
+            details = self._overlay.get(recipe_id)
+            if details is not None:
+                return dict(details)
+            if recipe_id in self._shadowed:
+                return None
+            row = self._columns.row_of(recipe_id)
+            return None if row < 0 else self._columns.details(row)
+
+    def page(self, after=None, limit=200):
+        """Страница (id, название) в порядке названия — как get_recipes_page"""
+        with self._lock:
+            columns, shadowed = self._columns, self._shadowed
+            start = 0
+            if after is not None:
+                start = bisect.bisect_right(range(len(columns.by_name)), (after[1], after[0]),
+                                            key=lambda i: (columns.name(columns.by_name[i]),
+                                                           columns.ids[columns.by_name[i]]))
+            # Из колонок нужно не больше limit строк, не считая скрытых изменениями
+            rows = columns.by_name[start:start + limit + len(shadowed)]
+            ids, names, offsets = columns.ids, columns.names, columns.name_offsets
+            page = [(ids[row], str(names[offsets[row]:offsets[row + 1]], 'utf-8')) for row in rows
+                    if not shadowed or ids[row] not in shadowed]
+            if self._overlay:
+                changed = sorted((details['name'], recipe_id)
+                                 for recipe_id, details in self._overlay.items()
+                                 if after is None or (details['name'], recipe_id) > (after[1], after[0]))
+                merged = heapq.merge(((name, recipe_id) for recipe_id, name in page), changed)
+                page = [(recipe_id, name) for name, recipe_id in merged]
+            return page[:limit]
+
+    def all(self):
+        """Все рецепты (id, название) в порядке названия"""
+        return self.page(None, len(self))
+
+    def sync(self, conn, reset_threshold=5000):
+        """Применение изменений рецептов из журнала после change_id.
+
+        Если записей слишком много или часть уже удалена из журнала,
+        снимок строится заново. Возвращает True, если что-то изменилось.
+        """
+        changes, last_id, count = read_changes(conn, self.change_id, reset_threshold)
+        if changes.reset:
+            fresh = self.from_connection(conn, self.path)
+            with self._lock:
+                self._replace_columns(fresh._columns, fresh._count)
+                self._overlay.clear()
+                self._shadowed.clear()
+                self.change_id = fresh.change_id
+            return True
+        if changes.recipes:
+            self.apply(conn, changes.recipes)
+        self.change_id = last_id
+        return bool(count)
+
+    def apply(self, conn, recipe_actions):
+        """Изменения {recipe_id: действие}: удалённые убираются, остальные перечитываются"""
+        changed = [recipe_id for recipe_id, action in recipe_actions.items() if action != DELETED]
+        rows = conn.execute('''
+            SELECT id, name, description, cooking_time, created_at FROM Recipes
+            WHERE id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(changed),)).fetchall() if changed else []
+        found = {row[0]: dict(zip(('id', 'name', 'description', 'cooking_time', 'created_at'), row))
+                 for row in rows}
+
+        with self._lock:
+            for recipe_id in recipe_actions:
+                self._overlay.pop(recipe_id, None)
+                if self._columns.row_of(recipe_id) >= 0:
+                    self._shadowed.add(recipe_id)
+                details = found.get(recipe_id)
+                if details is not None:
+                    self._overlay[recipe_id] = details
+
+    def compact(self):
+        """Перенос изменений в колонки (освобождает отображение файла)"""
+        with self._lock:
+            columns = _Columns()
+            merged = heapq.merge(
+                ((self._columns.ids[row], row) for row in range(len(self._columns.ids))
+                 if self._columns.ids[row] not in self._shadowed),
+                ((recipe_id, None) for recipe_id in sorted(self._overlay)))
+            columns.extend([tuple((self._overlay[recipe_id] if row is None
+                                   else self._columns.details(row)).values())
+                            for recipe_id, row in merged])
+            columns.sort_by_name()
+            self._replace_columns(columns, len(columns.ids))
+            self._overlay.clear()
+            self._shadowed.clear()
+
+    def save(self, path=None):
+        """Запись в файл (через временный файл и замену)"""
+        path = path or self.path
+        with self._lock:
+            # Колонки из самого файла тоже переносятся в память:
+            # отображённый файл нельзя заменить (Windows)
+            self.compact()
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as file:
+                self._columns.write(file, self._count, self.change_id)
+            os.replace(temp_path, path)
+            self.path = path
+
+    def nbytes(self):
+        """Объём данных колонок (без изменений поверх них)"""
+        return self._columns.nbytes()
+
+    def _replace_columns(self, columns, count):
+        old, self._columns, self._count = self._columns, columns, count
+        old.close()
+
+    def close(self):
+        with self._lock:
+            self._columns.close()
\ No newline at end of file
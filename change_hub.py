@@ -0,0 +1,79 @@
+"""Рассылка изменений Change_Log окнам приложения сигналами Qt.
+
+Отдельно от changes: миграции, сервис и командные утилиты читают журнал
+без Qt, и импорт PyQt6 им не нужен.
+"""
+import logging
+import weakref
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from changes import ChangeFeed
+from db_worker import DatabaseWorker, QtDispatcher
+
+logger = logging.getLogger('cookbook.changes')
+
+
+class ChangeHub(QObject):
+    """Рассылка изменений окнам.
+
+    Таймер GUI-потока только ставит опрос журнала в очередь
+    DatabaseWorker: чтение журнала, обновление кэша, индексов и снимка
+    и очистка журнала идут в фоновом потоке, и занятый писатель не
+    задерживает интерфейс. В GUI-поток через dispatcher приходит
+    только готовый ChangeSet. За один опрос приходит не больше одного
+    сигнала на таблицу, поэтому всплеск изменений при массовых
+    операциях обрабатывается окнами как одно обновление.
+    """
+
+    # ChangeSet с изменениями рецептов / позиций списка покупок
+    recipes_changed = pyqtSignal(object)
+    shopping_changed = pyqtSignal(object)
+
+    _shared = weakref.WeakKeyDictionary()
+
+    def __init__(self, db_manager, db_worker=None, interval_ms=250, parent=None):
+        super().__init__(parent)
+        self.db_worker = db_worker or DatabaseWorker.shared(db_manager, QtDispatcher)
+        self.feed = None
+        self._pending = False
+        # Позиция журнала запоминается первой задачей исполнителя:
+        # опросы встают в ту же очередь после неё
+        self.db_worker.run(self._create_feed, db_manager)
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start()
+
+    @classmethod
+    def shared(cls, db_manager):
+        """Общий концентратор для DatabaseManager (создаётся при первом вызове)"""
+        hub = cls._shared.get(db_manager)
+        if hub is None:
+            hub = cls._shared[db_manager] = cls(db_manager)
+        return hub
+
+    def _create_feed(self, conn, db_manager):
+        self.feed = ChangeFeed(db_manager)
+
+    def poll(self):
+        """Опрос журнала в фоне (можно вызвать сразу после своей записи).
+
+        Пока предыдущий опрос не вернулся, новый не ставится в очередь.
+        """
+        if self._pending:
+            return
+        self._pending = True
+        self.db_worker.run(lambda conn: self.feed.poll(),
+                           callback=self._deliver, errback=self._failed)
+
+    def _deliver(self, changes):
+        self._pending = False
+        if changes.reset or changes.recipes:
+            self.recipes_changed.emit(changes)
+        if changes.reset or changes.shopping:
+            self.shopping_changed.emit(changes)
+
+    def _failed(self, error):
+        self._pending = False
+        logger.error("Ошибка чтения журнала изменений: %s", error)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Уведомления об изменениях данных для окон приложения.
+
+Триггеры (миграция 6) записывают в Change_Log каждую вставку, изменение и
+удаление рецептов и позиций списка покупок — от DatabaseManager, фонового
+исполнителя, импорта или прямых запросов окон. Изменение связей рецепта с
+ингредиентами (миграция 9) записывается как изменение самого рецепта. ChangeFeed читает новые
+записи и сворачивает их: несколько правок одной строки дают одно событие,
+а слишком большая пачка (импорт, очистка списка) — одно событие сброса.
+ChangeHub (change_hub.py) раздаёт свёрнутые изменения окнам сигналами Qt;
+этот модуль Qt не импортирует.
+"""
+import logging
+
+logger = logging.getLogger('cookbook.changes')
+
+CREATED, UPDATED, DELETED = 'created', 'updated', 'deleted'
+
+# Таблица → поле ChangeSet
+TABLES = {'Recipes': 'recipes', 'Shopping_List': 'shopping'}
+
+
+def change_log_triggers():
+    """SQL триггеров, пишущих изменения в Change_Log"""
+    triggers = []
+    for table in TABLES:
+        for event, action, row in (('INSERT', CREATED, 'new'),
+                                   ('UPDATE', UPDATED, 'new'),
+                                   ('DELETE', DELETED, 'old')):
+            triggers.append(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_changes_{action}
+                AFTER {event} ON {table} BEGIN
+                    INSERT INTO Change_Log (table_name, row_id, action)
+                    VALUES ('{table}', {row}.id, '{action}');
+                END
+            ''')
+    return triggers
+
+
+def link_change_triggers():
+    """SQL триггеров, записывающих изменение связей Recipe_Ingredients
+    как изменение рецепта.
+
+    Связи удалённого рецепта (каскад) и ещё не вставленного (импорт пишет
+    связи раньше рецептов) не записываются: рецепт сам даёт событие
+    удаления или вставки.
+    """
+    triggers = []
+    for event, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+        triggers.append(f'''
+            CREATE TRIGGER IF NOT EXISTS Recipe_Ingredients_changes_{event.lower()}
+            AFTER {event} ON Recipe_Ingredients
+            WHEN EXISTS (SELECT 1 FROM Recipes WHERE id = {row}.recipe_id) BEGIN
+                INSERT INTO Change_Log (table_name, row_id, action)
+                VALUES ('Recipes', {row}.recipe_id, '{UPDATED}');
+            END
+        ''')
+    return triggers
+
+
+def merge_action(previous, action):
+    """Итог двух изменений одной строки; None — строки не было и нет"""
+    if previous is None:
+        return action
+    if action == DELETED:
+        return None if previous == CREATED else DELETED
+    if previous == DELETED:
+        # Строку удалили и вставили снова с тем же id
+        return UPDATED
+    return previous
+
+
+class ChangeSet:
+    """Свёрнутые изменения: {id строки: действие} по каждой таблице.
+
+    reset=True означает, что изменений слишком много для точечного
+    обновления и представления перечитывают данные целиком.
+    """
+
+    def __init__(self, reset=False):
+        self.reset = reset
+        self.recipes = {}
+        self.shopping = {}
+
+    def add(self, table_name, row_id, action):
+        rows = getattr(self, TABLES[table_name])
+        merged = merge_action(rows.get(row_id), action)
+        if merged is None:
+            del rows[row_id]
+        else:
+            rows[row_id] = merged
+
+    def ids(self, field, *actions):
+        """ID строк таблицы field с указанными действиями"""
+        return [row_id for row_id, action in getattr(self, field).items() if action in actions]
+
+    def __bool__(self):
+        return self.reset or bool(self.recipes) or bool(self.shopping)
+
+    def __repr__(self):
+        if self.reset:
+            return 'ChangeSet(reset=True)'
+        return f'ChangeSet(recipes={self.recipes!r}, shopping={self.shopping!r})'
+
+
+def last_change_id(conn):
+    """Номер последней записи журнала, даже если сама запись уже удалена"""
+    return conn.execute('''
+        SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'Change_Log'), 0)
+    ''').fetchone()[0]
+
+
+def read_changes(conn, after_id, reset_threshold=500):
+    """Свёрнутые изменения после записи after_id.
+
+    Возвращает (ChangeSet, номер последней прочитанной записи, число записей).
+    """
+    rows = conn.execute('''
+        SELECT id, table_name, row_id, action FROM Change_Log
+        WHERE id > ? ORDER BY id LIMIT ?
+    ''', (after_id, reset_threshold + 1)).fetchall()
+    if not rows:
+        # Пустой журнал после after_id — ещё не значит «изменений нет»:
+        # непрочитанные записи могло удалить обслуживание или ChangeFeed
+        # другого сеанса. Тогда счётчик AUTOINCREMENT ушёл дальше after_id
+        # (или отстал от него, если базу восстановили из копии)
+        last_id = last_change_id(conn)
+        if last_id != after_id:
+            return ChangeSet(reset=True), last_id, 0
+        return ChangeSet(), after_id, 0
+
+    # Номера AUTOINCREMENT идут подряд: пропуск перед первой записью
+    # означает, что непрочитанные записи удалило обслуживание
+    if len(rows) > reset_threshold or rows[0][0] > after_id + 1:
+        return ChangeSet(reset=True), last_change_id(conn), len(rows)
+
+    changes = ChangeSet()
+    for _, table_name, row_id, action in rows:
+        changes.add(table_name, row_id, action)
+    return changes, rows[-1][0], len(rows)
+
+
+class ChangeFeed:
+    """Чтение Change_Log с запомненной позиции.
+
+    Прочитанные записи удаляются раз в prune_every записей (None — не
+    удалять, например, для соединения только для чтения); отставшие
+    настолько, что записи уже удалены обслуживанием, получают сброс.
+    """
+
+    def __init__(self, db_manager, reset_threshold=500, prune_every=1000):
+        self.db_manager = db_manager
+        self.reset_threshold = reset_threshold
+        self.prune_every = prune_every
+        self.last_id = last_change_id(db_manager.pool.get())
+        self._unpruned = 0
+
+    def poll(self):
+        """Изменения после предыдущего вызова (пустой ChangeSet, если их нет)"""
+        conn = self.db_manager.pool.get()
+        changes, self.last_id, count = read_changes(conn, self.last_id, self.reset_threshold)
+        if not changes:
+            return changes
+
+        # Кэш и индексы могли устареть от записи в обход DatabaseManager
+        if changes.reset:
+            self.db_manager.cache.clear()
+            self.db_manager.reset_indexes()
+        elif changes.recipes:
+            self.db_manager.refresh_recipes(changes.recipes)
+
+        self._unpruned += count
+        if self.prune_every is not None and self._unpruned >= self.prune_every:
+            self.prune(conn)
+        return changes
+
+    def prune(self, conn):
+        """Удаление прочитанных записей; при занятой базе — в следующий раз"""
+        try:
+            conn.execute('DELETE FROM Change_Log WHERE id <= ?', (self.last_id,))
+            self._unpruned = 0
+        except Exception as e:
+            logger.warning("Журнал изменений не очищен: %s", e)
+
+
+def trim_change_log(conn, keep=10_000):
+    """Ограничение журнала последними keep записями (для запусков без окон)"""
+    return conn.execute('''
+        DELETE FROM Change_Log WHERE id <= (SELECT MAX(id) FROM Change_Log) - ?
+    ''', (keep,)).rowcount
\ No newline at end of file
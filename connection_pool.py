@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Настройки, которые применяются один раз к каждому новому соединению
+DEFAULT_PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',   # действует для новых баз (см. maintenance.vacuum)
+    'foreign_keys': 'ON',           # каскадное удаление связей и списка покупок
+    'journal_mode': 'WAL',      # читатели не блокируют писателя
+    'synchronous': 'NORMAL',    # в режиме WAL безопасно и намного быстрее FULL
+    'cache_size': -16000,       # отрицательное значение — в КиБ (~16 МБ)
+    'mmap_size': 268435456,     # 256 МБ отображаемой в память базы
+    'temp_store': 'MEMORY',
+    'analysis_limit': 1000,     # ANALYZE по выборке, а не по всей таблице
+}
+
+# Эти настройки пишут в файл базы и недоступны соединению только для чтения
+WRITE_PRAGMAS = {'auto_vacuum', 'journal_mode'}
+
+
+class ConnectionPool:
+    """Пул долгоживущих соединений: одно соединение на поток"""
+
+    def __init__(self, db_name, pragmas=None, read_only=False):
+        self.db_name = db_name
+        self.read_only = read_only
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        if read_only:
+            for pragma in WRITE_PRAGMAS:
+                self.pragmas.pop(pragma, None)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self.connections_opened = 0
+        self.transactions = 0
+        self.rollbacks = 0
+
+    def _open(self):
+        """Открытие нового соединения и применение pragma-настроек"""
+        # isolation_level=None: транзакциями управляем сами через BEGIN/COMMIT
+        if self.read_only:
+            # mode=ro: запись отклоняет сам SQLite (база уже в режиме WAL).
+            # urllib.request тянет http.client и email — импорт только здесь
+            import urllib.request
+            uri = f"file:{urllib.request.pathname2url(os.path.abspath(self.db_name))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, isolation_level=None,
+                                   check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_name, isolation_level=None,
+                                   check_same_thread=False)
+        for pragma, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+
+        with self._lock:
+            self._connections.append(conn)
+            self.connections_opened += 1
+        return conn
+
+    def get(self):
+        """Соединение текущего потока (открывается при первом обращении)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Соединение для чтения без явной транзакции"""
+        yield self.get()
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Транзакция на соединении текущего потока.
+
+        Вложенные вызовы присоединяются к внешней транзакции, поэтому
+        несколько методов можно объединить в один COMMIT. immediate=True
+        сразу берёт блокировку записи (нужно, если транзакция читает
+        данные, на основе которых потом пишет).
+        """
+        conn = self.get()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        self._local.depth = 1
+        with self._lock:
+            self.transactions += 1
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+                with self._lock:
+                    self.rollbacks += 1
+            raise
+        else:
+            conn.execute('COMMIT')
+        finally:
+            self._local.depth = 0
+
+    def release(self):
+        """Закрытие соединения текущего потока (перед завершением потока)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def stats(self):
+        """Счётчики соединений и транзакций"""
+        with self._lock:
+            return {
+                'connections_open': len(self._connections),
+                'connections_opened': self.connections_opened,
+                'transactions': self.transactions,
+                'rollbacks': self.rollbacks,
+            }
+
+    def close_all(self):
+        """Закрытие всех открытых соединений"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
\ No newline at end of file
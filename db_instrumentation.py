@@ -0,0 +1,133 @@
+import functools
+import json
+import logging
+import math
+import reprlib
+import threading
+import time
+
+logger = logging.getLogger('cookbook.db')
+slow_logger = logging.getLogger('cookbook.db.slow')
+
+# Логарифмические корзины: 20 на порядок (шаг ~12%), от 1 мкс до ~17 минут
+BUCKETS_PER_DECADE = 20
+MAX_BUCKET = 9 * BUCKETS_PER_DECADE
+
+
+class LatencyHistogram:
+    """Гистограмма задержек постоянного размера"""
+
+    def __init__(self):
+        self.buckets = [0] * (MAX_BUCKET + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def add(self, seconds, rows):
+        micros = max(seconds * 1e6, 1.0)
+        index = min(int(math.log10(micros) * BUCKETS_PER_DECADE), MAX_BUCKET)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+
+    def percentile(self, fraction):
+        """Верхняя граница корзины, в которую попадает перцентиль, в мс"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target:
+                upper = 10 ** ((index + 1) / BUCKETS_PER_DECADE) / 1000
+                return min(upper, self.max * 1000)
+        return self.max * 1000
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'rows': self.rows,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max * 1000,
+        }
+
+
+class QueryMetrics:
+    """Замеры операций DatabaseManager: гистограммы и журнал медленных запросов"""
+
+    def __init__(self, slow_query_ms=100):
+        self.slow_query_ms = slow_query_ms
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds, rows, args):
+        with self._lock:
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = LatencyHistogram()
+            histogram.add(seconds, rows)
+
+        elapsed_ms = seconds * 1000
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            slow_logger.warning("Медленная операция %s: %.1f мс, строк: %d, аргументы: %r",
+                                operation, elapsed_ms, rows, reprlib.repr(args))
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: %.2f мс, строк: %d", operation, elapsed_ms, rows)
+
+    def snapshot(self):
+        """Сводка по всем операциям"""
+        with self._lock:
+            return {operation: histogram.summary()
+                    for operation, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def enable_slow_query_log(path):
+    """Запись медленных операций в отдельный файл (порог — QueryMetrics.slow_query_ms)"""
+    handler = logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_logger.addHandler(handler)
+    return handler
+
+
+def count_rows(result):
+    """Число строк в результате операции"""
+    if result is None or result is False:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict) and 'id' not in result:
+        return len(result)
+    return 1
+
+
+def instrumented(method):
+    """Декоратор метода DatabaseManager: время, число строк, журнал"""
+    operation = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        self.metrics.record(operation, time.perf_counter() - start, count_rows(result), args)
+        return result
+
+    return wrapper
+
+
+def dump_json(data, path=None):
+    """Сводка в JSON: в файл или строкой"""
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+    return text
\ No newline at end of file
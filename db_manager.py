@@ -1,5 +1,24 @@
 import sqlite3
 import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from changes import DELETED, last_change_id, read_changes
+from connection_pool import ConnectionPool
+from db_instrumentation import QueryMetrics, dump_json, instrumented, logger
+from ingredient_index import IngredientIndex, merge_factor, normalize_name, plan_merges
+from migrations import get_schema_version, migrate
+from recipe_cache import RecipeCache
+from recipe_matching import PantryIndex
+from search_index import build_match_query
+from shopping_aggregation import aggregate_recipes, convert_quantity, normalize_unit
+from shopping_archive import (ARCHIVE_AFTER_DAYS, archive_purchased, purchase_frequency,
+                              purchase_history, restock_predictions)
+
+# Снимок каталога, индекс похожих рецептов, матрица сводных расчётов (numpy)
+# и планировщик меню импортируются в геттерах при первом обращении: сервису
+# и командам, которым они не нужны, не приходится платить за их импорт
 
 # Получаем путь к базе данных относительно текущего файла
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,211 +32,1112 @@ def test_connection():
         cursor.execute("SELECT 1")
         result = cursor.fetchone()
         conn.close()
-        print("✅ Подключение к базе данных успешно установлено")
+        logger.info("Подключение к базе данных успешно установлено")
         return True
     except Exception as e:
-        print(f"❌ Ошибка подключения к базе данных: {e}")
+        logger.error("Ошибка подключения к базе данных: %s", e)
         return False
 
 class DatabaseManager:
     """Класс для управления базой данных"""
     
-    def __init__(self):
-        self.db_name = DB_NAME
+    def __init__(self, db_name=None, slow_query_ms=100, read_only=False):
+        self.db_name = db_name or DB_NAME
+        self.read_only = read_only
+        self.pool = ConnectionPool(self.db_name, read_only=read_only)
+        self.cache = RecipeCache()
+        self.metrics = QueryMetrics(slow_query_ms)
+        self.pantry_index = None
+        self.similarity_index = None
+        self.ingredient_index = None
+        self.rollup = None
+        self.meal_planner = None
+        self.snapshot = None
+        # Фоновое построение индекса похожих рецептов (см. warm_similarity_index)
+        self._index_executor = None
+        self._index_lock = threading.Lock()
+        self._similarity_build = None
+        self._index_generation = 0
+        self.fts_enabled = False
         self._create_tables()
     
+    def transaction(self, immediate=False):
+        """Контекстный менеджер транзакции на общем соединении"""
+        return self.pool.transaction(immediate)
+    
+    def close(self):
+        """Закрытие всех соединений с базой данных"""
+        if self._index_executor is not None:
+            self._index_executor.shutdown(wait=True, cancel_futures=True)
+            self._index_executor = None
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self.pool.close_all()
+    
+    def cache_stats(self):
+        """Счётчики кэша рецептов: попадания, промахи, вытеснения"""
+        return self.cache.stats()
+    
+    def metrics_snapshot(self):
+        """Сводка замеров: задержки операций (p50/p95/p99), соединения, кэш"""
+        return {
+            'operations': self.metrics.snapshot(),
+            'pool': self.pool.stats(),
+            'cache': self.cache_stats(),
+        }
+    
+    def dump_metrics(self, path=None):
+        """Сводка замеров в JSON (в файл, если указан path)"""
+        return dump_json(self.metrics_snapshot(), path)
+    
     def _create_tables(self):
-        """Создание необходимых таблиц в базе данных"""
+        """Создание и миграция схемы базы данных"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
+            with self.pool.connection() as conn:
+                # Только для чтения схему мигрирует процесс, который пишет
+                version = get_schema_version(conn) if self.read_only else migrate(conn)
+                
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'Recipes_FTS'")
+                self.fts_enabled = cursor.fetchone() is not None
             
-            # Создание таблицы рецептов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Recipes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    cooking_time INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Создание таблицы ингредиентов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Ingredients (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    unit TEXT
-                )
-            ''')
-            
-            # Создание таблицы связи рецептов и ингредиентов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Recipe_Ingredients (
-                    recipe_id INTEGER,
-                    ingredient_id INTEGER,
-                    quantity REAL,
-                    FOREIGN KEY (recipe_id) REFERENCES Recipes(id),
-                    FOREIGN KEY (ingredient_id) REFERENCES Ingredients(id),
-                    PRIMARY KEY (recipe_id, ingredient_id)
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            print("✅ Таблицы успешно созданы")
-        except Exception as e:
-            print(f"❌ Ошибка создания таблиц: {e}")
+            logger.info("Схема базы данных актуальна (версия %s)", version)
+        except Exception as e:
+            logger.error("Ошибка создания таблиц: %s", e)
     
+    @instrumented
     def add_recipe(self, name, description, cooking_time):
         """Добавление рецепта в базу данных"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO Recipes (name, description, cooking_time)
-                VALUES (?, ?, ?)
-            ''', (name, description, cooking_time))
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    INSERT INTO Recipes (name, description, cooking_time)
+                    VALUES (?, ?, ?)
+                ''', (name, description, cooking_time))
+                
+                recipe_id = cursor.lastrowid
             
-            recipe_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            self._sync_snapshot()
+            logger.info("Рецепт '%s' добавлен с ID: %s", name, recipe_id)
+            return recipe_id
+        except Exception as e:
+            logger.error("Ошибка добавления рецепта: %s", e)
+            return None
+    
+    @instrumented
+    def save_recipe_with_ingredients(self, name, description, cooking_time, ingredients,
+                                     recipe_id=None):
+        """Сохранение рецепта вместе с ингредиентами в одной транзакции.
+        
+        ingredients — список (название, единица, количество). Ингредиенты
+        ищутся по названию без учёта регистра, «ё» и лишних пробелов
+        (ingredient_index.normalize_name), недостающие создаются; связи рецепта заменяются
+        целиком. Количество пересчитывается в единицу ингредиента в базе
+        (например, 1 л → 1000 мл); с несовместимой единицей рецепт не
+        сохраняется. Без recipe_id рецепт добавляется, иначе обновляется.
+        Возвращает ID рецепта или None при ошибке.
+        """
+        entries = []
+        names = {}     # ключ названия -> название нового ингредиента (первое написание)
+        for ingredient_name, unit, quantity in ingredients:
+            ingredient_name = ' '.join(ingredient_name.split())
+            if ingredient_name:
+                key = normalize_name(ingredient_name)
+                names.setdefault(key, ingredient_name)
+                entries.append((key, normalize_unit(unit), quantity))
+        
+        try:
+            with self.transaction(immediate=True) as conn:
+                cursor = conn.cursor()
+                
+                if recipe_id is None:
+                    cursor.execute('''
+                        INSERT INTO Recipes (name, description, cooking_time)
+                        VALUES (?, ?, ?)
+                    ''', (name, description, cooking_time))
+                    recipe_id = cursor.lastrowid
+                else:
+                    cursor.execute('''
+                        UPDATE Recipes
+                        SET name = ?, description = ?, cooking_time = ?
+                        WHERE id = ?
+                    ''', (name, description, cooking_time, recipe_id))
+                    if not cursor.rowcount:
+                        raise ValueError(f"Рецепт с ID {recipe_id} не найден")
+                
+                # Кандидаты по ключу названия берутся из триграммного индекса,
+                # а название и единица — из базы: индекс мог отстать от правок
+                # в обход этого объекта. Из нескольких строк с одним ключом
+                # берётся строка с наименьшим id
+                index = self.get_ingredient_index()
+                index.refresh(conn)
+                candidates = [ingredient_id for key in names for ingredient_id in index.find(key)]
+                cursor.execute('''
+                    SELECT id, name, unit FROM Ingredients
+                    WHERE id IN (SELECT value FROM json_each(?))
+                    ORDER BY id
+                ''', (json.dumps(candidates),))
+                found = {}
+                for ingredient_id, ingredient_name, unit in cursor.fetchall():
+                    key = normalize_name(ingredient_name)
+                    if key in names:
+                        found.setdefault(key, (ingredient_id, unit))
+                
+                # Количества приводятся к единице ингредиента в базе, у нового —
+                # к первой указанной; повторы ингредиента складываем, как при импорте
+                units = {key: unit for key, (_, unit) in found.items()}
+                quantities = {}
+                for key, unit, quantity in entries:
+                    if units.get(key) is None:
+                        units[key] = unit
+                    quantity = convert_quantity(quantity, unit, units[key])
+                    if key in quantities:
+                        previous = quantities[key]
+                        quantity = previous if quantity is None else quantity + (previous or 0)
+                    quantities[key] = quantity
+                
+                ingredient_ids = {key: ingredient_id for key, (ingredient_id, _) in found.items()}
+                for key in quantities:
+                    if key not in found:
+                        cursor.execute('INSERT INTO Ingredients (name, unit) VALUES (?, ?)',
+                                       (names[key], units[key]))
+                        ingredient_ids[key] = cursor.lastrowid
+                # У существующего ингредиента заполняем только отсутствующую единицу:
+                # её смена поменяла бы смысл количеств в других рецептах
+                filled = [(units[key], ingredient_id)
+                          for key, (ingredient_id, unit) in found.items()
+                          if unit is None and units[key]]
+                cursor.executemany('UPDATE Ingredients SET unit = ? WHERE id = ?', filled)
+                
+                cursor.execute('DELETE FROM Recipe_Ingredients WHERE recipe_id = ?', (recipe_id,))
+                cursor.executemany('''
+                    INSERT INTO Recipe_Ingredients (recipe_id, ingredient_id, quantity)
+                    VALUES (?, ?, ?)
+                ''', [(recipe_id, ingredient_ids[key], quantity)
+                      for key, quantity in quantities.items()])
             
-            print(f"✅ Рецепт '{name}' добавлен с ID: {recipe_id}")
+            self.cache.invalidate_recipe(recipe_id)
+            for _, ingredient_id in filled:
+                self.cache.invalidate_ingredient(ingredient_id)
+            if self.pantry_index is not None:
+                self.pantry_index.set_recipe(recipe_id, ingredient_ids.values())
+            if self.similarity_index is not None:
+                self.similarity_index.set_recipe(recipe_id, ingredient_ids.values())
+            # Строка рецепта в матрице меняет длину — матрица строится заново
+            self.rollup = None
+            if self.ingredient_index is not None:
+                self.ingredient_index.refresh(self.pool.get())
+            self._sync_snapshot()
+            logger.info("Рецепт '%s' (ID %s) сохранен, ингредиентов: %d",
+                        name, recipe_id, len(quantities))
             return recipe_id
         except Exception as e:
-            print(f"❌ Ошибка добавления рецепта: {e}")
+            logger.error("Ошибка сохранения рецепта с ингредиентами: %s", e)
             return None
     
+    @instrumented
     def get_all_recipes(self):
         """Получение всех рецептов"""
+        if self.snapshot is not None:
+            return self.snapshot.all()
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, name FROM Recipes ORDER BY name
-            ''')
-            
-            recipes = cursor.fetchall()
-            conn.close()
-            
-            print(f"✅ Получено рецептов: {len(recipes)}")
-            return recipes
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT id, name FROM Recipes ORDER BY name
+                ''')
+                
+                recipes = cursor.fetchall()
+                return recipes
+        except Exception as e:
+            logger.error("Ошибка получения рецептов: %s", e)
+            return []
+    
+    @instrumented
+    def get_recipes_page(self, after=None, limit=200):
+        """Страница рецептов по алфавиту (keyset-пагинация).
+        
+        after — последняя строка (id, name) предыдущей страницы.
+        В отличие от OFFSET, стоимость не растёт с номером страницы:
+        запрос продолжает просмотр индекса idx_recipes_name с нужного места.
+        """
+        if self.snapshot is not None:
+            return self.snapshot.page(after, limit)
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                if after is None:
+                    cursor.execute('''
+                        SELECT id, name FROM Recipes
+                        ORDER BY name, id
+                        LIMIT ?
+                    ''', (limit,))
+                else:
+                    cursor.execute('''
+                        SELECT id, name FROM Recipes
+                        WHERE (name, id) > (?, ?)
+                        ORDER BY name, id
+                        LIMIT ?
+                    ''', (after[1], after[0], limit))
+                
+                return cursor.fetchall()
         except Exception as e:
-            print(f"❌ Ошибка получения рецептов: {e}")
+            logger.error("Ошибка получения страницы рецептов: %s", e)
             return []
     
+    @instrumented
     def get_recipe_details(self, recipe_id):
         """Получение деталей рецепта по ID"""
+        if self.snapshot is not None:
+            return self.snapshot.get(recipe_id)
+        cached = self.cache.get_details(recipe_id)
+        if cached is not None:
+            return cached
+        version = self.cache.details_version(recipe_id)
+        
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, name, description, cooking_time, created_at 
-                FROM Recipes WHERE id = ?
-            ''', (recipe_id,))
-            
-            recipe = cursor.fetchone()
-            conn.close()
-            
-            if recipe:
-                return {
-                    'id': recipe[0],
-                    'name': recipe[1],
-                    'description': recipe[2],
-                    'cooking_time': recipe[3],
-                    'created_at': recipe[4]
-                }
-            return None
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT id, name, description, cooking_time, created_at 
+                    FROM Recipes WHERE id = ?
+                ''', (recipe_id,))
+                
+                recipe = cursor.fetchone()
+                
+                if recipe:
+                    details = self._details_from_row(recipe)
+                    self.cache.put_details(recipe_id, details, version)
+                    return details
+                return None
         except Exception as e:
-            print(f"❌ Ошибка получения деталей рецепта: {e}")
+            logger.error("Ошибка получения деталей рецепта: %s", e)
             return None
     
-    def get_ingredients(self, recipe_id):
-        """Получение ингредиентов рецепта"""
+    @instrumented
+    def get_recipe_names(self, recipe_ids):
+        """Пары (id, название) для списка ID; удалённых рецептов в ответе нет"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, name FROM Recipes
+                    WHERE id IN (SELECT value FROM json_each(?))
+                ''', (json.dumps(list(recipe_ids)),))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error("Ошибка получения названий рецептов: %s", e)
+            return []
+    
+    @staticmethod
+    def _details_from_row(recipe):
+        """Словарь деталей рецепта из строки запроса"""
+        return {
+            'id': recipe[0],
+            'name': recipe[1],
+            'description': recipe[2],
+            'cooking_time': recipe[3],
+            'created_at': recipe[4]
+        }
+    
+    @instrumented
+    def get_recipes_with_ingredients(self, recipe_ids):
+        """Детали и ингредиенты сразу для многих рецептов.
+        
+        Недостающие в кэше рецепты читаются одним запросом с JOIN и
+        заполняют кэш. Возвращает словарь {recipe_id: (детали, ингредиенты)}.
+        """
+        result = {}
+        missing = []
+        for recipe_id in recipe_ids:
+            details = self.cache.get_details(recipe_id)
+            ingredients = self.cache.get_ingredients(recipe_id) if details is not None else None
+            if ingredients is None:
+                missing.append(recipe_id)
+            else:
+                result[recipe_id] = (details, ingredients)
+        
+        if not missing:
+            return result
+        versions = {recipe_id: (self.cache.details_version(recipe_id),
+                                self.cache.ingredients_version(recipe_id))
+                    for recipe_id in missing}
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT r.id, r.name, r.description, r.cooking_time, r.created_at,
+                           i.id, i.name, i.unit, ri.quantity
+                    FROM Recipes r
+                    LEFT JOIN Recipe_Ingredients ri ON ri.recipe_id = r.id
+                    LEFT JOIN Ingredients i ON i.id = ri.ingredient_id
+                    WHERE r.id IN (SELECT value FROM json_each(?))
+                    ORDER BY r.id
+                ''', (json.dumps(missing),))
+                
+                loaded = {}
+                for row in cursor:
+                    recipe_id = row[0]
+                    if recipe_id not in loaded:
+                        loaded[recipe_id] = (self._details_from_row(row[:5]), [], [])
+                    if row[5] is not None:
+                        loaded[recipe_id][1].append(row[6:])
+                        loaded[recipe_id][2].append(row[5])
             
-            cursor.execute('''
-                SELECT i.name, i.unit, ri.quantity 
-                FROM Ingredients i
-                JOIN Recipe_Ingredients ri ON i.id = ri.ingredient_id
-                WHERE ri.recipe_id = ?
-            ''', (recipe_id,))
+            for recipe_id, (details, ingredients, ingredient_ids) in loaded.items():
+                details_version, ingredients_version = versions[recipe_id]
+                self.cache.put_details(recipe_id, details, details_version)
+                self.cache.put_ingredients(recipe_id, ingredients, ingredient_ids, ingredients_version)
+                result[recipe_id] = (dict(details), ingredients)
             
-            ingredients = cursor.fetchall()
-            conn.close()
+            return result
+        except Exception as e:
+            logger.error("Ошибка пакетной загрузки рецептов: %s", e)
+            return result
+    
+    @instrumented
+    def get_ingredients(self, recipe_id):
+        """Получение ингредиентов рецепта"""
+        cached = self.cache.get_ingredients(recipe_id)
+        if cached is not None:
+            return cached
+        version = self.cache.ingredients_version(recipe_id)
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT i.id, i.name, i.unit, ri.quantity 
+                    FROM Ingredients i
+                    JOIN Recipe_Ingredients ri ON i.id = ri.ingredient_id
+                    WHERE ri.recipe_id = ?
+                ''', (recipe_id,))
+                
+                rows = cursor.fetchall()
+                ingredients = [row[1:] for row in rows]
+                self.cache.put_ingredients(recipe_id, ingredients, [row[0] for row in rows], version)
+                return ingredients
+        except Exception as e:
+            logger.error("Ошибка получения ингредиентов: %s", e)
+            return []
+    
+    @instrumented
+    def get_consolidated_ingredients(self, recipes):
+        """Сводный список покупок для набора рецептов.
+        
+        recipes — словарь {recipe_id: множитель порций} или список ID.
+        Одинаковые ингредиенты складываются с приведением единиц (г/кг, мл/л, шт).
+        """
+        try:
+            with self.pool.connection() as conn:
+                items = aggregate_recipes(conn, recipes)
             
-            print(f"✅ Получено ингредиентов для рецепта {recipe_id}: {len(ingredients)}")
-            return ingredients
+            return items
         except Exception as e:
-            print(f"❌ Ошибка получения ингредиентов: {e}")
+            logger.error("Ошибка получения сводного списка: %s", e)
             return []
     
+    @instrumented
     def update_recipe(self, recipe_id, name, description, cooking_time):
         """Обновление рецепта в базе данных"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE Recipes 
-                SET name = ?, description = ?, cooking_time = ?
-                WHERE id = ?
-            ''', (name, description, cooking_time, recipe_id))
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    UPDATE Recipes 
+                    SET name = ?, description = ?, cooking_time = ?
+                    WHERE id = ?
+                ''', (name, description, cooking_time, recipe_id))
             
-            conn.commit()
-            conn.close()
-            
-            print(f"✅ Рецепт с ID {recipe_id} успешно обновлен")
+            self.cache.invalidate_recipe(recipe_id, ingredients=False)
+            self._sync_snapshot()
+            logger.info("Рецепт с ID %s успешно обновлен", recipe_id)
             return True
         except Exception as e:
-            print(f"❌ Ошибка обновления рецепта: {e}")
+            logger.error("Ошибка обновления рецепта: %s", e)
             return False
     
+    @instrumented
     def delete_recipe(self, recipe_id):
         """Удаление рецепта из базы данных"""
         try:
-            conn = sqlite3.connect(self.db_name)
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Связи с ингредиентами и позиции списка покупок
+                # удаляются каскадом (ON DELETE CASCADE)
+                cursor.execute('DELETE FROM Recipes WHERE id = ?', (recipe_id,))
+            
+            self.cache.invalidate_recipe(recipe_id)
+            if self.pantry_index is not None:
+                self.pantry_index.remove_recipe(recipe_id)
+            if self.similarity_index is not None:
+                self.similarity_index.remove_recipe(recipe_id)
+            if self.rollup is not None:
+                self.rollup.remove_recipe(recipe_id)
+            self._sync_snapshot()
+            logger.info("Рецепт с ID %s успешно удален", recipe_id)
+            return True
+        except Exception as e:
+            logger.error("Ошибка удаления рецепта: %s", e)
+            return False
+    
+    @instrumented
+    def delete_recipes(self, recipe_ids):
+        """Удаление многих рецептов одним запросом в одной транзакции.
+        
+        Связи с ингредиентами и позиции списка покупок удаляются каскадом.
+        Возвращает число удалённых рецептов или None при ошибке.
+        """
+        recipe_ids = list(recipe_ids)
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    DELETE FROM Recipes WHERE id IN (SELECT value FROM json_each(?))
+                ''', (json.dumps(recipe_ids),))
+                deleted = cursor.rowcount
+            
+            for recipe_id in recipe_ids:
+                self.cache.invalidate_recipe(recipe_id)
+                if self.pantry_index is not None:
+                    self.pantry_index.remove_recipe(recipe_id)
+                if self.similarity_index is not None:
+                    self.similarity_index.remove_recipe(recipe_id)
+                if self.rollup is not None:
+                    self.rollup.remove_recipe(recipe_id)
+            self._sync_snapshot()
+            logger.info("Удалено рецептов: %d", deleted)
+            return deleted
+        except Exception as e:
+            logger.error("Ошибка удаления рецептов: %s", e)
+            return None
+    
+    @instrumented
+    def search_recipes(self, search_term, limit=None):
+        """Поиск рецептов по названию, описанию и ингредиентам"""
+        try:
+            match_query = build_match_query(search_term)
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                if self.fts_enabled and match_query:
+                    # Ранжирование bm25: совпадение в названии весит больше всего
+                    cursor.execute('''
+                        SELECT r.id, r.name
+                        FROM Recipes_FTS f
+                        JOIN Recipes r ON r.id = f.rowid
+                        WHERE Recipes_FTS MATCH ?
+                        ORDER BY bm25(Recipes_FTS, 10.0, 1.0, 3.0)
+                        LIMIT ?
+                    ''', (match_query, -1 if limit is None else limit))
+                else:
+                    # Без FTS5 (или для пустого запроса) остаётся прежний поиск по названию
+                    cursor.execute('''
+                        SELECT id, name FROM Recipes 
+                        WHERE name LIKE ? 
+                        ORDER BY name
+                        LIMIT ?
+                    ''', (f'%{search_term}%', -1 if limit is None else limit))
+                
+                recipes = cursor.fetchall()
+                return recipes
+        except Exception as e:
+            logger.error("Ошибка поиска рецептов: %s", e)
+            return []
+    
+    def get_pantry_index(self):
+        """Обратный индекс ингредиентов (строится при первом обращении)"""
+        if self.pantry_index is None:
+            with self.pool.connection() as conn:
+                self.pantry_index = PantryIndex.from_connection(conn)
+        return self.pantry_index
+    
+    def get_similarity_index(self):
+        """Индекс похожих рецептов по наборам ингредиентов (строится при первом обращении)"""
+        if self.similarity_index is None:
+            from recipe_similarity import SimilarityIndex
+            with self.pool.connection() as conn:
+                self.similarity_index = SimilarityIndex.from_connection(conn)
+        return self.similarity_index
+    
+    def warm_similarity_index(self):
+        """Построение индекса похожих рецептов в фоне.
+        
+        На большом каталоге построение занимает секунды, поэтому идёт в
+        собственном потоке с отдельным соединением, а не в DatabaseWorker,
+        общем для окон. Изменения рецептов за время построения догоняются
+        по журналу изменений. Повторный вызов во время построения ничего
+        не запускает. Возвращает Future построения (результат — удалось ли
+        построить) или None, если индекс уже готов.
+        """
+        with self._index_lock:
+            if self.similarity_index is not None:
+                return None
+            if self._similarity_build is None or self._similarity_build.done():
+                if self._index_executor is None:
+                    self._index_executor = ThreadPoolExecutor(max_workers=1,
+                                                              thread_name_prefix='db-index')
+                self._similarity_build = self._index_executor.submit(self._build_similarity_index)
+            return self._similarity_build
+    
+    def _build_similarity_index(self):
+        from recipe_similarity import SimilarityIndex
+        conn = self.pool.get()
+        try:
+            while self.similarity_index is None:
+                generation = self._index_generation
+                # Индекс и позиция журнала — из одного снимка базы
+                conn.execute('BEGIN')
+                try:
+                    position = last_change_id(conn)
+                    index = SimilarityIndex.from_connection(conn)
+                finally:
+                    conn.execute('COMMIT')
+                position = self._catch_up_similarity(conn, index, position)
+                # Журнал очищен раньше, чем прочитан, или индексы сброшены — заново
+                if position is None or generation != self._index_generation:
+                    continue
+                self.similarity_index = index
+                # Дальше индекс обновляют методы записи; изменения между
+                # догонкой и установкой индекса применяются ещё раз
+                self._catch_up_similarity(conn, index, position)
+                logger.info("Индекс похожих рецептов построен: %d рецептов", len(index))
+            return True
+        except Exception as e:
+            logger.error("Ошибка построения индекса похожих рецептов: %s", e)
+            return False
+    
+    def _catch_up_similarity(self, conn, index, position):
+        """Изменения рецептов после записи журнала position в индексе.
+        
+        Возвращает номер последней прочитанной записи или None, если
+        непрочитанные записи уже удалены и индекс нужно строить заново.
+        """
+        while True:
+            changes, position, count = read_changes(conn, position)
+            if changes.reset:
+                return None
+            if not count:
+                return position
+            deleted = changes.ids('recipes', DELETED)
+            for recipe_id in deleted:
+                index.remove_recipe(recipe_id)
+            links = {recipe_id: [] for recipe_id in changes.recipes if recipe_id not in deleted}
+            cursor = conn.execute('''
+                SELECT recipe_id, ingredient_id FROM Recipe_Ingredients
+                WHERE recipe_id IN (SELECT value FROM json_each(?))
+            ''', (json.dumps(list(links)),))
+            for recipe_id, ingredient_id in cursor:
+                links[recipe_id].append(ingredient_id)
+            for recipe_id, ingredient_ids in links.items():
+                index.set_recipe(recipe_id, ingredient_ids)
+    
+    def get_ingredient_index(self):
+        """Триграммный индекс названий ингредиентов (строится при первом обращении)"""
+        if self.ingredient_index is None:
+            with self.pool.connection() as conn:
+                self.ingredient_index = IngredientIndex.from_connection(conn)
+        return self.ingredient_index
+    
+    def get_rollup(self):
+        """Матрица рецептов и ингредиентов для сводных расчётов (строится при первом обращении)"""
+        if self.rollup is None:
+            from rollup import RollupEngine
+            with self.pool.connection() as conn:
+                self.rollup = RollupEngine.from_connection(conn)
+        return self.rollup
+    
+    def get_meal_planner(self):
+        """Поиск меню по матрице рецептов (перестраивается вместе с матрицей)"""
+        rollup = self.get_rollup()
+        if self.meal_planner is None or self.meal_planner.rollup is not rollup:
+            from meal_planner import MealPlanner
+            self.meal_planner = MealPlanner(rollup)
+        return self.meal_planner
+    
+    def reset_indexes(self):
+        """Сброс индексов после массового изменения связей (они будут построены заново)"""
+        self._index_generation += 1
+        self.pantry_index = None
+        self.similarity_index = None
+        self.ingredient_index = None
+        self.rollup = None
+        self._sync_snapshot()
+    
+    def refresh_recipes(self, recipe_ids):
+        """Кэш и индексы после изменения рецептов в обход этого объекта.
+        
+        Например, другим процессом или соединением (см. changes.ChangeFeed):
+        кэш рецептов сбрасывается, индексы подбора и похожих рецептов
+        обновляются по текущим связям.
+        """
+        recipe_ids = list(recipe_ids)
+        for recipe_id in recipe_ids:
+            self.cache.invalidate_recipe(recipe_id)
+        # Матрица сводных расчётов дешевле перестраивается целиком
+        self.rollup = None
+        self._sync_snapshot()
+        if self.ingredient_index is not None:
+            # Новые ингредиенты могли появиться вместе с рецептами
+            with self.pool.connection() as conn:
+                self.ingredient_index.refresh(conn)
+        if (self.pantry_index is None and self.similarity_index is None) or not recipe_ids:
+            return
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT recipe_id, ingredient_id FROM Recipe_Ingredients
+                WHERE recipe_id IN (SELECT value FROM json_each(?))
+            ''', (json.dumps(recipe_ids),))
+            links = {recipe_id: [] for recipe_id in recipe_ids}
+            for recipe_id, ingredient_id in cursor:
+                links[recipe_id].append(ingredient_id)
+        for recipe_id, ingredient_ids in links.items():
+            if self.pantry_index is not None:
+                self.pantry_index.set_recipe(recipe_id, ingredient_ids)
+            if self.similarity_index is not None:
+                self.similarity_index.set_recipe(recipe_id, ingredient_ids)
+    
+    def enable_snapshot(self, path=None):
+        """Чтение каталога (список, страницы, детали рецептов) из снимка в памяти.
+        
+        Если path указан и файл есть, снимок открывается из него через mmap
+        и догоняется по журналу изменений; иначе строится по базе.
+        """
+        if self.snapshot is None:
+            from catalogue_snapshot import CatalogueSnapshot
+            self.snapshot = CatalogueSnapshot.load(self, path)
+        return self.snapshot
+    
+    def save_snapshot(self, path=None):
+        """Сохранение снимка каталога в файл для быстрого следующего запуска"""
+        if self.snapshot is None:
+            return False
+        try:
+            self._sync_snapshot()
+            self.snapshot.save(path)
+            logger.info("Снимок каталога сохранен: %s (рецептов: %d)",
+                        self.snapshot.path, len(self.snapshot))
+            return True
+        except Exception as e:
+            logger.error("Ошибка сохранения снимка каталога: %s", e)
+            return False
+    
+    def _sync_snapshot(self):
+        """Догоняющее обновление снимка каталога по журналу изменений"""
+        if self.snapshot is None:
+            return
+        try:
+            with self.pool.connection() as conn:
+                # Внутри внешней транзакции изменения ещё могут откатиться:
+                # снимок догонит их при следующей записи после COMMIT
+                if not conn.in_transaction:
+                    self.snapshot.sync(conn)
+        except Exception as e:
+            # Без синхронизации снимок устарел бы незаметно — читаем из базы
+            logger.error("Ошибка обновления снимка каталога, снимок отключен: %s", e)
+            self.snapshot.close()
+            self.snapshot = None
+    
+    @instrumented
+    def match_recipes(self, ingredient_ids, limit=50, max_missing=None):
+        """Подбор рецептов по имеющимся ингредиентам.
+        
+        Рецепты упорядочены по числу недостающих ингредиентов, затем по доле
+        имеющихся. Возвращает список (id, название, совпало, всего, не хватает).
+        """
+        try:
+            matches = self.get_pantry_index().match(ingredient_ids, limit, max_missing)
+            if not matches:
+                return []
             
-            # Сначала удаляем связанные ингредиенты
-            cursor.execute('DELETE FROM Recipe_Ingredients WHERE recipe_id = ?', (recipe_id,))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, name FROM Recipes
+                    WHERE id IN (SELECT value FROM json_each(?))
+                ''', (json.dumps([match[0] for match in matches]),))
+                names = dict(cursor.fetchall())
             
-            # Затем удаляем сам рецепт
-            cursor.execute('DELETE FROM Recipes WHERE id = ?', (recipe_id,))
+            return [(recipe_id, names[recipe_id], matched, total, missing)
+                    for recipe_id, matched, total, missing in matches if recipe_id in names]
+        except Exception as e:
+            logger.error("Ошибка подбора рецептов по ингредиентам: %s", e)
+            return []
+    
+    @instrumented
+    def get_similar_recipes(self, recipe_id, limit=10, build=True):
+        """Рецепты с похожим набором ингредиентов: список (id, название, похожесть).
+        
+        Похожесть — доля общих ингредиентов (коэффициент Жаккара); поиск
+        приближённый (см. recipe_similarity), по убыванию похожести.
+        build=False — не строить индекс в этом потоке: пока он не готов
+        (см. warm_similarity_index), возвращается None.
+        """
+        try:
+            index = self.similarity_index if not build else self.get_similarity_index()
+            if index is None:
+                return None
+            similar = index.similar(recipe_id, limit)
+            if not similar:
+                return []
             
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, name FROM Recipes
+                    WHERE id IN (SELECT value FROM json_each(?))
+                ''', (json.dumps([other_id for other_id, _ in similar]),))
+                names = dict(cursor.fetchall())
             
-            print(f"✅ Рецепт с ID {recipe_id} успешно удален")
-            return True
+            return [(other_id, names[other_id], similarity)
+                    for other_id, similarity in similar if other_id in names]
         except Exception as e:
-            print(f"❌ Ошибка удаления рецепта: {e}")
-            return False
+            logger.error("Ошибка подбора похожих рецептов: %s", e)
+            return []
     
-    def search_recipes(self, search_term):
-        """Поиск рецептов по названию"""
+    @instrumented
+    def suggest_ingredients(self, text, limit=10):
+        """Подсказки ингредиентов для ввода с опечатками: список (id, название, похожесть)"""
         try:
-            conn = sqlite3.connect(self.db_name)
+            return self.get_ingredient_index().suggest(text, limit)
+        except Exception as e:
+            logger.error("Ошибка подбора подсказок ингредиентов: %s", e)
+            return []
+    
+    @instrumented
+    def find_duplicate_ingredients(self, threshold=0.75):
+        """Похожие ингредиенты для объединения: {ID дубля: ID оставляемого}.
+        
+        Остаётся ингредиент, который входит в большее число рецептов;
+        ингредиенты с несовместимыми единицами измерения не объединяются.
+        """
+        groups = self.get_ingredient_index().duplicates(threshold)
+        if not groups:
+            return {}
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            
             cursor.execute('''
-                SELECT id, name FROM Recipes 
-                WHERE name LIKE ? 
-                ORDER BY name
-            ''', (f'%{search_term}%',))
+                SELECT i.id, i.unit,
+                       (SELECT COUNT(*) FROM Recipe_Ingredients ri WHERE ri.ingredient_id = i.id)
+                FROM Ingredients i
+                WHERE i.id IN (SELECT value FROM json_each(?))
+            ''', (json.dumps([ingredient_id for group in groups for ingredient_id in group]),))
+            details = {ingredient_id: (unit, usage) for ingredient_id, unit, usage in cursor}
+        groups = [[ingredient_id for ingredient_id in group if ingredient_id in details]
+                  for group in groups]
+        return plan_merges([group for group in groups if len(group) > 1], details)
+    
+    @instrumented
+    def merge_ingredients(self, merges):
+        """Объединение ингредиентов в одной транзакции.
+        
+        merges — {ID дубля: ID оставляемого}. Единица оставляемого, если
+        её нет, берётся у дубля с наименьшим ID. Связи дублей с рецептами
+        переходят к оставляемому ингредиенту с пересчётом количеств в его
+        единицу (если в рецепте есть оба, количества складываются),
+        позиции списка покупок — тоже (у них своя единица); свойства
+        переносятся, если у оставляемого их нет. Дубли удаляются.
+        Несовместимые единицы (г и мл) — ошибка, ничего не объединяется.
+        Возвращает число удалённых дублей или None при ошибке.
+        """
+        if set(merges) & set(merges.values()):
+            raise ValueError("Оставляемый ингредиент не может быть дублем другого")
+        from rollup import ATTRIBUTES
+        try:
+            with self.transaction(immediate=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TEMP TABLE IF NOT EXISTS Ingredient_Merge (
+                        old_id INTEGER PRIMARY KEY,
+                        new_id INTEGER NOT NULL,
+                        factor REAL NOT NULL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TEMP TABLE IF NOT EXISTS Merged_Links (
+                        recipe_id INTEGER,
+                        ingredient_id INTEGER,
+                        quantity REAL
+                    )
+                ''')
+                cursor.execute('DELETE FROM temp.Ingredient_Merge')
+                cursor.execute('DELETE FROM temp.Merged_Links')
+                
+                # Множители пересчёта количеств дублей в единицу оставляемого
+                cursor.execute('''
+                    SELECT id, unit FROM Ingredients
+                    WHERE id IN (SELECT value FROM json_each(?))
+                ''', (json.dumps([*merges, *merges.values()]),))
+                units = dict(cursor.fetchall())
+                targets = {}
+                for old_id in sorted(merges):
+                    if units.get(merges[old_id]) is None and units.get(old_id) is not None:
+                        targets.setdefault(merges[old_id], units[old_id])
+                rows = []
+                for old_id, new_id in merges.items():
+                    factor = merge_factor(units.get(old_id), units.get(new_id) or targets.get(new_id))
+                    if factor is None:
+                        raise ValueError(f"Единица ингредиента {old_id} «{units[old_id]}» "
+                                         f"несовместима с единицей ингредиента {new_id}")
+                    rows.append((old_id, new_id, factor))
+                cursor.executemany('INSERT INTO temp.Ingredient_Merge VALUES (?, ?, ?)', rows)
+                
+                # Связи рецептов с дублями сводятся к оставляемым ингредиентам
+                cursor.execute('''
+                    INSERT INTO temp.Merged_Links
+                    SELECT ri.recipe_id, m.new_id, SUM(ri.quantity * m.factor)
+                    FROM Recipe_Ingredients ri
+                    JOIN (SELECT old_id, new_id, factor FROM temp.Ingredient_Merge
+                          UNION SELECT new_id, new_id, 1 FROM temp.Ingredient_Merge) m
+                      ON m.old_id = ri.ingredient_id
+                    WHERE ri.recipe_id IN (
+                        SELECT recipe_id FROM Recipe_Ingredients
+                        WHERE ingredient_id IN (SELECT old_id FROM temp.Ingredient_Merge)
+                    )
+                    GROUP BY ri.recipe_id, m.new_id
+                ''')
+                cursor.execute('''
+                    DELETE FROM Recipe_Ingredients
+                    WHERE ingredient_id IN (SELECT old_id FROM temp.Ingredient_Merge)
+                       OR (recipe_id, ingredient_id) IN (
+                           SELECT recipe_id, ingredient_id FROM temp.Merged_Links)
+                ''')
+                cursor.execute('''
+                    INSERT INTO Recipe_Ingredients (recipe_id, ingredient_id, quantity)
+                    SELECT recipe_id, ingredient_id, quantity FROM temp.Merged_Links
+                ''')
+                
+                cursor.execute('''
+                    UPDATE Shopping_List
+                    SET ingredient_id = (SELECT new_id FROM temp.Ingredient_Merge
+                                         WHERE old_id = Shopping_List.ingredient_id)
+                    WHERE ingredient_id IN (SELECT old_id FROM temp.Ingredient_Merge)
+                ''')
+                # История покупок дублей переходит к оставляемому ингредиенту
+                cursor.execute('''
+                    UPDATE Shopping_List_Archive
+                    SET ingredient_id = (SELECT new_id FROM temp.Ingredient_Merge
+                                         WHERE old_id = Shopping_List_Archive.ingredient_id)
+                    WHERE ingredient_id IN (SELECT old_id FROM temp.Ingredient_Merge)
+                ''')
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO Ingredient_Attributes (ingredient_id, per_quantity, {', '.join(ATTRIBUTES)})
+                    SELECT m.new_id, a.per_quantity * m.factor, {', '.join(f'a.{name}' for name in ATTRIBUTES)}
+                    FROM Ingredient_Attributes a
+                    JOIN temp.Ingredient_Merge m ON m.old_id = a.ingredient_id
+                    ORDER BY a.ingredient_id
+                ''')
+                cursor.executemany('UPDATE Ingredients SET unit = ? WHERE id = ?',
+                                   [(unit, new_id) for new_id, unit in targets.items()])
+                # Свойства дублей удаляются каскадом
+                cursor.execute('DELETE FROM Ingredients WHERE id IN (SELECT old_id FROM temp.Ingredient_Merge)')
+                merged = cursor.rowcount
+                cursor.execute('DELETE FROM temp.Ingredient_Merge')
+                cursor.execute('DELETE FROM temp.Merged_Links')
             
-            recipes = cursor.fetchall()
-            conn.close()
+            # Меняются связи многих рецептов — кэш и индексы строятся заново
+            self.cache.clear()
+            self.reset_indexes()
+            logger.info("Объединено ингредиентов: %d", merged)
+            return merged
+        except Exception as e:
+            logger.error("Ошибка объединения ингредиентов: %s", e)
+            return None
+    
+    @instrumented
+    def set_ingredient_attributes(self, ingredient_id, per_quantity=1, **values):
+        """Пищевая ценность и цена ингредиента на per_quantity его единиц.
+        
+        values — свойства из rollup.ATTRIBUTES (calories, protein, fat,
+        carbs, price); не переданные свойства остаются прежними.
+        """
+        from rollup import ATTRIBUTES
+        unknown = set(values) - set(ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Неизвестные свойства ингредиента: {', '.join(sorted(unknown))}")
+        columns = ['per_quantity', *values]
+        try:
+            with self.transaction() as conn:
+                conn.execute(f'''
+                    INSERT INTO Ingredient_Attributes (ingredient_id, {', '.join(columns)})
+                    VALUES (?, {', '.join('?' * len(columns))})
+                    ON CONFLICT (ingredient_id) DO UPDATE SET
+                        {', '.join(f'{column} = excluded.{column}' for column in columns)}
+                ''', (ingredient_id, per_quantity, *values.values()))
+            
+            if self.rollup is not None:
+                # Матрица связей прежняя — перечитываются только свойства
+                with self.pool.connection() as conn:
+                    self.rollup.load_attributes(conn)
+            return True
+        except Exception as e:
+            logger.error("Ошибка сохранения свойств ингредиента: %s", e)
+            return False
+    
+    @instrumented
+    def get_recipe_totals(self, recipe_ids):
+        """Калорийность, БЖУ и стоимость рецептов: {recipe_id: {свойство: итог}}.
+        
+        Ингредиенты без заполненных свойств дают нули.
+        """
+        try:
+            return self.get_rollup().recipe_totals(recipe_ids)
+        except Exception as e:
+            logger.error("Ошибка расчёта итогов рецептов: %s", e)
+            return {}
+    
+    @instrumented
+    def plan_meals(self, count, max_total_time=None, max_time=None, required=(), excluded=()):
+        """Меню из count рецептов с самым коротким списком покупок.
+        
+        max_time — наибольшее время одного рецепта, max_total_time — всех
+        вместе (в минутах); required — ID ингредиентов, которые меню должно
+        использовать, excluded — ID ингредиентов, которых в нём быть не
+        должно. Возвращает (список (id, название, время), число позиций в
+        списке покупок); если меню не найдено — ([], 0).
+        """
+        try:
+            planner = self.get_meal_planner()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, cooking_time FROM Recipes')
+                cooking_times = dict(cursor.fetchall())
+                found = planner.plan(count, cooking_times, max_total_time, max_time,
+                                     required, excluded)
+                if found is None:
+                    logger.info("Меню из %d рецептов с заданными ограничениями не найдено", count)
+                    return [], 0
+                
+                recipe_ids, ingredient_count, _ = found
+                cursor.execute('''
+                    SELECT id, name FROM Recipes
+                    WHERE id IN (SELECT value FROM json_each(?))
+                ''', (json.dumps(recipe_ids),))
+                names = dict(cursor.fetchall())
             
-            print(f"✅ Найдено рецептов по запросу '{search_term}': {len(recipes)}")
-            return recipes
+            return ([(recipe_id, names[recipe_id], cooking_times[recipe_id]) for recipe_id in recipe_ids],
+                    ingredient_count)
+        except Exception as e:
+            logger.error("Ошибка подбора меню: %s", e)
+            return [], 0
+    
+    @instrumented
+    def add_plan_to_shopping_list(self, recipes):
+        """Ингредиенты набора рецептов в список покупок одним запросом.
+        
+        recipes — словарь {recipe_id: множитель порций} или список ID
+        (например, меню из plan_meals). Возвращает число добавленных
+        позиций или None при ошибке.
+        """
+        if not isinstance(recipes, dict):
+            recipes = dict.fromkeys(recipes, 1.0)
+        plan = json.dumps({str(recipe_id): servings for recipe_id, servings in recipes.items()})
+        try:
+            with self.transaction() as conn:
+                added = conn.execute('''
+                    INSERT INTO Shopping_List (recipe_id, ingredient_id, quantity, unit)
+                    SELECT ri.recipe_id, ri.ingredient_id, ri.quantity * plan.value, i.unit
+                    FROM json_each(?) plan
+                    JOIN Recipe_Ingredients ri ON ri.recipe_id = CAST(plan.key AS INTEGER)
+                    JOIN Ingredients i ON i.id = ri.ingredient_id
+                ''', (plan,)).rowcount
+            logger.info("В список покупок добавлено позиций: %d (рецептов: %d)", added, len(recipes))
+            return added
+        except Exception as e:
+            logger.error("Ошибка добавления меню в список покупок: %s", e)
+            return None
+    
+    @instrumented
+    def get_scaled_ingredients(self, plan):
+        """Ингредиенты для набора рецептов с множителями порций.
+        
+        plan — {recipe_id: множитель}. Возвращает список
+        (название, единица, количество) и итоги свойств по всему набору.
+        """
+        try:
+            rollup = self.get_rollup()
+            quantities = rollup.scaled_quantities(plan)
+            totals = rollup.plan_totals(plan)
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, name, unit FROM Ingredients
+                    WHERE id IN (SELECT value FROM json_each(?))
+                    ORDER BY name
+                ''', (json.dumps(list(quantities)),))
+                ingredients = [(name, unit, quantities[ingredient_id])
+                               for ingredient_id, name, unit in cursor.fetchall()]
+            return ingredients, totals
+        except Exception as e:
+            logger.error("Ошибка масштабирования рецептов: %s", e)
+            return [], {}
+    
+    @instrumented
+    def archive_purchased_items(self, older_than_days=ARCHIVE_AFTER_DAYS):
+        """Перенос купленных позиций старше older_than_days дней в архив.
+        
+        Обычно это делает MaintenanceThread; older_than_days=0 переносит
+        все купленные позиции. Возвращает число перенесённых позиций или
+        None при ошибке.
+        """
+        try:
+            moved = archive_purchased(self.pool.get(), older_than_days)
+            logger.info("В архив покупок перенесено позиций: %d", moved)
+            return moved
+        except Exception as e:
+            logger.error("Ошибка переноса покупок в архив: %s", e)
+            return None
+    
+    @instrumented
+    def get_purchase_history(self, start=None, end=None, ingredient_id=None, limit=None):
+        """История покупок за период (границы включительно), от новых к старым.
+        
+        Возвращает список (дата, ингредиент, количество, единица, рецепт)
+        из списка покупок и архива.
+        """
+        try:
+            with self.pool.connection() as conn:
+                return purchase_history(conn, start, end, ingredient_id, limit)
+        except Exception as e:
+            logger.error("Ошибка получения истории покупок: %s", e)
+            return []
+    
+    @instrumented
+    def get_purchase_frequency(self, start=None, end=None):
+        """Частота покупок ингредиентов за период.
+        
+        Возвращает список (ID ингредиента, название, число покупок, всего
+        куплено, единица, первая покупка, последняя покупка, средний
+        интервал в днях).
+        """
+        try:
+            with self.pool.connection() as conn:
+                return purchase_frequency(conn, start, end)
+        except Exception as e:
+            logger.error("Ошибка расчёта частоты покупок: %s", e)
+            return []
+    
+    @instrumented
+    def get_restock_predictions(self, horizon_days=7, min_purchases=3):
+        """Ингредиенты, которые обычно покупают и пора купить в ближайшие horizon_days дней.
+        
+        Возвращает список (ID ингредиента, название, ожидаемая дата,
+        обычное количество, единица).
+        """
+        try:
+            with self.pool.connection() as conn:
+                return restock_predictions(conn, horizon_days, min_purchases)
         except Exception as e:
-            print(f"❌ Ошибка поиска рецептов: {e}")
+            logger.error("Ошибка прогноза покупок: %s", e)
             return []
\ No newline at end of file
@@ -0,0 +1,122 @@
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PyQt6.QtCore import QObject, pyqtSignal
+except ImportError:
+    # Исполнитель работает и без Qt (сервисный режим, бенчмарки)
+    QObject = None
+
+
+class DatabaseWorker:
+    """Фоновый поток для запросов к базе данных.
+
+    Все запросы выполняются в одном отдельном потоке; пул соединений
+    DatabaseManager выдаёт этому потоку собственное соединение. Результат
+    возвращается как concurrent.futures.Future, а callback вызывается через
+    dispatcher — для Qt это доставка в GUI-поток (см. QtDispatcher).
+    """
+
+    _shared = weakref.WeakKeyDictionary()
+
+    def __init__(self, db_manager, dispatcher=None):
+        self.db_manager = db_manager
+        self._dispatch = dispatcher or (lambda func: func())
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-worker')
+        self._lock = threading.Lock()
+        self._latest = {}    # ключ запроса -> (поколение, future)
+
+    @classmethod
+    def shared(cls, db_manager, dispatcher_factory=None):
+        """Общий исполнитель для DatabaseManager (создаётся при первом вызове)"""
+        worker = cls._shared.get(db_manager)
+        if worker is None:
+            dispatcher = dispatcher_factory() if dispatcher_factory else None
+            worker = cls._shared[db_manager] = cls(db_manager, dispatcher)
+        return worker
+
+    def submit(self, method, *args, key=None, callback=None, errback=None, **kwargs):
+        """Вызов метода DatabaseManager в фоновом потоке"""
+        return self._submit(getattr(self.db_manager, method), args, kwargs, key, callback, errback)
+
+    def run(self, func, *args, key=None, callback=None, errback=None, **kwargs):
+        """Вызов func(conn, *args) с соединением фонового потока"""
+        def with_connection(*args, **kwargs):
+            return func(self.db_manager.pool.get(), *args, **kwargs)
+        return self._submit(with_connection, args, kwargs, key, callback, errback)
+
+    def __getattr__(self, name):
+        """worker.get_ingredients(recipe_id, callback=...) — зеркало методов DatabaseManager"""
+        if name.startswith('_') or not callable(getattr(self.db_manager, name, None)):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.submit(name, *args, **kwargs)
+
+    def _submit(self, func, args, kwargs, key, callback, errback):
+        """Постановка в очередь с отменой устаревших запросов того же ключа.
+
+        Новый запрос с тем же key (например, следующий поисковый запрос)
+        отменяет ещё не начатый предыдущий, а результат уже выполняющегося
+        просто не доставляется.
+        """
+        with self._lock:
+            generation = None
+            if key is not None:
+                previous = self._latest.get(key)
+                if previous is not None:
+                    previous[1].cancel()
+                generation = previous[0] + 1 if previous else 1
+
+            future = self._executor.submit(func, *args, **kwargs)
+            if key is not None:
+                self._latest[key] = (generation, future)
+
+        def done(future):
+            if future.cancelled() or not self._is_latest(key, generation):
+                return
+            error = future.exception()
+            handler, value = (errback, error) if error is not None else (callback, future.result())
+            if handler is not None:
+                # Пока ответ шёл в GUI-поток, запрос мог устареть ещё раз
+                self._dispatch(lambda: self._is_latest(key, generation) and handler(value))
+
+        future.add_done_callback(done)
+        return future
+
+    def _is_latest(self, key, generation):
+        if key is None:
+            return True
+        with self._lock:
+            latest = self._latest.get(key)
+            return latest is not None and latest[0] == generation
+
+    def cancel(self, key):
+        """Отмена запроса по ключу (например, при закрытии окна)"""
+        with self._lock:
+            latest = self._latest.pop(key, None)
+        if latest is not None:
+            latest[1].cancel()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+if QObject is not None:
+    class QtDispatcher(QObject):
+        """Доставка callback'ов фонового потока в поток, где создан объект.
+
+        Сигнал, испущенный из чужого потока, Qt ставит в очередь событий
+        получателя, поэтому callback выполняется в GUI-потоке.
+        """
+
+        _call = pyqtSignal(object)
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self._call.connect(self._run)
+
+        def __call__(self, func):
+            self._call.emit(func)
+
+        def _run(self, func):
+            func()
\ No newline at end of file
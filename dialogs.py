@@ -0,0 +1,41 @@
+"""Ленивая загрузка окон приложения.
+
+Модули диалогов импортируются при первом обращении к имени, а не при
+запуске: главное окно открывается, не дожидаясь импорта всех виджетов
+PyQt6, которые понадобятся (или не понадобятся) позже.
+
+    import dialogs
+    ...
+    window = dialogs.RecipeDetailWindow(recipe_data, db_manager, self)
+"""
+import importlib
+
+# Имя → модуль, в котором оно определено
+_LAZY = {
+    'RecipeDetailWindow': 'recipe_detail_window',
+    'RecipeFormWindow': 'recipe_form_window',
+    'ShoppingListWindow': 'shopping_list_window',
+    'init_database': 'ingredient_form_window',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    # Следующие обращения обходят __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+def preload():
+    """Импорт всех окон заранее (например, по таймеру после показа главного окна)"""
+    for name in _LAZY:
+        __getattr__(name)
\ No newline at end of file
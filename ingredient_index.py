@@ -0,0 +1,379 @@
+"""Нечёткий поиск ингредиентов по триграммам и поиск дублей.
+
+Название приводится к ключу (normalize_name): регистр, «ё» → «е», лишние
+пробелы. Ключ раскладывается на триграммы — тройки подряд идущих символов
+с пробелами по краям, — и для каждой триграммы хранится массив строк
+индекса, где она встречается. Похожесть двух названий — доля общих
+триграмм (коэффициент Жаккара), поэтому «Мука», «мука » и «Муко» находят
+друг друга, хотя точного совпадения нет.
+
+Запуск (поиск дублей; с --apply — объединение):
+    python ingredient_index.py dedup [--db путь] [--threshold 0.75] [--apply]
+    python ingredient_index.py suggest текст [--db путь]
+"""
+import argparse
+import bisect
+import heapq
+import math
+import threading
+from array import array
+from collections import Counter
+
+from shopping_aggregation import convert_quantity, normalize_unit
+
+
+def normalize_name(name):
+    """Ключ сравнения названий: нижний регистр, «ё» → «е», одиночные пробелы"""
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+def trigrams(key, partial=False):
+    """Множество триграмм ключа.
+
+    partial=True — для недописанного ввода: без триграмм с пробелом в
+    конце, иначе «мук» не совпадал бы с «мука» по последней тройке.
+    """
+    padded = f"  {key}" if partial else f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(first, second):
+    """Коэффициент Жаккара по триграммам двух названий"""
+    a, b = trigrams(normalize_name(first)), trigrams(normalize_name(second))
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class IngredientIndex:
+    """Триграммный индекс названий ингредиентов.
+
+    Строка индекса — ингредиент: его ID, название, ключ и число триграмм.
+    Для каждой триграммы хранится массив строк (array('q') по возрастанию).
+    Удалённые ингредиенты остаются в массивах с ID 0 и пропускаются при
+    поиске; переименование — удаление и добавление.
+    """
+
+    # Сколько строк с наибольшим числом редких триграмм проверять в suggest
+    SIMILAR_CANDIDATES = 200
+
+    def __init__(self):
+        self.ids = array('q')              # ID ингредиента строки (0 — удалён)
+        self.names = []                    # название как в базе
+        self.keys = []                     # normalize_name(название)
+        self.sizes = array('H')            # число триграмм ключа
+        self._postings = {}                # триграмма -> array('q') строк
+        self._row_of = {}                  # ingredient_id -> строка
+        self._order = array('q')           # строки по возрастанию ключа
+        self.last_id = 0                   # наибольший добавленный ID
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_connection(cls, conn):
+        index = cls()
+        index.refresh(conn)
+        return index
+
+    def refresh(self, conn):
+        """Добавление ингредиентов, созданных после построения индекса.
+
+        ID ингредиентов (AUTOINCREMENT) не используются повторно, поэтому
+        новые — это строки с ID больше последнего известного.
+        """
+        with self._lock:
+            rows = conn.execute('SELECT id, name FROM Ingredients WHERE id > ? ORDER BY id',
+                                (self.last_id,)).fetchall()
+            for ingredient_id, name in rows:
+                self._add(ingredient_id, name)
+            self._sort(len(rows))
+            return len(rows)
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def __contains__(self, ingredient_id):
+        return ingredient_id in self._row_of
+
+    def name(self, ingredient_id):
+        row = self._row_of.get(ingredient_id)
+        return None if row is None else self.names[row]
+
+    def add(self, ingredient_id, name):
+        """Новый или переименованный ингредиент"""
+        with self._lock:
+            self._remove(ingredient_id)
+            self._add(ingredient_id, name)
+            self._sort(1)
+
+    def _add(self, ingredient_id, name):
+        row = len(self.ids)
+        key = normalize_name(name)
+        grams = trigrams(key)
+        self.ids.append(ingredient_id)
+        self.names.append(name)
+        self.keys.append(key)
+        self.sizes.append(len(grams))
+        self._row_of[ingredient_id] = row
+        self.last_id = max(self.last_id, ingredient_id)
+        for gram in grams:
+            rows = self._postings.get(gram)
+            if rows is None:
+                rows = self._postings[gram] = array('q')
+            rows.append(row)
+
+    def _sort(self, added):
+        """Место последних added строк в порядке ключей"""
+        keys = self.keys
+        if added > 1000:
+            self._order = array('q', sorted(range(len(keys)), key=keys.__getitem__))
+            return
+        for row in range(len(keys) - added, len(keys)):
+            bisect.insort(self._order, row, key=keys.__getitem__)
+
+    def remove(self, ingredient_id):
+        with self._lock:
+            self._remove(ingredient_id)
+
+    def _remove(self, ingredient_id):
+        row = self._row_of.pop(ingredient_id, None)
+        if row is not None:
+            self.ids[row] = 0
+
+    def find(self, name):
+        """ID ингредиентов с тем же ключом, что у name (по возрастанию)"""
+        key = normalize_name(name)
+        grams = trigrams(key)
+        with self._lock:
+            rows = self._postings.get(min(grams, key=lambda gram: len(self._postings.get(gram, ()))))
+            return sorted(self.ids[row] for row in rows or ()
+                          if self.ids[row] and self.keys[row] == key)
+
+    def suggest(self, text, limit=10, min_score=0.5):
+        """Подсказки для недописанного названия с опечатками.
+
+        Сначала идут названия, которые начинаются с ввода (по алфавиту), —
+        они берутся из упорядоченного списка ключей без перебора. Если их
+        меньше limit, добавляются похожие: с долей совпавших триграмм ввода
+        не меньше min_score, по убыванию этой доли и похожести целиком.
+        Возвращает список (id, название, похожесть).
+        """
+        key = normalize_name(text)
+        if not key:
+            return []
+        grams = trigrams(key, partial=True)
+        with self._lock:
+            rows = self._prefix_matches(key, limit)
+            if len(rows) < limit:
+                rows.extend(self._similar(grams, limit - len(rows), min_score, set(rows)))
+            return [(self.ids[row], self.names[row], self._score(grams, row)) for row in rows]
+
+    def _prefix_matches(self, key, limit):
+        order, keys, ids = self._order, self.keys, self.ids
+        position = bisect.bisect_left(order, key, key=keys.__getitem__)
+        rows = []
+        while position < len(order) and len(rows) < limit:
+            row = order[position]
+            if not keys[row].startswith(key):
+                break
+            if ids[row]:
+                rows.append(row)
+            position += 1
+        return rows
+
+    def _similar(self, grams, limit, min_score, exclude):
+        """Строки, где есть не меньше min_score триграмм из grams.
+
+        Строке с needed общими триграммами не хватает не больше
+        len(grams) − needed триграмм, поэтому хотя бы одна из
+        len(grams) − needed + 1 самых редких у неё есть. Совпадения
+        считаются только по этим редким триграммам (Counter, без цикла
+        Python по спискам), и точно проверяются только строки с наибольшим
+        их числом (около SIMILAR_CANDIDATES): частые триграммы вроде «ка »
+        почти ничего не говорят о похожести, а проверка тысяч строк
+        не уложилась бы в время одного нажатия клавиши.
+        """
+        postings, ids, keys = self._postings, self.ids, self.keys
+        needed = max(1, math.ceil(min_score * len(grams)))
+        rare = sorted(grams, key=lambda gram: len(postings.get(gram, ())))[:len(grams) - needed + 1]
+        counts = Counter()
+        for gram in rare:
+            rows = postings.get(gram)
+            if rows is not None:
+                counts.update(rows)
+
+        # Порог — наименьшее число редких триграмм, при котором набирается
+        # SIMILAR_CANDIDATES строк (без сортировки всех строк, как в PantryIndex.match)
+        wanted = self.SIMILAR_CANDIDATES + len(exclude)
+        threshold, taken = 1, 0
+        for hits, count in sorted(Counter(counts.values()).items(), reverse=True):
+            threshold = hits
+            taken += count
+            if taken >= wanted:
+                break
+
+        candidates = []
+        for row in [row for row, hits in counts.items() if hits >= threshold]:
+            if not ids[row] or row in exclude:
+                continue
+            padded = f"  {keys[row]} "
+            shared = sum(gram in padded for gram in grams)
+            if shared >= needed:
+                candidates.append((-shared, -self._score(grams, row, shared), len(keys[row]), row))
+        return [candidate[-1] for candidate in heapq.nsmallest(limit, candidates)]
+
+    def _score(self, grams, row, shared=None):
+        """Коэффициент Жаккара ввода и названия строки"""
+        if shared is None:
+            padded = f"  {self.keys[row]} "
+            shared = sum(gram in padded for gram in grams)
+        return shared / (len(grams) + self.sizes[row] - shared)
+
+    def duplicates(self, threshold=0.75):
+        """Группы похожих ингредиентов (похожесть не ниже threshold).
+
+        Сравнивать все пары слишком долго, поэтому кандидаты отбираются
+        фильтром по префиксу (как в алгоритмах PPJoin): триграммы каждого
+        названия упорядочиваются от редких к частым. Если у A и B не меньше
+        α общих триграмм, то первые k общих стоят в A не дальше позиции
+        |A| − α + k, и так же в B. Поэтому префиксы длины |A| − ceil(t·|A|) + k
+        пересекаются хотя бы по k триграммам; при k = 2 случайные совпадения
+        по одной триграмме отсекаются ещё до точной проверки. Похожесть
+        транзитивно объединяет группы («мука» ~ «муки» ~ «муко»).
+        Возвращает список групп — отсортированных списков ID.
+        """
+        # Общих триграмм у похожих названий не меньше ceil(t·2) (в названии
+        # хотя бы две триграммы), а k не может быть больше этого числа
+        hits_needed = 2 if threshold > 0.5 else 1
+        with self._lock:
+            ids, keys, sizes, postings = self.ids, self.keys, self.sizes, self._postings
+
+            def frequency(gram):
+                return len(postings[gram]), gram
+
+            parent = {}
+
+            def root(row):
+                path = []
+                while parent.get(row, row) != row:
+                    path.append(row)
+                    row = parent[row]
+                for item in path:
+                    parent[item] = row
+                return row
+
+            def union(first, second):
+                first, second = root(first), root(second)
+                parent.setdefault(first, first)
+                if first != second:
+                    parent[second] = first
+
+            # Строки просматриваются по возрастанию длины: кандидаты из
+            # индекса префиксов — уже просмотренные строки не длиннее текущей
+            prefix_postings = {}
+            for row in sorted(range(len(ids)), key=sizes.__getitem__):
+                if not ids[row]:
+                    continue
+                grams = trigrams(keys[row])
+                size = len(grams)
+                prefix = sorted(grams, key=frequency)[:size - math.ceil(threshold * size) + hits_needed]
+                hits = Counter()
+                for gram in prefix:
+                    rows = prefix_postings.get(gram)
+                    if rows is not None:
+                        hits.update(rows)
+                    else:
+                        rows = prefix_postings[gram] = []
+                    rows.append(row)
+
+                low = threshold * size
+                for other, count in hits.items():
+                    if count < hits_needed or sizes[other] < low:
+                        continue
+                    if keys[other] == keys[row]:
+                        union(other, row)
+                        continue
+                    other_grams = trigrams(keys[other])
+                    shared = len(grams & other_grams)
+                    if shared >= threshold * (size + len(other_grams) - shared):
+                        union(other, row)
+
+            groups = {}
+            for row in parent:
+                groups.setdefault(root(row), []).append(ids[row])
+            return sorted(sorted(group) for group in groups.values())
+
+
+def merge_factor(unit, target_unit):
+    """Множитель пересчёта количеств из unit в target_unit при объединении.
+
+    Без единицы с одной из сторон — 1; незнакомые единицы совпадают без
+    учёта регистра. None — единицы несовместимы (г и мл).
+    """
+    unit, target_unit = normalize_unit(unit), normalize_unit(target_unit)
+    if unit and target_unit and normalize_name(unit) == normalize_name(target_unit):
+        return 1.0
+    try:
+        return convert_quantity(1.0, unit, target_unit)
+    except ValueError:
+        return None
+
+
+def plan_merges(groups, details):
+    """Какой ингредиент группы оставить: {ID дубля: ID оставляемого}.
+
+    details — {id: (единица, число рецептов)}. Остаётся самый
+    используемый ингредиент (при равенстве — с меньшим ID). Дубль
+    объединяется, только если его количества пересчитываются в единицу
+    группы (г и кг — да, г и мл — нет); единица группы — единица
+    оставляемого, а если её нет — первого объединённого дубля с единицей.
+    Ингредиент без единицы объединяется с любым.
+    """
+    merges = {}
+    for group in groups:
+        order = sorted(group, key=lambda ingredient_id: (-details[ingredient_id][1], ingredient_id))
+        keep, unit = order[0], details[order[0]][0]
+        for ingredient_id in order[1:]:
+            other_unit = details[ingredient_id][0]
+            if merge_factor(other_unit, unit) is not None:
+                merges[ingredient_id] = keep
+                unit = unit or other_unit
+    return merges
+
+
+def main():
+    from db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Поиск и объединение похожих ингредиентов')
+    parser.add_argument('command', choices=['dedup', 'suggest'])
+    parser.add_argument('text', nargs='?', help='начало названия (для suggest)')
+    parser.add_argument('--db', help='путь к базе данных')
+    parser.add_argument('--threshold', type=float, default=0.75, help='порог похожести (0–1)')
+    parser.add_argument('--apply', action='store_true', help='объединить найденные дубли')
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(args.db)
+    index = db_manager.get_ingredient_index()
+    if args.command == 'suggest':
+        for ingredient_id, name, score in db_manager.suggest_ingredients(args.text or ''):
+            print(f"{ingredient_id:>8}  {score:.2f}  {name}")
+        db_manager.close()
+        return
+
+    merges = db_manager.find_duplicate_ingredients(args.threshold)
+    by_keep = {}
+    for duplicate_id, keep_id in merges.items():
+        by_keep.setdefault(keep_id, []).append(duplicate_id)
+    for keep_id, duplicate_ids in sorted(by_keep.items()):
+        names = ', '.join(repr(index.name(duplicate_id)) for duplicate_id in sorted(duplicate_ids))
+        print(f"{index.name(keep_id)!r} ← {names}")
+    print(f"🔎 Найдено дублей: {len(merges)} (групп: {len(by_keep)})")
+
+    if args.apply and merges:
+        merged = db_manager.merge_ingredients(merges)
+        if merged is None:
+            print("❌ Объединение не выполнено, подробности в журнале")
+        else:
+            print(f"✅ Объединено ингредиентов: {merged}")
+    db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
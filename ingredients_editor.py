@@ -0,0 +1,140 @@
+from PyQt6.QtCore import QStringListModel
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView,
+                             QAbstractItemView, QCompleter, QLineEdit,
+                             QStyledItemDelegate)
+
+
+class NameDelegate(QStyledItemDelegate):
+    """Редактор названия с подсказками по мере ввода.
+
+    Подсказки нечёткие (опечатки, регистр, ё/е), поэтому список показывается
+    целиком, без фильтрации QCompleter по началу строки. Запросы идут через
+    DatabaseWorker с ключом редактора: ответ на устаревший текст не
+    доставляется, а закрытие редактора отменяет ожидающий запрос.
+    """
+
+    def __init__(self, db_worker, parent=None):
+        super().__init__(parent)
+        self.db_worker = db_worker
+
+    def createEditor(self, parent, option, index):
+        editor = super().createEditor(parent, option, index)
+        if isinstance(editor, QLineEdit):
+            model = QStringListModel(editor)
+            completer = QCompleter(model, editor)
+            completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+            editor.setCompleter(completer)
+            key = ('suggest', id(editor))
+            editor.textEdited.connect(lambda text: self.suggest(text, key, model, completer))
+            editor.destroyed.connect(lambda: self.db_worker.cancel(key))
+        return editor
+
+    def suggest(self, text, key, model, completer):
+        if not text.strip():
+            self.db_worker.cancel(key)
+            model.setStringList([])
+            return
+        self.db_worker.suggest_ingredients(
+            text, key=key,
+            callback=lambda suggestions: self.show_suggestions(suggestions, model, completer))
+
+    def show_suggestions(self, suggestions, model, completer):
+        names = [name for _, name, _ in suggestions]
+        model.setStringList(names)
+        if names:
+            completer.complete()
+
+
+class IngredientsEditor(QWidget):
+    """Таблица ингредиентов рецепта: название, количество, единица"""
+
+    HEADERS = ["Ингредиент", "Количество", "Ед."]
+    NAME, QUANTITY, UNIT = range(3)
+
+    def __init__(self, ingredients=None, parent=None, db_worker=None):
+        super().__init__(parent)
+        self.db_worker = db_worker
+        self.initUI()
+        self.set_ingredients(ingredients or [])
+
+    def initUI(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.horizontalHeader().setSectionResizeMode(self.NAME, QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        if self.db_worker is not None:
+            self.table.setItemDelegateForColumn(self.NAME, NameDelegate(self.db_worker, self.table))
+        layout.addWidget(self.table)
+
+        buttons_layout = QHBoxLayout()
+        self.add_button = QPushButton("➕ Добавить ингредиент")
+        self.remove_button = QPushButton("➖ Удалить выбранный")
+        self.add_button.clicked.connect(self.add_row)
+        self.remove_button.clicked.connect(self.remove_selected)
+        buttons_layout.addWidget(self.add_button)
+        buttons_layout.addWidget(self.remove_button)
+        layout.addLayout(buttons_layout)
+
+        self.setLayout(layout)
+
+    def add_row(self, name='', unit='', quantity=None):
+        """Новая строка (по кнопке — пустая, с фокусом на названии)"""
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, self.NAME, QTableWidgetItem(name or ''))
+        self.table.setItem(row, self.QUANTITY, QTableWidgetItem('' if quantity is None else f"{quantity:g}"))
+        self.table.setItem(row, self.UNIT, QTableWidgetItem(unit or ''))
+        if not name:
+            self.table.setCurrentCell(row, self.NAME)
+            self.table.editItem(self.table.item(row, self.NAME))
+
+    def remove_selected(self):
+        for row in sorted({index.row() for index in self.table.selectedIndexes()}, reverse=True):
+            self.table.removeRow(row)
+
+    def set_ingredients(self, ingredients):
+        """Заполнение списком (название, единица, количество)"""
+        self.table.setRowCount(0)
+        for name, unit, quantity in ingredients:
+            self.add_row(name, unit, quantity)
+
+    def ingredients(self):
+        """Список (название, единица, количество) без пустых строк"""
+        result = []
+        for row in range(self.table.rowCount()):
+            name = self._text(row, self.NAME)
+            if not name:
+                continue
+            quantity = self._text(row, self.QUANTITY).replace(',', '.')
+            try:
+                quantity = float(quantity) if quantity else None
+            except ValueError:
+                quantity = None
+            result.append((name, self._text(row, self.UNIT) or None, quantity))
+        return result
+
+    def invalid_quantities(self):
+        """Названия ингредиентов, у которых количество не число"""
+        invalid = []
+        for row in range(self.table.rowCount()):
+            quantity = self._text(row, self.QUANTITY).replace(',', '.')
+            try:
+                float(quantity or 0)
+            except ValueError:
+                invalid.append(self._text(row, self.NAME) or f"строка {row + 1}")
+        return invalid
+
+    def _text(self, row, column):
+        item = self.table.item(row, column)
+        return item.text().strip() if item else ''
+
+    def setReadOnly(self, read_only):
+        triggers = (QAbstractItemView.EditTrigger.NoEditTriggers if read_only
+                    else QAbstractItemView.EditTrigger.AllEditTriggers)
+        self.table.setEditTriggers(triggers)
+        self.add_button.setVisible(not read_only)
+        self.remove_button.setVisible(not read_only)
\ No newline at end of file
@@ -0,0 +1,57 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Сборка в папку (onedir): в отличие от main.spec (один exe) при каждом
+# запуске ничего не распаковывается во временный каталог, поэтому окно
+# появляется заметно быстрее. UPX отключён: распаковка сжатых библиотек
+# тоже замедляет запуск.
+#
+# pyinstaller main_onedir.spec  ->  dist/main/main(.exe)
+
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('*.db', '.')],
+    # Окна импортируются лениво через dialogs.py — анализатор их не видит
+    hiddenimports=['recipe_detail_window', 'recipe_form_window',
+                   'shopping_list_window', 'ingredient_form_window'],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    # Модули Qt и стандартной библиотеки, которые приложению не нужны
+    excludes=['tkinter', 'unittest', 'pydoc', 'PyQt6.QtNetwork', 'PyQt6.QtQml',
+              'PyQt6.QtQuick', 'PyQt6.QtMultimedia', 'PyQt6.QtWebEngineCore',
+              'PyQt6.QtWebEngineWidgets', 'PyQt6.QtPdf', 'PyQt6.QtSvg',
+              'PyQt6.QtOpenGL', 'PyQt6.QtSql', 'PyQt6.QtTest', 'PyQt6.QtBluetooth'],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='main',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)
\ No newline at end of file
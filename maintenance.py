@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+
+from changes import trim_change_log
+from shopping_archive import ARCHIVE_AFTER_DAYS, archive_purchased
+
+logger = logging.getLogger('cookbook.maintenance')
+
+
+def cleanup_orphans(conn, batch_size=5000, prune_ingredients=False):
+    """Удаление строк, ссылающихся на несуществующие рецепты и ингредиенты.
+
+    При включённых внешних ключах сироты не появляются, но их могут
+    оставить соединения без PRAGMA foreign_keys. Удаление идёт пакетами
+    по batch_size строк в отдельных транзакциях, чтобы не держать
+    блокировку записи долго. prune_ingredients=True удаляет и ингредиенты,
+    которые не входят ни в один рецепт, список покупок и историю покупок.
+    Возвращает число удалённых строк по таблицам.
+    """
+    queries = {
+        'Recipe_Ingredients': '''
+            DELETE FROM Recipe_Ingredients WHERE rowid IN (
+                SELECT ri.rowid FROM Recipe_Ingredients ri
+                WHERE NOT EXISTS (SELECT 1 FROM Recipes r WHERE r.id = ri.recipe_id)
+                   OR NOT EXISTS (SELECT 1 FROM Ingredients i WHERE i.id = ri.ingredient_id)
+                LIMIT ?
+            )
+        ''',
+        'Shopping_List': '''
+            DELETE FROM Shopping_List WHERE id IN (
+                SELECT sl.id FROM Shopping_List sl
+                WHERE NOT EXISTS (SELECT 1 FROM Recipes r WHERE r.id = sl.recipe_id)
+                   OR NOT EXISTS (SELECT 1 FROM Ingredients i WHERE i.id = sl.ingredient_id)
+                LIMIT ?
+            )
+        ''',
+    }
+    if prune_ingredients:
+        queries['Ingredients'] = '''
+            DELETE FROM Ingredients WHERE id IN (
+                SELECT i.id FROM Ingredients i
+                WHERE NOT EXISTS (SELECT 1 FROM Recipe_Ingredients ri WHERE ri.ingredient_id = i.id)
+                  AND NOT EXISTS (SELECT 1 FROM Shopping_List sl WHERE sl.ingredient_id = i.id)
+                  AND NOT EXISTS (SELECT 1 FROM Shopping_List_Archive a WHERE a.ingredient_id = i.id)
+                LIMIT ?
+            )
+        '''
+
+    removed = {}
+    for table, query in queries.items():
+        removed[table] = 0
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                count = conn.execute(query, (batch_size,)).rowcount
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+            removed[table] += count
+            if count < batch_size:
+                break
+    return removed
+
+
+def vacuum(conn, pages_per_step=256, pause=0.01, full_vacuum_ratio=0.25):
+    """Возврат свободных страниц файла базы.
+
+    В режиме auto_vacuum = INCREMENTAL страницы освобождаются небольшими
+    шагами с паузами: каждый шаг — короткая транзакция, и запись из
+    приложения ждёт не дольше одного шага. Базы, созданные до включения
+    этого режима, переводятся в него одним полным VACUUM, когда свободных
+    страниц становится больше full_vacuum_ratio. Возвращает число
+    освобождённых страниц.
+    """
+    free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    if not free_before:
+        return 0
+
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        if free_before / page_count < full_vacuum_ratio:
+            return 0
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return free_before
+
+    free = free_before
+    while free:
+        # Модуль sqlite3 делает один шаг запроса, а каждый шаг
+        # incremental_vacuum освобождает одну страницу — поэтому шаг
+        # обслуживания состоит из нескольких вызовов в одной транзакции
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for _ in range(min(pages_per_step, free)):
+                conn.execute('PRAGMA incremental_vacuum(1)')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if remaining >= free:
+            break
+        free = remaining
+        time.sleep(pause)
+    return free_before - free
+
+
+def run_maintenance(db_manager, prune_ingredients=False, archive_after_days=ARCHIVE_AFTER_DAYS):
+    """Один проход обслуживания: архив покупок, сироты, свободные страницы, статистика.
+
+    archive_after_days=None отключает перенос купленных позиций в архив.
+    """
+    conn = db_manager.pool.get()
+    start = time.perf_counter()
+    archived = 0
+    if archive_after_days is not None:
+        archived = archive_purchased(conn, archive_after_days)
+    removed = cleanup_orphans(conn, prune_ingredients=prune_ingredients)
+    if removed.get('Ingredients'):
+        db_manager.reset_indexes()
+    # Без открытых окон журнал изменений никто не читает
+    trim_change_log(conn)
+    freed = vacuum(conn)
+    conn.execute('PRAGMA optimize')
+    logger.info("Обслуживание базы: в архив покупок %d, удалено %s, освобождено страниц: %d (%.0f мс)",
+                archived, removed, freed, (time.perf_counter() - start) * 1000)
+    return {'archived': archived, 'removed': removed, 'freed_pages': freed}
+
+
+class MaintenanceThread(threading.Thread):
+    """Фоновое обслуживание базы с заданным интервалом.
+
+    Работает на собственном соединении из пула DatabaseManager и не
+    занимает DatabaseWorker, через который идут запросы окон.
+    """
+
+    def __init__(self, db_manager, interval=600.0, prune_ingredients=False,
+                 archive_after_days=ARCHIVE_AFTER_DAYS):
+        super().__init__(name='db-maintenance', daemon=True)
+        self.db_manager = db_manager
+        self.interval = interval
+        self.prune_ingredients = prune_ingredients
+        self.archive_after_days = archive_after_days
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                run_maintenance(self.db_manager, self.prune_ingredients, self.archive_after_days)
+            except Exception as e:
+                logger.error("Ошибка обслуживания базы: %s", e)
+
+    def stop(self, wait=True):
+        self._stop_event.set()
+        if wait and self.is_alive():
+            self.join()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""Подбор меню: N рецептов с самым коротким списком покупок.
+
+Цель — как можно меньше разных ингредиентов у выбранных рецептов (то есть
+позиций в списке покупок), при равном числе — меньше общего времени
+приготовления. Ограничения: время одного рецепта, общее время, ингредиенты,
+которые меню должно использовать, и ингредиенты, которых быть не должно.
+
+Поиск эвристический: жадный выбор рецепта, добавляющего меньше всего новых
+ингредиентов, затем локальный поиск заменами (рецепт плана меняется на
+лучший из остальных, пока это уменьшает список). Стоимость всех рецептов
+на каждом шаге считается целиком встроенными функциями (map по массивам
+матрицы RollupEngine), без цикла Python по рецептам.
+"""
+import heapq
+import time
+from array import array
+from collections import Counter
+from itertools import chain, repeat
+from operator import add, mul, sub
+
+# Код рецепта на шаге поиска: новые ингредиенты * STEP + время приготовления.
+# Неподходящие рецепты получают INVALID; вычитание общих ингредиентов не
+# опускает их код ниже VALID_BELOW
+STEP = 1 << 20
+INVALID = 1 << 62
+VALID_BELOW = INVALID >> 1
+
+
+class MealPlanner:
+    """Поиск меню по матрице «рецепт × ингредиент» RollupEngine.
+
+    К строкам матрицы (CSR) добавляется обратный индекс «ингредиент →
+    строки рецептов»: при добавлении ингредиента в план у всех рецептов с
+    ним растёт число общих с планом ингредиентов (Counter.update).
+    """
+
+    # Сколько первых рецептов пробовать (пока не истекло время поиска)
+    RESTARTS = 5
+
+    def __init__(self, rollup):
+        self.rollup = rollup
+        indptr = rollup.indptr
+        self.sizes = array('q', map(sub, indptr[1:], indptr[:-1]))
+        self._column_of = dict(zip(rollup.ingredient_ids, range(len(rollup.ingredient_ids))))
+        self._postings = [array('q') for _ in rollup.ingredient_ids]
+        rows = chain.from_iterable(map(repeat, range(len(self.sizes)), self.sizes))
+        for row, column in zip(rows, rollup.columns):
+            self._postings[column].append(row)
+
+    def _columns(self, row):
+        return self.rollup.columns[self.rollup.indptr[row]:self.rollup.indptr[row + 1]]
+
+    def plan(self, count, cooking_times, max_total_time=None, max_time=None,
+             required=(), excluded=(), time_limit=0.5):
+        """Меню из count рецептов.
+
+        cooking_times — {recipe_id: время}; рецепты, которых в нём нет
+        (например, удалённые), не выбираются. required и excluded — ID
+        ингредиентов. Локальный поиск останавливается через time_limit
+        секунд. Возвращает (ID рецептов, число разных ингредиентов, общее
+        время) или None, если ограничениям не удовлетворяет ни одно
+        найденное меню.
+        """
+        deadline = time.perf_counter() + time_limit
+        recipe_ids = self.rollup.recipe_ids
+        valid = [recipe_id in cooking_times for recipe_id in recipe_ids]
+        # Время не указано — считаем, что готовить не нужно (0 минут)
+        times = [cooking_times.get(recipe_id) or 0 for recipe_id in recipe_ids]
+        if max_time is not None:
+            valid = [ok and value <= max_time for ok, value in zip(valid, times)]
+        for ingredient_id in excluded:
+            column = self._column_of.get(ingredient_id)
+            for row in self._postings[column] if column is not None else ():
+                valid[row] = False
+        # Код рецепта без общих с планом ингредиентов; выбранные и
+        # неподходящие рецепты получают INVALID
+        base = [size * STEP + value if ok else INVALID
+                for size, value, ok in zip(self.sizes, times, valid)]
+        if sum(ok for ok in valid) < count:
+            return None
+
+        required = {self._column_of.get(ingredient_id) for ingredient_id in required}
+        if None in required:
+            return None
+        # Запас времени на оставшиеся рецепты — по самым быстрым из подходящих
+        fastest = sorted(value for value, ok in zip(times, valid) if ok)[:count]
+
+        # Жадный выбор близорук, поэтому поиск повторяется с другим первым
+        # рецептом, пока есть время, и остаётся лучший план
+        best = None
+        for first in heapq.nsmallest(self.RESTARTS, range(len(base)), key=base.__getitem__):
+            if base[first] >= VALID_BELOW:
+                break
+            state = self._search(_PlanState(self, list(base)), first, count, times, fastest,
+                                 max_total_time, required, deadline)
+            if state is not None:
+                chosen = sorted(state.chosen, key=recipe_ids.__getitem__)
+                found = ([recipe_ids[row] for row in chosen], len(state.counts),
+                         sum(times[row] for row in chosen))
+                if best is None or found[1:] < best[1:]:
+                    best = found
+            if time.perf_counter() >= deadline:
+                break
+        return best
+
+    def _search(self, state, first, count, times, fastest, max_total_time, required, deadline):
+        """Жадный выбор, начиная с рецепта first, и локальный поиск заменами"""
+        for position in range(count):
+            limit = None
+            if max_total_time is not None:
+                limit = max_total_time - state.total_time(times) - sum(fastest[:count - position - 1])
+            row = first if position == 0 else state.best(times, limit, required.difference(state.counts))
+            if row is None or (limit is not None and times[row] > limit):
+                return None
+            state.add(row)
+        if required.difference(state.counts):
+            return None
+
+        # Замена рецепта лучшим из остальных, пока план улучшается
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for row in list(state.chosen):
+                if time.perf_counter() >= deadline:
+                    break
+                state.remove(row)
+                current = state.code(row, times)
+                limit = None
+                if max_total_time is not None:
+                    limit = max_total_time - state.total_time(times)
+                best = state.best(times, limit, required.difference(state.counts))
+                if best is not None and best != row and state.code(best, times) < current:
+                    state.add(best)
+                    improved = True
+                else:
+                    state.add(row)
+        return state
+
+
+class _PlanState:
+    """Текущий план: выбранные строки, ингредиенты и общие с планом ингредиенты рецептов"""
+
+    def __init__(self, planner, base):
+        self.planner = planner
+        self.base = base
+        self.chosen = []
+        self.counts = Counter()     # столбец ингредиента -> сколько рецептов плана его содержат
+        self.overlap = Counter()    # строка -> сколько ингредиентов плана в рецепте
+        self._saved = {}
+
+    def total_time(self, times):
+        return sum(times[row] for row in self.chosen)
+
+    def code(self, row, times):
+        return (self.planner.sizes[row] - self.overlap[row]) * STEP + times[row]
+
+    def add(self, row):
+        self.chosen.append(row)
+        self._saved[row] = self.base[row]
+        self.base[row] = INVALID
+        for column in self.planner._columns(row):
+            self.counts[column] += 1
+            if self.counts[column] == 1:
+                self.overlap.update(self.planner._postings[column])
+
+    def remove(self, row):
+        self.chosen.remove(row)
+        self.base[row] = self._saved.pop(row)
+        for column in self.planner._columns(row):
+            self.counts[column] -= 1
+            if not self.counts[column]:
+                del self.counts[column]
+                self.overlap.subtract(self.planner._postings[column])
+
+    def best(self, times, limit, uncovered):
+        """Строка с наименьшим кодом (новые ингредиенты, время) или None.
+
+        limit — наибольшее допустимое время рецепта; пока в плане нет
+        какого-то из uncovered, выбор идёт только среди рецептов с ним.
+        """
+        rows = range(len(self.base))
+        codes = list(map(sub, self.base, map(STEP.__mul__, map(self.overlap.get, rows, repeat(0)))))
+        if limit is not None:
+            codes = list(map(add, codes, map(mul, map(limit.__lt__, times), repeat(INVALID))))
+        if uncovered:
+            postings = self.planner._postings
+            candidates = set(chain.from_iterable(postings[column] for column in uncovered))
+            if not candidates:
+                return None
+            row = min(candidates, key=lambda row: (codes[row], row))
+            return row if codes[row] < VALID_BELOW else None
+        best = min(codes)
+        return codes.index(best) if best < VALID_BELOW else None
\ No newline at end of file
@@ -0,0 +1,329 @@
+import sqlite3
+
+from changes import change_log_triggers, link_change_triggers
+from search_index import create_search_index, drop_search_triggers
+from shopping_aggregation import normalize_unit
+
+
+def _table_columns(cursor, table):
+    """Список колонок таблицы"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _migration_1_base_schema(cursor):
+    """Основные таблицы книги рецептов"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Recipes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            cooking_time INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Базы, созданные через init_database, не содержат created_at.
+    # ALTER TABLE не умеет добавлять колонку с DEFAULT CURRENT_TIMESTAMP,
+    # поэтому таблицу пересоздаём с сохранением данных. Новую таблицу
+    # переименовываем в конце, чтобы внешние ключи других таблиц не поменялись
+    if 'created_at' not in _table_columns(cursor, 'Recipes'):
+        cursor.execute('''
+            CREATE TABLE Recipes_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                description TEXT,
+                cooking_time INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            INSERT INTO Recipes_new (id, name, description, cooking_time)
+            SELECT id, name, description, cooking_time FROM Recipes
+        ''')
+        cursor.execute('DROP TABLE Recipes')
+        cursor.execute('ALTER TABLE Recipes_new RENAME TO Recipes')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Ingredients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            unit TEXT
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Recipe_Ingredients (
+            recipe_id INTEGER,
+            ingredient_id INTEGER,
+            quantity REAL,
+            FOREIGN KEY (recipe_id) REFERENCES Recipes(id),
+            FOREIGN KEY (ingredient_id) REFERENCES Ingredients(id),
+            PRIMARY KEY (recipe_id, ingredient_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Shopping_List (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipe_id INTEGER,
+            ingredient_id INTEGER,
+            quantity REAL,
+            unit TEXT,
+            purchased BOOLEAN DEFAULT 0,
+            added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (recipe_id) REFERENCES Recipes(id),
+            FOREIGN KEY (ingredient_id) REFERENCES Ingredients(id)
+        )
+    ''')
+
+
+def _migration_2_search_index(cursor):
+    """Полнотекстовый индекс рецептов"""
+    create_search_index(cursor)
+
+
+def _migration_3_indexes(cursor):
+    """Вторичные индексы для соединений и фильтров"""
+    # Список рецептов по алфавиту читается прямо из индекса, без сортировки
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_recipes_name ON Recipes (name, id)')
+    # Поиск ингредиента по названию
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ingredients_name ON Ingredients (name)')
+    # Покрывающие индексы связи: ингредиенты рецепта и рецепты с ингредиентом
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_recipe
+        ON Recipe_Ingredients (recipe_id, ingredient_id, quantity)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_ingredient
+        ON Recipe_Ingredients (ingredient_id, recipe_id, quantity)
+    ''')
+    # Список покупок по рецепту, ингредиенту и статусу покупки
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shopping_list_recipe ON Shopping_List (recipe_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_shopping_list_ingredient ON Shopping_List (ingredient_id)')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shopping_list_purchased
+        ON Shopping_List (purchased, added_date)
+    ''')
+
+
+def _rebuild_table(cursor, table, create_sql, columns):
+    """Пересоздание таблицы с новым определением и сохранением данных.
+
+    Вместе со старой таблицей удаляются её индексы и триггеры —
+    их нужно создать заново.
+    """
+    cursor.execute(create_sql.format(table=f'{table}_new'))
+    cursor.execute(f'INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}')
+    cursor.execute(f'DROP TABLE {table}')
+    cursor.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+
+def _migration_4_foreign_keys(cursor):
+    """Каскадное удаление связей и списка покупок вместе с рецептом"""
+    # Сироты, накопившиеся без проверки внешних ключей
+    cursor.execute('''
+        DELETE FROM Recipe_Ingredients
+        WHERE recipe_id NOT IN (SELECT id FROM Recipes)
+           OR ingredient_id NOT IN (SELECT id FROM Ingredients)
+    ''')
+    cursor.execute('''
+        DELETE FROM Shopping_List
+        WHERE recipe_id NOT IN (SELECT id FROM Recipes)
+           OR ingredient_id NOT IN (SELECT id FROM Ingredients)
+    ''')
+
+    # Триггеры поиска ссылаются на пересоздаваемые таблицы — переименование
+    # не прошло бы проверку схемы, поэтому они создаются заново в конце
+    drop_search_triggers(cursor)
+
+    # Проверка связи с рецептом отложена до COMMIT: импорт пишет связи
+    # раньше самих рецептов (см. RecipeImporter._flush)
+    _rebuild_table(cursor, 'Recipe_Ingredients', '''
+        CREATE TABLE {table} (
+            recipe_id INTEGER,
+            ingredient_id INTEGER,
+            quantity REAL,
+            FOREIGN KEY (recipe_id) REFERENCES Recipes(id)
+                ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+            FOREIGN KEY (ingredient_id) REFERENCES Ingredients(id)
+                ON DELETE CASCADE,
+            PRIMARY KEY (recipe_id, ingredient_id)
+        )
+    ''', 'recipe_id, ingredient_id, quantity')
+
+    _rebuild_table(cursor, 'Shopping_List', '''
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipe_id INTEGER,
+            ingredient_id INTEGER,
+            quantity REAL,
+            unit TEXT,
+            purchased BOOLEAN DEFAULT 0,
+            added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (recipe_id) REFERENCES Recipes(id) ON DELETE CASCADE,
+            FOREIGN KEY (ingredient_id) REFERENCES Ingredients(id) ON DELETE CASCADE
+        )
+    ''', 'id, recipe_id, ingredient_id, quantity, unit, purchased, added_date')
+
+    # Индексы удалены вместе со старыми таблицами
+    _migration_3_indexes(cursor)
+    create_search_index(cursor)
+
+
+def _migration_5_ingredient_attributes(cursor):
+    """Пищевая ценность и цена ингредиентов для сводных расчётов"""
+    # Значения указаны на per_quantity единиц ингредиента (например, на 100 г)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Ingredient_Attributes (
+            ingredient_id INTEGER PRIMARY KEY,
+            per_quantity REAL NOT NULL DEFAULT 1,
+            calories REAL,
+            protein REAL,
+            fat REAL,
+            carbs REAL,
+            price REAL,
+            FOREIGN KEY (ingredient_id) REFERENCES Ingredients(id) ON DELETE CASCADE
+        )
+    ''')
+
+
+def _migration_6_change_log(cursor):
+    """Журнал изменений рецептов и списка покупок для обновления окон"""
+    # AUTOINCREMENT: номера не используются повторно после очистки журнала
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Change_Log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            action TEXT NOT NULL
+        )
+    ''')
+    for trigger in change_log_triggers():
+        cursor.execute(trigger)
+
+
+def _migration_7_shopping_archive(cursor):
+    """Архив купленных позиций списка покупок"""
+    # Купленные позиции старше заданного срока переносятся сюда из
+    # Shopping_List (см. shopping_archive.py) с прежними id. История
+    # покупок переживает удаление рецепта: ссылка на него обнуляется
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Shopping_List_Archive (
+            id INTEGER PRIMARY KEY,
+            recipe_id INTEGER,
+            ingredient_id INTEGER NOT NULL,
+            quantity REAL,
+            unit TEXT,
+            added_date TIMESTAMP,
+            archived_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (recipe_id) REFERENCES Recipes(id) ON DELETE SET NULL,
+            FOREIGN KEY (ingredient_id) REFERENCES Ingredients(id) ON DELETE CASCADE
+        )
+    ''')
+    # История за период и история одного ингредиента за период
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shopping_archive_date
+        ON Shopping_List_Archive (added_date)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shopping_archive_ingredient
+        ON Shopping_List_Archive (ingredient_id, added_date, quantity, unit)
+    ''')
+    # Без индекса удаление рецепта просматривало бы весь архив
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shopping_archive_recipe
+        ON Shopping_List_Archive (recipe_id)
+    ''')
+
+
+def _migration_8_normalize_units(cursor):
+    """Единицы в виде ключей таблицы пересчёта («КГ» → «кг»)"""
+    # lower() в SQLite не знает кириллицы, поэтому пересчёт идёт в Python
+    for table in ('Ingredients', 'Shopping_List', 'Shopping_List_Archive'):
+        cursor.execute(f'SELECT DISTINCT unit FROM {table} WHERE unit IS NOT NULL')
+        changed = [(normalize_unit(unit), unit) for (unit,) in cursor.fetchall()
+                   if normalize_unit(unit) != unit]
+        cursor.executemany(f'UPDATE {table} SET unit = ? WHERE unit = ?', changed)
+
+
+def _migration_9_link_change_log(cursor):
+    """Журнал изменений связей рецептов с ингредиентами"""
+    # Правка связей другим процессом (объединение ингредиентов, прямые
+    # запросы) иначе не сбрасывала бы кэши и сводные расчёты рецепта
+    for trigger in link_change_triggers():
+        cursor.execute(trigger)
+
+
+# Порядок менять нельзя: номер миграции — это её позиция в списке
+MIGRATIONS = [
+    _migration_1_base_schema,
+    _migration_2_search_index,
+    _migration_3_indexes,
+    _migration_4_foreign_keys,
+    _migration_5_ingredient_attributes,
+    _migration_6_change_log,
+    _migration_7_shopping_archive,
+    _migration_8_normalize_units,
+    _migration_9_link_change_log,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    """Текущая версия схемы из PRAGMA user_version"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Применение недостающих миграций в одной транзакции.
+
+    Работает и внутри уже открытой транзакции (через SAVEPOINT).
+    Возвращает номер версии схемы после миграции.
+    """
+    version = get_schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    # Пересоздание таблиц при включённых внешних ключах удаляло бы
+    # (каскадом) зависимые строки. Переключить PRAGMA foreign_keys можно
+    # только вне транзакции; целостность проверяется перед фиксацией
+    foreign_keys = (not conn.in_transaction
+                    and conn.execute('PRAGMA foreign_keys').fetchone()[0])
+    if foreign_keys:
+        conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        return _apply_migrations(conn, version)
+    finally:
+        if foreign_keys:
+            conn.execute('PRAGMA foreign_keys = ON')
+
+
+def _apply_migrations(conn, version):
+    cursor = conn.cursor()
+    cursor.execute('SAVEPOINT migrate')
+    try:
+        for number in range(version + 1, SCHEMA_VERSION + 1):
+            MIGRATIONS[number - 1](cursor)
+            cursor.execute(f'PRAGMA user_version = {number}')
+
+        # Обновляем статистику, чтобы планировщик сразу использовал новые индексы.
+        # Для пустой базы статистику не собираем: нулевые счётчики строк
+        # закрепились бы и испортили планы, когда таблицы наполнятся
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM Recipes)')
+        if cursor.fetchone()[0]:
+            cursor.execute('ANALYZE')
+        cursor.execute('PRAGMA optimize')
+
+        cursor.execute('PRAGMA foreign_key_check')
+        violation = cursor.fetchone()
+        if violation is not None:
+            raise sqlite3.IntegrityError(f"Нарушен внешний ключ: таблица {violation[0]}, "
+                                         f"строка {violation[1]} → {violation[2]}")
+    except Exception:
+        cursor.execute('ROLLBACK TO migrate')
+        cursor.execute('RELEASE migrate')
+        raise
+    cursor.execute('RELEASE migrate')
+    return SCHEMA_VERSION
\ No newline at end of file
@@ -0,0 +1,168 @@
+import sys
+import threading
+from collections import OrderedDict
+
+DETAILS = 'details'
+INGREDIENTS = 'ingredients'
+
+
+def estimate_size(value):
+    """Приблизительный размер значения в байтах (с вложенными объектами)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class RecipeCache:
+    """LRU-кэш деталей и ингредиентов рецептов с ограничением по размеру.
+
+    Для записей ингредиентов запоминается, какие ингредиенты в них входят,
+    чтобы изменение ингредиента сбрасывало только затронутые рецепты.
+
+    Чтение при промахе идёт в базу без блокировки кэша, и параллельная
+    запись может сбросить запись рецепта, пока результат ещё не положен.
+    Поэтому перед чтением берётся версия записи (details_version,
+    ingredients_version), а put с устаревшей версией ничего не кладёт:
+    каждый сброс увеличивает номер своей записи, сброс ингредиента —
+    общий номер записей ингредиентов, clear() — общий номер всех записей.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()          # (вид, recipe_id) -> (значение, размер)
+        self._recipes_by_ingredient = {}       # ingredient_id -> {recipe_id}
+        self._ingredients_of = {}              # recipe_id -> ingredient_ids
+        self._versions = {}                    # (вид, recipe_id) -> число сбросов
+        self._ingredients_epoch = 0            # число invalidate_ingredient
+        self._epoch = 0                        # число clear()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        """Удаление записи вместе с её связями в обратном индексе"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry[1]
+        if key[0] == INGREDIENTS:
+            recipe_id = key[1]
+            for ingredient_id in self._ingredients_of.pop(recipe_id, ()):
+                recipes = self._recipes_by_ingredient.get(ingredient_id)
+                if recipes is not None:
+                    recipes.discard(recipe_id)
+                    if not recipes:
+                        del self._recipes_by_ingredient[ingredient_id]
+
+    def _version(self, key):
+        epoch = self._ingredients_epoch if key[0] == INGREDIENTS else 0
+        return self._epoch, epoch, self._versions.get(key, 0)
+
+    def _invalidate(self, key):
+        self._drop(key)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def details_version(self, recipe_id):
+        """Версия записи деталей — взять перед чтением из базы для put_details"""
+        with self._lock:
+            return self._version((DETAILS, recipe_id))
+
+    def ingredients_version(self, recipe_id):
+        """Версия записи ингредиентов — взять перед чтением из базы для put_ingredients"""
+        with self._lock:
+            return self._version((INGREDIENTS, recipe_id))
+
+    def get_details(self, recipe_id):
+        """Детали рецепта из кэша (копия) или None"""
+        details = self._get((DETAILS, recipe_id))
+        return dict(details) if details is not None else None
+
+    def put_details(self, recipe_id, details, version=None):
+        with self._lock:
+            key = (DETAILS, recipe_id)
+            if version is not None and version != self._version(key):
+                return
+            self._put(key, dict(details))
+
+    def get_ingredients(self, recipe_id):
+        """Ингредиенты рецепта из кэша (копия списка) или None"""
+        ingredients = self._get((INGREDIENTS, recipe_id))
+        return list(ingredients) if ingredients is not None else None
+
+    def put_ingredients(self, recipe_id, ingredients, ingredient_ids, version=None):
+        with self._lock:
+            key = (INGREDIENTS, recipe_id)
+            if version is not None and version != self._version(key):
+                return
+            self._put(key, tuple(ingredients))
+            if key in self._entries:
+                self._ingredients_of[recipe_id] = tuple(ingredient_ids)
+                for ingredient_id in ingredient_ids:
+                    self._recipes_by_ingredient.setdefault(ingredient_id, set()).add(recipe_id)
+
+    def invalidate_recipe(self, recipe_id, details=True, ingredients=True):
+        """Сброс записей рецепта после его изменения"""
+        with self._lock:
+            if details:
+                self._invalidate((DETAILS, recipe_id))
+            if ingredients:
+                self._invalidate((INGREDIENTS, recipe_id))
+
+    def invalidate_ingredient(self, ingredient_id):
+        """Сброс ингредиентов всех закэшированных рецептов с этим ингредиентом"""
+        with self._lock:
+            # Какие рецепты с ним читаются сейчас, неизвестно — устаревают
+            # все незавершённые чтения ингредиентов
+            self._ingredients_epoch += 1
+            for recipe_id in list(self._recipes_by_ingredient.get(ingredient_id, ())):
+                self._drop((INGREDIENTS, recipe_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._recipes_by_ingredient.clear()
+            self._ingredients_of.clear()
+            # Номера записей больше не нужны: устаревают все чтения сразу
+            self._versions.clear()
+            self._epoch += 1
+            self.bytes = 0
+
+    def stats(self):
+        """Счётчики кэша"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
\ No newline at end of file
@@ -1,19 +1,41 @@
+import logging
+
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QTextEdit, QLineEdit, QSpinBox,
-                             QMessageBox, QScrollArea, QWidget)
+                             QMessageBox, QScrollArea, QWidget, QListWidget,
+                             QListWidgetItem)
 from PyQt6.QtCore import Qt
 
+from change_hub import ChangeHub
+from changes import DELETED
+from db_worker import DatabaseWorker, QtDispatcher
+from ingredients_editor import IngredientsEditor
+
+logger = logging.getLogger('cookbook.ui')
+
 class RecipeDetailWindow(QDialog):
     """Окно для просмотра и редактирования деталей рецепта"""
     
-    def __init__(self, recipe_data, db_manager, parent=None):
+    def __init__(self, recipe_data, db_manager, parent=None, db_worker=None):
         super().__init__(parent)
         self.recipe_data = recipe_data
         self.db_manager = db_manager
+        # Запросы идут в фоновом потоке, чтобы окно не замирало на SQLite
+        self.db_worker = db_worker or DatabaseWorker.shared(db_manager, QtDispatcher)
+        self._ingredients_key = ('ingredients', id(self))
+        self._details_key = ('details', id(self))
+        self._similar_key = ('similar', id(self))
+        self.ingredients = None    # загруженный список (название, единица, количество)
         self.is_editing = False
+        self.is_deleting = False
+        self.is_closed = False
         self.setWindowTitle(f"Рецепт: {recipe_data['name']}")
         self.setGeometry(300, 300, 600, 500)
         self.initUI()
+        
+        # Рецепт могут изменить или удалить в другом окне
+        self.change_hub = ChangeHub.shared(db_manager)
+        self.change_hub.recipes_changed.connect(self.on_recipes_changed)
     
     def initUI(self):
         """Инициализация интерфейса деталей рецепта"""
@@ -38,7 +60,7 @@ class RecipeDetailWindow(QDialog):
         layout.addLayout(time_layout)
         
         # Описание рецепта (редактируемое)
-        layout.addWidget(QLabel("Описание и ингредиенты:"))
+        layout.addWidget(QLabel("Описание:"))
         self.description_input = QTextEdit()
         self.description_input.setPlainText(self.recipe_data['description'])
         self.description_input.setReadOnly(True)
@@ -48,8 +70,19 @@ class RecipeDetailWindow(QDialog):
         layout.addWidget(QLabel("Ингредиенты:"))
         self.ingredients_label = QLabel("Загрузка ингредиентов...")
         layout.addWidget(self.ingredients_label)
+        self.ingredients_editor = IngredientsEditor(db_worker=self.db_worker)
+        self.ingredients_editor.hide()
+        layout.addWidget(self.ingredients_editor)
         self.load_ingredients()
         
+        # Рецепты с похожим набором ингредиентов (двойной щелчок — открыть)
+        layout.addWidget(QLabel("Похожие рецепты:"))
+        self.similar_list = QListWidget()
+        self.similar_list.setMaximumHeight(120)
+        self.similar_list.itemDoubleClicked.connect(self.open_similar_recipe)
+        layout.addWidget(self.similar_list)
+        self.load_similar_recipes()
+        
         # Кнопки
         buttons_layout = QHBoxLayout()
         self.edit_button = QPushButton("Редактировать")
@@ -69,21 +102,141 @@ class RecipeDetailWindow(QDialog):
     
     def load_ingredients(self):
         """Загрузка ингредиентов рецепта"""
-        try:
-            ingredients = self.db_manager.get_ingredients(self.recipe_data['id'])
-            if ingredients:
-                ingredients_text = ""
-                for name, unit, quantity in ingredients:
-                    if unit and quantity:
-                        ingredients_text += f"• {name}: {quantity} {unit}\n"
-                    else:
-                        ingredients_text += f"• {name}\n"
-                self.ingredients_label.setText(ingredients_text)
-            else:
-                self.ingredients_label.setText("Ингредиенты не указаны")
-        except Exception as e:
-            print(f"❌ Ошибка загрузки ингредиентов: {e}")
-            self.ingredients_label.setText("Ошибка загрузки ингредиентов")
+        self.db_worker.get_ingredients(
+            self.recipe_data['id'],
+            key=self._ingredients_key,
+            callback=self.show_ingredients,
+            errback=self.show_ingredients_error
+        )
+    
+    def show_ingredients(self, ingredients):
+        """Отображение загруженных ингредиентов"""
+        self.ingredients = list(ingredients)
+        if ingredients:
+            ingredients_text = ""
+            for name, unit, quantity in ingredients:
+                if unit and quantity:
+                    ingredients_text += f"• {name}: {quantity} {unit}\n"
+                else:
+                    ingredients_text += f"• {name}\n"
+            self.ingredients_label.setText(ingredients_text)
+        else:
+            self.ingredients_label.setText("Ингредиенты не указаны")
+    
+    def show_ingredients_error(self, error):
+        """Ошибка загрузки ингредиентов"""
+        logger.error("Ошибка загрузки ингредиентов: %s", error)
+        self.ingredients_label.setText("Ошибка загрузки ингредиентов")
+    
+    def load_similar_recipes(self):
+        """Загрузка рецептов с похожим набором ингредиентов.
+        
+        Индекс похожих рецептов строится в фоне, а не в общем DatabaseWorker;
+        пока он не готов, список не запрашивается и загружается после
+        построения. Если построить индекс не удалось, показывается ошибка.
+        """
+        build = self.db_manager.warm_similarity_index()
+        if build is not None:
+            self.similar_list.clear()
+            self.similar_list.addItem("Похожие рецепты подбираются...")
+            build.add_done_callback(self.on_similarity_index_built)
+            return
+        self.request_similar_recipes()
+    
+    def request_similar_recipes(self):
+        self.db_worker.get_similar_recipes(
+            self.recipe_data['id'],
+            build=False,
+            key=self._similar_key,
+            callback=self.show_similar_recipes,
+            errback=self.show_similar_error
+        )
+    
+    def on_similarity_index_built(self, build):
+        """Индекс построен (вызывается в потоке построения)"""
+        # Ответ (и ошибка) придёт в GUI-поток через DatabaseWorker
+        if self.is_closed:
+            return
+        if not build.cancelled() and build.exception() is None and build.result():
+            self.request_similar_recipes()
+            return
+        self.db_worker.run(self._similarity_build_error, build,
+                           key=self._similar_key, errback=self.show_similar_error)
+    
+    @staticmethod
+    def _similarity_build_error(conn, build):
+        """Ошибка построения индекса для errback запроса похожих рецептов"""
+        if build.cancelled():
+            raise RuntimeError("построение индекса похожих рецептов отменено")
+        raise build.exception() or RuntimeError("не удалось построить индекс похожих рецептов")
+    
+    def show_similar_recipes(self, similar):
+        """Отображение похожих рецептов"""
+        if similar is None:
+            # Индекс сбросили после построения — ждём нового
+            self.load_similar_recipes()
+            return
+        self.similar_list.clear()
+        for recipe_id, name, similarity in similar:
+            item = QListWidgetItem(f"{name} — похожесть {similarity:.0%}")
+            item.setData(Qt.ItemDataRole.UserRole, recipe_id)
+            self.similar_list.addItem(item)
+        if not similar:
+            self.similar_list.addItem("Похожих рецептов не найдено")
+    
+    def show_similar_error(self, error):
+        """Ошибка загрузки похожих рецептов"""
+        logger.error("Ошибка загрузки похожих рецептов: %s", error)
+        self.similar_list.clear()
+        self.similar_list.addItem("Ошибка загрузки похожих рецептов")
+    
+    def open_similar_recipe(self, item):
+        """Открытие похожего рецепта в отдельном окне"""
+        recipe_id = item.data(Qt.ItemDataRole.UserRole)
+        if recipe_id is None:
+            return
+        self.db_worker.get_recipe_details(recipe_id, callback=self.show_similar_recipe)
+    
+    def show_similar_recipe(self, details):
+        if details is None:
+            return
+        window = RecipeDetailWindow(details, self.db_manager, self, self.db_worker)
+        window.show()
+    
+    def on_recipes_changed(self, changes):
+        """Уведомление об изменении рецептов: перечитываем только свой"""
+        action = changes.recipes.get(self.recipe_data['id'])
+        if self.is_deleting or (action is None and not changes.reset):
+            return
+        if action == DELETED:
+            self.on_recipe_removed()
+        elif not self.is_editing:
+            # Во время редактирования не затираем ввод пользователя
+            self.db_worker.get_recipe_details(
+                self.recipe_data['id'],
+                key=self._details_key,
+                callback=self.on_details_reloaded
+            )
+    
+    def on_details_reloaded(self, details):
+        """Свежие данные рецепта после изменения в другом окне"""
+        if details is None:
+            self.on_recipe_removed()
+            return
+        if self.is_editing:
+            return
+        self.recipe_data.update(details)
+        self.name_input.setText(details['name'])
+        self.time_input.setValue(details['cooking_time'] or 1)
+        self.description_input.setPlainText(details['description'] or '')
+        self.setWindowTitle(f"Рецепт: {details['name']}")
+        self.load_ingredients()
+        self.load_similar_recipes()
+    
+    def on_recipe_removed(self):
+        """Рецепт удалён в другом окне"""
+        QMessageBox.information(self, "Рецепт удалён", f"Рецепт '{self.recipe_data['name']}' был удалён.")
+        self.reject()
     
     def toggle_edit(self):
         """Переключение режима редактирования"""
@@ -92,6 +245,12 @@ class RecipeDetailWindow(QDialog):
             self.name_input.setReadOnly(False)
             self.time_input.setReadOnly(False)
             self.description_input.setReadOnly(False)
+            # Ингредиенты редактируются, только если они уже загружены,
+            # иначе сохранение стёрло бы их
+            if self.ingredients is not None:
+                self.ingredients_editor.set_ingredients(self.ingredients)
+                self.ingredients_label.hide()
+                self.ingredients_editor.show()
             self.edit_button.setText("Сохранить")
             self.is_editing = True
         else:
@@ -100,44 +259,78 @@ class RecipeDetailWindow(QDialog):
     
     def save_changes(self):
         """Сохранение изменений рецепта"""
-        try:
-            new_name = self.name_input.text().strip()
-            new_description = self.description_input.toPlainText().strip()
-            new_time = self.time_input.value()
-            
-            if not new_name:
-                QMessageBox.warning(self, "Ошибка", "Название рецепта не может быть пустым!")
-                return
-            
-            # Обновляем в базе данных
-            success = self.db_manager.update_recipe(
+        new_name = self.name_input.text().strip()
+        new_description = self.description_input.toPlainText().strip()
+        new_time = self.time_input.value()
+        
+        if not new_name:
+            QMessageBox.warning(self, "Ошибка", "Название рецепта не может быть пустым!")
+            return
+        
+        # Обновляем в базе данных в фоновом потоке
+        self.edit_button.setEnabled(False)
+        if self.ingredients_editor.isHidden():
+            self.db_worker.update_recipe(
                 self.recipe_data['id'],
                 new_name,
                 new_description,
-                new_time
+                new_time,
+                callback=lambda success: self.on_changes_saved(success, new_name, new_description, new_time),
+                errback=self.on_save_error
             )
+            return
+        
+        invalid = self.ingredients_editor.invalid_quantities()
+        if invalid:
+            self.edit_button.setEnabled(True)
+            QMessageBox.warning(self, "Ошибка", f"Количество должно быть числом: {', '.join(invalid)}")
+            return
+        
+        # Рецепт и ингредиенты сохраняются одной транзакцией
+        new_ingredients = self.ingredients_editor.ingredients()
+        self.db_worker.save_recipe_with_ingredients(
+            new_name,
+            new_description,
+            new_time,
+            new_ingredients,
+            recipe_id=self.recipe_data['id'],
+            callback=lambda recipe_id: self.on_changes_saved(
+                recipe_id is not None, new_name, new_description, new_time, new_ingredients),
+            errback=self.on_save_error
+        )
+    
+    def on_changes_saved(self, success, new_name, new_description, new_time, new_ingredients=None):
+        """Завершение сохранения после ответа базы данных"""
+        self.edit_button.setEnabled(True)
+        if success:
+            if new_ingredients is not None:
+                self.show_ingredients(new_ingredients)
+                self.ingredients_editor.hide()
+                self.ingredients_label.show()
+                self.load_similar_recipes()
             
-            if success:
-                # Обновляем данные
-                self.recipe_data['name'] = new_name
-                self.recipe_data['description'] = new_description
-                self.recipe_data['cooking_time'] = new_time
-                
-                # Возвращаем в режим просмотра
-                self.name_input.setReadOnly(True)
-                self.time_input.setReadOnly(True)
-                self.description_input.setReadOnly(True)
-                self.edit_button.setText("Редактировать")
-                self.is_editing = False
-                self.setWindowTitle(f"Рецепт: {new_name}")
-                
-                QMessageBox.information(self, "Успех", "Рецепт успешно обновлен!")
-            else:
-                QMessageBox.warning(self, "Ошибка", "Не удалось обновить рецепт!")
-                
-        except Exception as e:
-            print(f"❌ Ошибка сохранения изменений: {e}")
-            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить изменения: {e}")
+            # Обновляем данные
+            self.recipe_data['name'] = new_name
+            self.recipe_data['description'] = new_description
+            self.recipe_data['cooking_time'] = new_time
+            
+            # Возвращаем в режим просмотра
+            self.name_input.setReadOnly(True)
+            self.time_input.setReadOnly(True)
+            self.description_input.setReadOnly(True)
+            self.edit_button.setText("Редактировать")
+            self.is_editing = False
+            self.setWindowTitle(f"Рецепт: {new_name}")
+            
+            QMessageBox.information(self, "Успех", "Рецепт успешно обновлен!")
+        else:
+            QMessageBox.warning(self, "Ошибка", "Не удалось обновить рецепт!")
+    
+    def on_save_error(self, error):
+        """Ошибка при сохранении изменений"""
+        self.edit_button.setEnabled(True)
+        logger.error("Ошибка сохранения изменений: %s", error)
+        QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить изменения: {error}")
     
     def delete_recipe(self):
         """Удаление рецепта"""
@@ -150,13 +343,36 @@ class RecipeDetailWindow(QDialog):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                success = self.db_manager.delete_recipe(self.recipe_data['id'])
-                if success:
-                    QMessageBox.information(self, "Успех", "Рецепт успешно удален!")
-                    self.accept()  # Закрываем окно
-                else:
-                    QMessageBox.warning(self, "Ошибка", "Не удалось удалить рецепт!")
-            except Exception as e:
-                print(f"❌ Ошибка удаления рецепта: {e}")
-                QMessageBox.warning(self, "Ошибка", f"Не удалось удалить рецепт: {e}")
\ No newline at end of file
+            self.delete_button.setEnabled(False)
+            self.is_deleting = True
+            self.db_worker.delete_recipe(
+                self.recipe_data['id'],
+                callback=self.on_recipe_deleted,
+                errback=self.on_delete_error
+            )
+    
+    def on_recipe_deleted(self, success):
+        """Завершение удаления после ответа базы данных"""
+        self.delete_button.setEnabled(True)
+        self.is_deleting = success
+        if success:
+            QMessageBox.information(self, "Успех", "Рецепт успешно удален!")
+            self.accept()  # Закрываем окно
+        else:
+            QMessageBox.warning(self, "Ошибка", "Не удалось удалить рецепт!")
+    
+    def on_delete_error(self, error):
+        """Ошибка при удалении рецепта"""
+        self.delete_button.setEnabled(True)
+        self.is_deleting = False
+        logger.error("Ошибка удаления рецепта: %s", error)
+        QMessageBox.warning(self, "Ошибка", f"Не удалось удалить рецепт: {error}")
+    
+    def done(self, result):
+        """Закрытие окна: незавершённые загрузки и уведомления больше не нужны"""
+        self.is_closed = True
+        self.db_worker.cancel(self._ingredients_key)
+        self.db_worker.cancel(self._details_key)
+        self.db_worker.cancel(self._similar_key)
+        self.change_hub.recipes_changed.disconnect(self.on_recipes_changed)
+        super().done(result)
\ No newline at end of file
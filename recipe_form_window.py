@@ -2,13 +2,15 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QTextEdit, QSpinBox, QPushButton,
                              QMessageBox)
 
+from ingredients_editor import IngredientsEditor
+
 class RecipeFormWindow(QDialog):
     """Окно для добавления/редактирования рецепта"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Добавить рецепт")
-        self.setGeometry(200, 200, 500, 400)
+        self.setGeometry(200, 200, 500, 600)
         self.initUI()
     
     def initUI(self):
@@ -26,9 +28,14 @@ class RecipeFormWindow(QDialog):
         # Поле "Описание рецепта"
         layout.addWidget(QLabel("Описание:"))
         self.description_input = QTextEdit()
-        self.description_input.setPlaceholderText("Введите описание рецепта и ингредиенты...")
+        self.description_input.setPlaceholderText("Введите описание рецепта...")
         layout.addWidget(self.description_input)
         
+        # Ингредиенты — отдельной таблицей, а не текстом в описании
+        layout.addWidget(QLabel("Ингредиенты:"))
+        self.ingredients_editor = IngredientsEditor()
+        layout.addWidget(self.ingredients_editor)
+        
         # Поле "Время приготовления"
         time_layout = QHBoxLayout()
         time_layout.addWidget(QLabel("Время приготовления (мин):"))
@@ -57,7 +64,8 @@ class RecipeFormWindow(QDialog):
         return {
             'name': self.name_input.text().strip(),
             'description': self.description_input.toPlainText().strip(),
-            'cooking_time': self.time_input.value()
+            'cooking_time': self.time_input.value(),
+            'ingredients': self.ingredients_editor.ingredients()
         }
     
     def save_recipe(self):
@@ -69,4 +77,9 @@ class RecipeFormWindow(QDialog):
             QMessageBox.warning(self, "Ошибка", "Введите название рецепта!")
             return
         
+        invalid = self.ingredients_editor.invalid_quantities()
+        if invalid:
+            QMessageBox.warning(self, "Ошибка", f"Количество должно быть числом: {', '.join(invalid)}")
+            return
+        
         self.accept()  # Закрываем окно с результатом OK
\ No newline at end of file
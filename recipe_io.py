@@ -0,0 +1,297 @@
+"""Массовый импорт и экспорт рецептов с ингредиентами (JSONL и CSV).
+
+Формат JSONL — один рецепт на строку:
+    {"name": ..., "description": ..., "cooking_time": ...,
+     "ingredients": [{"name": ..., "unit": ..., "quantity": ...}, ...]}
+
+Формат CSV — одна строка на пару «рецепт — ингредиент», строки одного
+рецепта идут подряд и имеют один номер рецепта в файле (recipe_no):
+соседние рецепты с одинаковыми названием, описанием и временем не
+сливаются. Рецепт без ингредиентов записывается одной строкой с пустыми
+колонками ингредиента. Файлы без колонки recipe_no (прежний формат)
+группируются по названию, описанию и времени.
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import time
+
+from ingredient_index import normalize_name
+from shopping_aggregation import convert_quantity, normalize_unit
+
+logger = logging.getLogger('cookbook.recipe_io')
+
+CSV_FIELDS = ['recipe_no', 'recipe', 'description', 'cooking_time', 'ingredient', 'unit', 'quantity']
+
+
+def read_jsonl(path):
+    """Построчное чтение рецептов из JSONL"""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_csv(path):
+    """Чтение рецептов из CSV с группировкой подряд идущих строк"""
+    with open(path, encoding='utf-8', newline='') as file:
+        rows = csv.DictReader(file)
+        if 'recipe_no' in (rows.fieldnames or ()):
+            key = lambda row: row['recipe_no']
+        else:
+            key = lambda row: (row['recipe'], row['description'], row['cooking_time'])
+        for _, group in itertools.groupby(rows, key):
+            group = list(group)
+            cooking_time = group[0]['cooking_time']
+            yield {
+                'name': group[0]['recipe'],
+                'description': group[0]['description'],
+                'cooking_time': int(cooking_time) if cooking_time else None,
+                'ingredients': [
+                    {
+                        'name': row['ingredient'],
+                        'unit': row['unit'] or None,
+                        'quantity': float(row['quantity']) if row['quantity'] else None,
+                    }
+                    for row in group if row['ingredient']
+                ],
+            }
+
+
+def write_jsonl(recipes, path):
+    """Запись рецептов в JSONL. Возвращает число рецептов"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        for recipe in recipes:
+            file.write(json.dumps(recipe, ensure_ascii=False))
+            file.write('\n')
+            count += 1
+    return count
+
+
+def write_csv(recipes, path):
+    """Запись рецептов в CSV. Возвращает число рецептов"""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_FIELDS)
+        for recipe in recipes:
+            head = [count + 1, recipe['name'], recipe['description'], recipe['cooking_time']]
+            if not recipe['ingredients']:
+                writer.writerow(head + ['', '', ''])
+            for ingredient in recipe['ingredients']:
+                writer.writerow(head + [ingredient['name'], ingredient['unit'], ingredient['quantity']])
+            count += 1
+    return count
+
+
+class RecipeImporter:
+    """Пакетная загрузка рецептов в одной транзакции"""
+
+    def __init__(self, db_manager, batch_size=1000):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+
+    def import_recipes(self, recipes):
+        """Импорт рецептов из любого итерируемого источника.
+
+        Количества пересчитываются в единицу ингредиента в базе, как при
+        сохранении рецепта; рецепт с несовместимой единицей пропускается.
+        Возвращает статистику: число рецептов, новых ингредиентов, связей,
+        пропущенных рецептов, время и скорость в строках в секунду.
+        """
+        start = time.perf_counter()
+        stats = {'recipes': 0, 'ingredients': 0, 'links': 0, 'skipped': 0}
+
+        # Блокировка записи берётся сразу: идентификаторы выдаём сами
+        with self.db_manager.transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            # Ингредиенты ищутся по ключу названия (normalize_name: регистр,
+            # «ё», пробелы); при повторах ключа берётся ингредиент с наименьшим
+            # id, как в save_recipe_with_ingredients
+            cursor.execute('SELECT id, name, unit FROM Ingredients ORDER BY id DESC')
+            ingredient_ids, units = {}, {}
+            for ingredient_id, name, unit in cursor:
+                ingredient_ids[normalize_name(name)] = ingredient_id
+                units[ingredient_id] = unit
+            next_ingredient_id = _next_id(cursor, 'Ingredients')
+            next_recipe_id = _next_id(cursor, 'Recipes')
+
+            recipe_rows, ingredient_rows, unit_rows, link_rows = [], [], [], []
+            for recipe in recipes:
+                try:
+                    quantities = self._quantities(recipe, ingredient_ids, units)
+                except ValueError as e:
+                    logger.warning("Рецепт '%s' пропущен: %s", recipe['name'], e)
+                    stats['skipped'] += 1
+                    continue
+
+                recipe_id = next_recipe_id
+                next_recipe_id += 1
+                recipe_rows.append((recipe_id, recipe['name'], recipe.get('description'),
+                                    recipe.get('cooking_time')))
+                for key, (name, unit, quantity) in quantities.items():
+                    ingredient_id = ingredient_ids.get(key)
+                    if ingredient_id is None:
+                        ingredient_id = ingredient_ids[key] = next_ingredient_id
+                        next_ingredient_id += 1
+                        units[ingredient_id] = unit
+                        ingredient_rows.append((ingredient_id, name, unit))
+                    elif units[ingredient_id] is None and unit is not None:
+                        # Как и при сохранении рецепта, заполняется только отсутствующая единица
+                        units[ingredient_id] = unit
+                        unit_rows.append((unit, ingredient_id))
+                    link_rows.append((recipe_id, ingredient_id, quantity))
+
+                if len(recipe_rows) >= self.batch_size:
+                    self._flush(cursor, recipe_rows, ingredient_rows, unit_rows, link_rows, stats)
+
+            self._flush(cursor, recipe_rows, ingredient_rows, unit_rows, link_rows, stats)
+
+            # После массовой загрузки статистика планировщика устаревает
+            cursor.execute('ANALYZE')
+
+        # Индекс подбора по ингредиентам дешевле построить заново, чем дополнять
+        self.db_manager.reset_indexes()
+
+        stats['seconds'] = time.perf_counter() - start
+        rows = stats['recipes'] + stats['ingredients'] + stats['links']
+        stats['rows_per_second'] = rows / stats['seconds'] if stats['seconds'] else 0.0
+        logger.info("Импортировано рецептов: %d, новых ингредиентов: %d, связей: %d, "
+                    "пропущено рецептов: %d (%.0f строк/с)", stats['recipes'], stats['ingredients'],
+                    stats['links'], stats['skipped'], stats['rows_per_second'])
+        return stats
+
+    @staticmethod
+    def _quantities(recipe, ingredient_ids, units):
+        """Ингредиенты рецепта: {ключ названия: (название, единица, количество)}.
+
+        Количество приводится к единице ингредиента в базе, у нового — к
+        первой указанной; повторы ингредиента внутри рецепта (с точностью
+        до ключа названия) складываются, название нового ингредиента —
+        первое написание. Несовместимая единица — ValueError.
+        """
+        quantities = {}
+        for ingredient in recipe.get('ingredients') or []:
+            name = ' '.join(ingredient['name'].split())
+            key = normalize_name(name)
+            unit = normalize_unit(ingredient.get('unit'))
+            target = units.get(ingredient_ids.get(key))
+            if key in quantities:
+                name, previous_unit, previous = quantities[key]
+                target = target or previous_unit
+            quantity = convert_quantity(ingredient.get('quantity'), unit, target)
+            if key in quantities:
+                quantity = previous if quantity is None else quantity + (previous or 0)
+            quantities[key] = (name, target or unit, quantity)
+        return quantities
+
+    def _flush(self, cursor, recipe_rows, ingredient_rows, unit_rows, link_rows, stats):
+        """Запись накопленного пакета через executemany"""
+        cursor.executemany('INSERT INTO Ingredients (id, name, unit) VALUES (?, ?, ?)',
+                           ingredient_rows)
+        cursor.executemany('UPDATE Ingredients SET unit = ? WHERE id = ?', unit_rows)
+        # Связи пишем раньше рецептов: триггер поискового индекса на вставку
+        # рецепта тогда собирает все ингредиенты сразу, а не обновляет
+        # строку индекса после каждой связи
+        cursor.executemany('''
+            INSERT INTO Recipe_Ingredients (recipe_id, ingredient_id, quantity) VALUES (?, ?, ?)
+        ''', link_rows)
+        cursor.executemany('''
+            INSERT INTO Recipes (id, name, description, cooking_time) VALUES (?, ?, ?, ?)
+        ''', recipe_rows)
+
+        stats['recipes'] += len(recipe_rows)
+        stats['ingredients'] += len(ingredient_rows)
+        stats['links'] += len(link_rows)
+        recipe_rows.clear()
+        ingredient_rows.clear()
+        unit_rows.clear()
+        link_rows.clear()
+
+
+def _next_id(cursor, table):
+    """Следующий ID таблицы с AUTOINCREMENT.
+
+    Учитывается sqlite_sequence: ID удалённых рецептов и ингредиентов не
+    выдаются повторно, иначе на новую запись указывали бы старые ссылки
+    (история покупок, снимки каталога, кэши).
+    """
+    cursor.execute(f'''
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+                   COALESCE((SELECT MAX(id) FROM {table}), 0)) + 1
+    ''', (table,))
+    return cursor.fetchone()[0]
+
+
+def iter_recipes(db_manager):
+    """Потоковое чтение всех рецептов с ингредиентами прямо из курсора"""
+    with db_manager.pool.connection() as conn:
+        cursor = conn.execute('''
+            SELECT r.id, r.name, r.description, r.cooking_time, i.name, i.unit, ri.quantity
+            FROM Recipes r
+            LEFT JOIN Recipe_Ingredients ri ON ri.recipe_id = r.id
+            LEFT JOIN Ingredients i ON i.id = ri.ingredient_id
+            ORDER BY r.id
+        ''')
+        for _, group in itertools.groupby(cursor, key=lambda row: row[0]):
+            rows = list(group)
+            _, name, description, cooking_time = rows[0][:4]
+            yield {
+                'name': name,
+                'description': description,
+                'cooking_time': cooking_time,
+                'ingredients': [
+                    {'name': ingredient, 'unit': unit, 'quantity': quantity}
+                    for *_, ingredient, unit, quantity in rows if ingredient is not None
+                ],
+            }
+
+
+def import_file(db_manager, path, batch_size=1000):
+    """Импорт файла .jsonl или .csv"""
+    reader = read_csv if path.lower().endswith('.csv') else read_jsonl
+    return RecipeImporter(db_manager, batch_size).import_recipes(reader(path))
+
+
+def export_file(db_manager, path):
+    """Экспорт всех рецептов в файл .jsonl или .csv"""
+    start = time.perf_counter()
+    writer = write_csv if path.lower().endswith('.csv') else write_jsonl
+    count = writer(iter_recipes(db_manager), path)
+    seconds = time.perf_counter() - start
+    logger.info("Экспортировано рецептов: %d (%.0f рецептов/с)", count, count / seconds if seconds else 0)
+    return count
+
+
+def main():
+    from db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Импорт и экспорт рецептов')
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('path', help='файл .jsonl или .csv')
+    parser.add_argument('--db', help='путь к базе данных')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(args.db)
+    try:
+        if args.command == 'import':
+            stats = import_file(db_manager, args.path, args.batch_size)
+            print(f"✅ Импортировано рецептов: {stats['recipes']}, новых ингредиентов: "
+                  f"{stats['ingredients']}, связей: {stats['links']} "
+                  f"({stats['rows_per_second']:.0f} строк/с)")
+            if stats['skipped']:
+                print(f"⚠️ Пропущено рецептов с несовместимыми единицами: {stats['skipped']}")
+        else:
+            count = export_file(db_manager, args.path)
+            print(f"✅ Экспортировано рецептов: {count}")
+    finally:
+        db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+import bisect
+from array import array
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from changes import CREATED, DELETED, UPDATED
+
+
+class RecipeListModel(QAbstractTableModel):
+    """Модель списка рецептов с подгрузкой страниц по мере прокрутки.
+
+    С db_worker названия изменённых рецептов (apply_changes) читаются в
+    фоновом потоке, а строки обновляются в callback.
+    """
+
+    HEADERS = ["Название"]
+
+    def __init__(self, db_manager, page_size=200, parent=None, db_worker=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.db_worker = db_worker
+        self.page_size = page_size
+        self._names_key = ('recipe_names', id(self))
+        # Изменённые рецепты, чьи названия ещё не пришли из фонового потока
+        self._pending = set()
+        # Компактное хранение: идентификаторы в массиве, названия в списке
+        self._ids = array('q')
+        self._names = []
+        self._exhausted = False
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._names[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return self._ids[index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Загрузка следующей страницы, продолжая с последней строки"""
+        if parent.isValid() or self._exhausted:
+            return
+        after = (self._ids[-1], self._names[-1]) if self._ids else None
+        page = self.db_manager.get_recipes_page(after, self.page_size)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+
+        first = len(self._ids)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        for recipe_id, name in page:
+            self._ids.append(recipe_id)
+            self._names.append(name)
+        self.endInsertRows()
+
+    def recipe_id(self, row):
+        """ID рецепта в строке"""
+        return self._ids[row]
+
+    def refresh(self):
+        """Сброс модели и загрузка первой страницы заново"""
+        if self.db_worker is not None:
+            self.db_worker.cancel(self._names_key)
+        self._pending.clear()
+        self.beginResetModel()
+        self._ids = array('q')
+        self._names = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def apply_changes(self, changes):
+        """Точечное обновление по ChangeSet (сигнал ChangeHub.recipes_changed)"""
+        if changes.reset:
+            self.refresh()
+            return
+        for recipe_id in changes.ids('recipes', DELETED):
+            self._pending.discard(recipe_id)
+            self._remove(recipe_id)
+        changed = changes.ids('recipes', CREATED, UPDATED)
+        if not changed:
+            return
+        if self.db_worker is None:
+            self._apply_names(self.db_manager.get_recipe_names(changed))
+            return
+        # Новый запрос отменяет предыдущий, поэтому читает названия всех
+        # ещё не обновлённых рецептов, а не только из этого ChangeSet
+        self._pending.update(changed)
+        self.db_worker.get_recipe_names(list(self._pending), key=self._names_key,
+                                        callback=self._apply_pending)
+
+    def _apply_pending(self, rows):
+        # Рецепты, удалённые после запроса, уже убраны из _pending
+        self._apply_names([row for row in rows if row[0] in self._pending])
+        self._pending.clear()
+
+    def _apply_names(self, rows):
+        for recipe_id, name in rows:
+            self._upsert(recipe_id, name)
+
+    def _row_of(self, recipe_id):
+        try:
+            return self._ids.index(recipe_id)
+        except ValueError:
+            return -1
+
+    def _remove(self, recipe_id):
+        row = self._row_of(recipe_id)
+        if row >= 0:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._ids[row]
+            del self._names[row]
+            self.endRemoveRows()
+
+    def _upsert(self, recipe_id, name):
+        """Строка рецепта на своём месте в порядке (название, id)"""
+        row = self._row_of(recipe_id)
+        if row >= 0 and self._names[row] == name:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+            return
+        self._remove(recipe_id)
+        target = bisect.bisect_left(range(len(self._ids)), (name, recipe_id),
+                                    key=lambda i: (self._names[i], self._ids[i]))
+        if target == len(self._ids) and not self._exhausted:
+            # Место за последней загруженной страницей: придёт с fetchMore
+            return
+        self.beginInsertRows(QModelIndex(), target, target)
+        self._ids.insert(target, recipe_id)
+        self._names.insert(target, name)
+        self.endInsertRows()
\ No newline at end of file
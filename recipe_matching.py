@@ -0,0 +1,172 @@
+import bisect
+import threading
+from array import array
+from collections import Counter
+from itertools import compress
+from operator import sub
+
+
+class PantryIndex:
+    """Обратный индекс «ингредиент → рецепты» для подбора по продуктам.
+
+    Для каждого ингредиента хранится отсортированный массив ID рецептов,
+    для каждого рецепта — массив его ингредиентов. Подсчёт совпадений и
+    отбор кандидатов выполняются встроенными функциями (Counter, map,
+    compress) без цикла Python по каждой связи, поэтому ответ на миллионе
+    связей укладывается в миллисекунды. Индекс обновляется точечно при
+    изменении связей (add_link, remove_recipe и т. д.).
+    """
+
+    def __init__(self):
+        self._recipes_by_ingredient = {}   # ingredient_id -> array('q') ID рецептов по возрастанию
+        self._ingredients_of = {}          # recipe_id -> array('q') ID ингредиентов
+        # Число ингредиентов по ID рецепта: плотный массив читается
+        # заметно быстрее словаря при десятках тысяч кандидатов
+        self._sizes = array('H')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_connection(cls, conn):
+        """Построение индекса одним проходом по Recipe_Ingredients"""
+        index = cls()
+        # Порядок (ingredient_id, recipe_id) совпадает с индексом
+        # idx_recipe_ingredients_ingredient, поэтому сортировка не нужна
+        cursor = conn.execute('''
+            SELECT ingredient_id, recipe_id FROM Recipe_Ingredients
+            ORDER BY ingredient_id, recipe_id
+        ''')
+        postings = index._recipes_by_ingredient
+        forward = index._ingredients_of
+        for ingredient_id, recipe_id in cursor:
+            recipes = postings.get(ingredient_id)
+            if recipes is None:
+                recipes = postings[ingredient_id] = array('q')
+            recipes.append(recipe_id)
+            ingredients = forward.get(recipe_id)
+            if ingredients is None:
+                ingredients = forward[recipe_id] = array('q')
+            ingredients.append(ingredient_id)
+        for recipe_id, ingredients in forward.items():
+            index._set_size(recipe_id, len(ingredients))
+        return index
+
+    def __len__(self):
+        """Число связей рецепт — ингредиент"""
+        return sum(map(len, self._ingredients_of.values()))
+
+    def add_link(self, recipe_id, ingredient_id):
+        with self._lock:
+            self._add(recipe_id, ingredient_id)
+
+    def add_links(self, links):
+        """Добавление пар (recipe_id, ingredient_id)"""
+        with self._lock:
+            for recipe_id, ingredient_id in links:
+                self._add(recipe_id, ingredient_id)
+
+    def _add(self, recipe_id, ingredient_id):
+        recipes = self._recipes_by_ingredient.setdefault(ingredient_id, array('q'))
+        position = bisect.bisect_left(recipes, recipe_id)
+        if position < len(recipes) and recipes[position] == recipe_id:
+            return
+        recipes.insert(position, recipe_id)
+        ingredients = self._ingredients_of.setdefault(recipe_id, array('q'))
+        ingredients.append(ingredient_id)
+        self._set_size(recipe_id, len(ingredients))
+
+    def _set_size(self, recipe_id, size):
+        if recipe_id >= len(self._sizes):
+            self._sizes.extend(bytes(2 * (recipe_id + 1 - len(self._sizes))))
+        self._sizes[recipe_id] = size
+
+    def remove_link(self, recipe_id, ingredient_id):
+        with self._lock:
+            self._remove(recipe_id, ingredient_id)
+            ingredients = self._ingredients_of.get(recipe_id)
+            if ingredients is not None and ingredient_id in ingredients:
+                ingredients.remove(ingredient_id)
+                self._set_size(recipe_id, len(ingredients))
+                if not ingredients:
+                    del self._ingredients_of[recipe_id]
+
+    def _remove(self, recipe_id, ingredient_id):
+        recipes = self._recipes_by_ingredient.get(ingredient_id)
+        if recipes is None:
+            return
+        position = bisect.bisect_left(recipes, recipe_id)
+        if position < len(recipes) and recipes[position] == recipe_id:
+            del recipes[position]
+            if not recipes:
+                del self._recipes_by_ingredient[ingredient_id]
+
+    def remove_recipe(self, recipe_id):
+        """Удаление всех связей рецепта"""
+        with self._lock:
+            for ingredient_id in self._ingredients_of.pop(recipe_id, ()):
+                self._remove(recipe_id, ingredient_id)
+            if recipe_id < len(self._sizes):
+                self._sizes[recipe_id] = 0
+
+    def set_recipe(self, recipe_id, ingredient_ids):
+        """Замена набора ингредиентов рецепта"""
+        with self._lock:
+            for ingredient_id in self._ingredients_of.pop(recipe_id, ()):
+                self._remove(recipe_id, ingredient_id)
+            if recipe_id < len(self._sizes):
+                self._sizes[recipe_id] = 0
+            for ingredient_id in ingredient_ids:
+                self._add(recipe_id, ingredient_id)
+
+    def match(self, available, limit=50, max_missing=None):
+        """Рецепты, которые можно приготовить из имеющихся ингредиентов.
+
+        available — ID имеющихся ингредиентов. Результат упорядочен по
+        числу недостающих ингредиентов, затем по доле имеющихся (при равном
+        числе недостающих она растёт вместе с числом совпавших), затем по ID.
+        Возвращает список (recipe_id, совпало, всего, не хватает).
+        """
+        available = set(available)
+        with self._lock:
+            hits = Counter()
+            for ingredient_id in available:
+                recipes = self._recipes_by_ingredient.get(ingredient_id)
+                if recipes is not None:
+                    hits.update(recipes)
+            if not hits:
+                return []
+
+            recipe_ids = list(hits.keys())
+            matched = list(hits.values())
+            totals = list(map(self._sizes.__getitem__, recipe_ids))
+
+        # Код порядка одним числом: missing * width - matched
+        width = len(available) + 1
+        missing = list(map(sub, totals, matched))
+        codes = list(map(sub, map(width.__mul__, missing), matched))
+
+        # Порог — код, на котором набирается limit рецептов
+        ceiling = None if max_missing is None else max_missing * width
+        threshold, taken = None, 0
+        for code, count in sorted(Counter(codes).items()):
+            if ceiling is not None and code >= ceiling:
+                break
+            threshold = code
+            taken += count
+            if taken >= limit:
+                break
+        if threshold is None:
+            return []
+
+        # Всё, что строго лучше порога, плюс нужное число рецептов с кодом
+        # порога (по возрастанию ID); у них одинаковые совпавшие и недостающие
+        selected = [(codes[i], recipe_ids[i], matched[i], totals[i], missing[i])
+                    for i in compress(range(len(codes)), map(threshold.__gt__, codes))]
+        selected.sort()
+        result = [item[1:] for item in selected]
+
+        boundary_missing = -(-threshold // width)
+        boundary_matched = boundary_missing * width - threshold
+        boundary = sorted(compress(recipe_ids, map(threshold.__eq__, codes)))
+        result.extend((recipe_id, boundary_matched, boundary_matched + boundary_missing, boundary_missing)
+                      for recipe_id in boundary[:limit - len(result)])
+        return result
\ No newline at end of file
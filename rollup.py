@@ -0,0 +1,158 @@
+import threading
+from array import array
+from itertools import compress
+from operator import mul, ne
+
+try:
+    import numpy as np
+except ImportError:
+    # Без NumPy те же вычисления выполняются над array через map
+    np = None
+
+# Свойства ингредиентов в таблице Ingredient_Attributes
+ATTRIBUTES = ('calories', 'protein', 'fat', 'carbs', 'price')
+
+
+class RollupEngine:
+    """Матрица «рецепт × ингредиент» в компактном виде (CSR) для сводных расчётов.
+
+    Связи рецептов с ингредиентами хранятся тремя массивами, упорядоченными
+    по рецепту: номера ингредиентов, количества и границы строк (indptr).
+    Итог по свойству для всех рецептов сразу — это произведение количеств
+    на значения свойства и суммы по строкам; с NumPy это np.add.reduceat,
+    без него — sum по срезу каждой строки. Итоги кэшируются до
+    перезагрузки свойств (load_attributes) или всей матрицы.
+    """
+
+    FETCH_SIZE = 10_000
+
+    def __init__(self):
+        self.recipe_ids = array('q')       # ID рецепта строки
+        self.indptr = array('q', [0])      # строка i — связи indptr[i]:indptr[i + 1]
+        self.columns = array('q')          # номер ингредиента (столбец) связи
+        self.quantities = array('d')       # количество в связи
+        self.ingredient_ids = array('q')   # ID ингредиента столбца
+        self._row_of = {}                  # recipe_id -> строка
+        self._column_of = {}               # ingredient_id -> столбец
+        self._attributes = {}              # свойство -> array('d') значений на единицу
+        self._totals = {}                  # свойство -> array('d') итогов по строкам
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_connection(cls, conn):
+        """Загрузка матрицы и свойств ингредиентов одним проходом"""
+        engine = cls()
+        for (ingredient_id,) in conn.execute('SELECT id FROM Ingredients ORDER BY id'):
+            engine._column_of[ingredient_id] = len(engine.ingredient_ids)
+            engine.ingredient_ids.append(ingredient_id)
+
+        # Порядок совпадает с индексом idx_recipe_ingredients_recipe. Строки
+        # читаются пачками: кортежи живут недолго и не нагружают сборщик мусора
+        cursor = conn.execute('''
+            SELECT recipe_id, ingredient_id, IFNULL(quantity, 0.0) FROM Recipe_Ingredients
+            ORDER BY recipe_id, ingredient_id
+        ''')
+        recipes = array('q')
+        while True:
+            rows = cursor.fetchmany(cls.FETCH_SIZE)
+            if not rows:
+                break
+            recipe_column, ingredient_column, quantity_column = zip(*rows)
+            recipes.extend(recipe_column)
+            engine.columns.extend(map(engine._column_of.__getitem__, ingredient_column))
+            engine.quantities.extend(quantity_column)
+
+        if recipes:
+            # Строка начинается там, где меняется recipe_id
+            engine.indptr.extend(compress(range(1, len(recipes)), map(ne, recipes[1:], recipes[:-1])))
+            engine.recipe_ids = array('q', map(recipes.__getitem__, engine.indptr))
+            engine.indptr.append(len(recipes))
+            engine._row_of = dict(zip(engine.recipe_ids, range(len(engine.recipe_ids))))
+
+        engine.load_attributes(conn)
+        return engine
+
+    def load_attributes(self, conn):
+        """Перечитывание свойств ингредиентов (матрица связей не меняется)"""
+        attributes = {name: array('d', bytes(8 * len(self.ingredient_ids))) for name in ATTRIBUTES}
+        cursor = conn.execute(f'''
+            SELECT ingredient_id, per_quantity, {', '.join(ATTRIBUTES)}
+            FROM Ingredient_Attributes
+        ''')
+        for ingredient_id, per_quantity, *values in cursor:
+            column = self._column_of.get(ingredient_id)
+            if column is None or not per_quantity:
+                continue
+            for name, value in zip(ATTRIBUTES, values):
+                if value is not None:
+                    attributes[name][column] = value / per_quantity
+        with self._lock:
+            self._attributes = attributes
+            self._totals = {}
+
+    def remove_recipe(self, recipe_id):
+        """Исключение удалённого рецепта; итоги остальных строк не меняются"""
+        self._row_of.pop(recipe_id, None)
+
+    def totals(self, attribute):
+        """Итог свойства по каждому рецепту (array('d') в порядке recipe_ids)"""
+        with self._lock:
+            totals = self._totals.get(attribute)
+            if totals is None:
+                totals = self._totals[attribute] = self._compute(self._attributes[attribute])
+            return totals
+
+    def _compute(self, values):
+        if not self.recipe_ids:
+            return array('d')
+        if np is not None:
+            # frombuffer не копирует данные массивов
+            columns = np.frombuffer(self.columns, dtype=np.int64)
+            weights = np.frombuffer(self.quantities, dtype=np.float64) * np.frombuffer(values)[columns]
+            starts = np.frombuffer(self.indptr, dtype=np.int64)[:-1]
+            return array('d', np.add.reduceat(weights, starts).tobytes())
+
+        # Чтение из списка быстрее, чем из array. Каждая строка суммируется
+        # отдельно: разность префиксных сумм всего каталога теряла бы
+        # точность на небольших рецептах
+        weights = list(map(mul, self.quantities, map(values.tolist().__getitem__, self.columns)))
+        rows = map(slice, self.indptr[:-1], self.indptr[1:])
+        return array('d', map(sum, map(weights.__getitem__, rows)))
+
+    def recipe_totals(self, recipe_ids, attributes=ATTRIBUTES):
+        """Свойства рецептов: {recipe_id: {свойство: итог}}.
+
+        Рецепт без ингредиентов получает нули.
+        """
+        columns = {name: self.totals(name) for name in attributes}
+        result = {}
+        for recipe_id in recipe_ids:
+            row = self._row_of.get(recipe_id)
+            result[recipe_id] = {name: 0.0 if row is None else totals[row]
+                                 for name, totals in columns.items()}
+        return result
+
+    def plan_totals(self, plan, attributes=ATTRIBUTES):
+        """Итоги плана питания: plan — {recipe_id: множитель порций}"""
+        columns = {name: self.totals(name) for name in attributes}
+        rows = [(self._row_of[recipe_id], factor)
+                for recipe_id, factor in plan.items() if recipe_id in self._row_of]
+        return {name: sum(totals[row] * factor for row, factor in rows)
+                for name, totals in columns.items()}
+
+    def scaled_quantities(self, plan):
+        """Количество каждого ингредиента для плана: {ingredient_id: количество}.
+
+        plan — {recipe_id: множитель}; для одного рецепта это его
+        масштабирование на нужное число порций.
+        """
+        totals = {}
+        for recipe_id, factor in plan.items():
+            row = self._row_of.get(recipe_id)
+            if row is None:
+                continue
+            start, end = self.indptr[row], self.indptr[row + 1]
+            for column, quantity in zip(self.columns[start:end], self.quantities[start:end]):
+                ingredient_id = self.ingredient_ids[column]
+                totals[ingredient_id] = totals.get(ingredient_id, 0.0) + quantity * factor
+        return totals
\ No newline at end of file
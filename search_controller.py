@@ -0,0 +1,198 @@
+import logging
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from search_index import build_match_query
+
+logger = logging.getLogger('cookbook.search')
+
+
+def normalize_term(search_term):
+    """Слова запроса в том виде, в каком их сравнивает индекс"""
+    folded = search_term.replace('ё', 'е').replace('Ё', 'Е').lower()
+    return tuple(re.findall(r'\w+', folded))
+
+
+def extends(tokens, previous):
+    """Каждое слово previous — префикс слова tokens на том же месте.
+
+    Тогда результаты tokens — подмножество результатов previous:
+    «бор» → «борщ», «борщ» → «борщ с».
+    """
+    return (len(tokens) >= len(previous)
+            and all(token.startswith(old) for token, old in zip(tokens, previous)))
+
+
+def matches(tokens, words):
+    """Совпадение как в префиксном запросе FTS5: каждое слово — префикс одного из words"""
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+def fetch_matches(conn, search_term, limit):
+    """Рецепты по запросу с текстом индекса для уточнения в памяти.
+
+    Возвращает список (id, название, слова рецепта) в порядке bm25.
+    """
+    rows = conn.execute('''
+        SELECT r.id, r.name, f.name || ' ' || IFNULL(f.description, '') || ' ' || IFNULL(f.ingredients, '')
+        FROM Recipes_FTS f
+        JOIN Recipes r ON r.id = f.rowid
+        WHERE Recipes_FTS MATCH ?
+        ORDER BY bm25(Recipes_FTS, 10.0, 1.0, 3.0)
+        LIMIT ?
+    ''', (build_match_query(search_term), limit)).fetchall()
+    return [(recipe_id, name, frozenset(re.findall(r'\w+', text.lower())))
+            for recipe_id, name, text in rows]
+
+
+class SearchController:
+    """Поиск по мере ввода: задержка, отмена, уточнение и кэш результатов.
+
+    set_term() вызывается на каждое нажатие клавиши. Запрос выполняется,
+    только когда ввод замер на delay секунд. Если новый запрос продолжает
+    предыдущий (дописаны буквы или слова), а предыдущий результат полный,
+    результат уточняется в памяти без обращения к базе (порядок bm25
+    остаётся от предыдущего запроса). Выполняющийся
+    запрос к устаревшему тексту прерывается через Connection.interrupt().
+    callback(term, [(id, название)]) вызывается через dispatcher, как
+    в DatabaseWorker (для Qt — QtDispatcher).
+
+    Без FTS5 запросы идут в DatabaseManager.search_recipes без уточнения.
+    """
+
+    def __init__(self, db_manager, callback, dispatcher=None, delay=0.15,
+                 limit=50, fetch_limit=5000, cache_size=64):
+        self.db_manager = db_manager
+        self.callback = callback
+        self._dispatch = dispatcher or (lambda func: func())
+        self.delay = delay
+        self.limit = limit
+        self.fetch_limit = fetch_limit
+        self.cache_size = cache_size
+        # Отдельный поток со своим соединением: interrupt() не задевает
+        # запросы DatabaseWorker
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-search')
+        # RLock: callback без dispatcher выполняется под блокировкой
+        # и может сразу вызвать set_term()
+        self._lock = threading.RLock()
+        self._timer = None
+        self._generation = 0
+        self._running = None         # поколение выполняющегося запроса
+        self._conn = None
+        self._cache = OrderedDict()  # слова запроса -> (результаты, полный ли)
+        self._last = None            # (слова, результаты) последнего полного ответа
+        self.stats = {'keystrokes': 0, 'queries': 0, 'refined': 0,
+                      'cache_hits': 0, 'interrupted': 0}
+
+    def set_term(self, search_term):
+        """Новый текст поля поиска"""
+        with self._lock:
+            self.stats['keystrokes'] += 1
+            self._generation += 1
+            generation = self._generation
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._start, (search_term, generation))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self, search_term):
+        """Поиск без задержки (например, по Enter)"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._start(search_term, generation)
+
+    def _start(self, search_term, generation):
+        tokens = normalize_term(search_term)
+        with self._lock:
+            if generation != self._generation:
+                return
+            if not tokens:
+                return self._deliver(search_term, [], generation)
+
+            cached = self._cache.get(tokens)
+            if cached is not None:
+                self._cache.move_to_end(tokens)
+                self.stats['cache_hits'] += 1
+                return self._deliver(search_term, cached[0], generation)
+
+            if self._last is not None and extends(tokens, self._last[0]):
+                results = [row for row in self._last[1] if matches(tokens, row[2])]
+                self.stats['refined'] += 1
+                self._remember(tokens, results, True)
+                return self._deliver(search_term, results, generation)
+
+            # Устаревший запрос больше не нужен
+            if self._running is not None and self._conn is not None:
+                self._conn.interrupt()
+                self.stats['interrupted'] += 1
+            self.stats['queries'] += 1
+        self._executor.submit(self._query, search_term, tokens, generation)
+
+    def _query(self, search_term, tokens, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._running = generation
+        try:
+            if not self.db_manager.fts_enabled:
+                results = [(recipe_id, name, None) for recipe_id, name
+                           in self.db_manager.search_recipes(search_term, self.limit)]
+                complete = False
+            else:
+                self._conn = self.db_manager.pool.get()
+                results = fetch_matches(self._conn, search_term, self.fetch_limit)
+                complete = len(results) < self.fetch_limit
+        except sqlite3.OperationalError as e:
+            if 'interrupt' not in str(e):
+                logger.error("Ошибка поиска рецептов: %s", e)
+            return
+        finally:
+            with self._lock:
+                self._running = None
+
+        with self._lock:
+            self._remember(tokens, results, complete)
+            self._deliver(search_term, results, generation)
+
+    def _remember(self, tokens, results, complete):
+        """Кэш последних запросов; полный результат годится для уточнения"""
+        self._cache[tokens] = (results, complete)
+        self._cache.move_to_end(tokens)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        if complete:
+            self._last = (tokens, results)
+
+    def _deliver(self, search_term, results, generation):
+        if generation != self._generation:
+            return
+        rows = [(recipe_id, name) for recipe_id, name, _ in results[:self.limit]]
+
+        def deliver():
+            # Пока ответ шёл в GUI-поток, пользователь мог продолжить ввод
+            if generation == self._generation:
+                self.callback(search_term, rows)
+        self._dispatch(deliver)
+
+    def invalidate(self, changes=None):
+        """Сброс кэша после изменения рецептов (слот ChangeHub.recipes_changed)"""
+        with self._lock:
+            self._cache.clear()
+            self._last = None
+
+    def shutdown(self):
+        with self._lock:
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._running is not None and self._conn is not None:
+                self._conn.interrupt()
+        self._executor.shutdown(wait=True, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import re
+import sqlite3
+
+# unicode61 приводит к нижнему регистру и кириллицу, но не отождествляет «ё» и «е»,
+# поэтому эту замену делаем сами — и при индексации, и в запросе
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def fold(sql_expr):
+    """SQL-выражение с заменой «ё» на «е»"""
+    return f"replace(replace({sql_expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _ingredients_expr(recipe_id_expr):
+    """SQL-подзапрос: названия ингредиентов рецепта одной строкой"""
+    return f'''(
+        SELECT {fold("group_concat(i.name, ' ')")}
+        FROM Recipe_Ingredients ri
+        JOIN Ingredients i ON i.id = ri.ingredient_id
+        WHERE ri.recipe_id = {recipe_id_expr}
+    )'''
+
+
+def _insert_row(prefix):
+    """SQL вставки строки индекса для рецепта из NEW/OLD"""
+    return f'''
+        INSERT INTO Recipes_FTS (rowid, name, description, ingredients)
+        VALUES ({prefix}.id, {fold(prefix + '.name')}, {fold(prefix + '.description')},
+                {_ingredients_expr(prefix + '.id')});
+    '''
+
+
+def _refresh_ingredients(recipe_id_expr):
+    """SQL обновления колонки ингредиентов в индексе"""
+    return f'''
+        UPDATE Recipes_FTS SET ingredients = {_ingredients_expr('Recipes_FTS.rowid')}
+        WHERE rowid = {recipe_id_expr};
+    '''
+
+
+def create_search_index(cursor):
+    """Создание полнотекстового индекса рецептов и триггеров синхронизации.
+
+    Возвращает False, если SQLite собран без FTS5.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'Recipes_FTS'")
+    exists = cursor.fetchone() is not None
+
+    try:
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS Recipes_FTS USING fts5(
+                name, description, ingredients,
+                tokenize = "{TOKENIZER}",
+                prefix = '2 3'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return False
+
+    # executescript() неявно фиксирует транзакцию, поэтому триггеры создаём по одному
+    triggers = [f'''
+        CREATE TRIGGER IF NOT EXISTS Recipes_FTS_insert AFTER INSERT ON Recipes BEGIN
+            {_insert_row('new')}
+        END
+    ''', f'''
+        CREATE TRIGGER IF NOT EXISTS Recipes_FTS_update
+        AFTER UPDATE OF name, description ON Recipes BEGIN
+            DELETE FROM Recipes_FTS WHERE rowid = old.id;
+            {_insert_row('new')}
+        END
+    ''', '''
+        CREATE TRIGGER IF NOT EXISTS Recipes_FTS_delete AFTER DELETE ON Recipes BEGIN
+            DELETE FROM Recipes_FTS WHERE rowid = old.id;
+        END
+    ''', f'''
+        CREATE TRIGGER IF NOT EXISTS Recipe_Ingredients_FTS_insert
+        AFTER INSERT ON Recipe_Ingredients BEGIN
+            {_refresh_ingredients('new.recipe_id')}
+        END
+    ''', f'''
+        CREATE TRIGGER IF NOT EXISTS Recipe_Ingredients_FTS_delete
+        AFTER DELETE ON Recipe_Ingredients
+        -- При каскадном удалении рецепта его строки индекса уже нет
+        WHEN EXISTS (SELECT 1 FROM Recipes WHERE id = old.recipe_id) BEGIN
+            {_refresh_ingredients('old.recipe_id')}
+        END
+    ''', f'''
+        CREATE TRIGGER IF NOT EXISTS Recipe_Ingredients_FTS_update
+        AFTER UPDATE ON Recipe_Ingredients BEGIN
+            {_refresh_ingredients('old.recipe_id')}
+            {_refresh_ingredients('new.recipe_id')}
+        END
+    ''', f'''
+        CREATE TRIGGER IF NOT EXISTS Ingredients_FTS_update
+        AFTER UPDATE OF name ON Ingredients BEGIN
+            UPDATE Recipes_FTS SET ingredients = {_ingredients_expr('Recipes_FTS.rowid')}
+            WHERE rowid IN (
+                SELECT recipe_id FROM Recipe_Ingredients WHERE ingredient_id = new.id
+            );
+        END
+    ''']
+    for trigger in triggers:
+        cursor.execute(trigger)
+
+    if not exists:
+        rebuild_search_index(cursor)
+    return True
+
+
+def drop_search_triggers(cursor):
+    """Удаление триггеров синхронизации (например, перед пересозданием таблиц)"""
+    cursor.execute(r"""
+        SELECT name FROM sqlite_master
+        WHERE type = 'trigger' AND name LIKE '%\_FTS\_%' ESCAPE '\'
+    """)
+    for (name,) in cursor.fetchall():
+        cursor.execute(f'DROP TRIGGER {name}')
+
+
+def rebuild_search_index(cursor):
+    """Полная перестройка индекса по текущим данным"""
+    cursor.execute('DELETE FROM Recipes_FTS')
+    cursor.execute(f'''
+        INSERT INTO Recipes_FTS (rowid, name, description, ingredients)
+        SELECT r.id, {fold('r.name')}, {fold('r.description')}, {_ingredients_expr('r.id')}
+        FROM Recipes r
+    ''')
+
+
+def build_match_query(search_term):
+    """Преобразование пользовательского ввода в префиксный запрос FTS5.
+
+    Каждое слово ищется как префикс, поэтому «бор св» находит «Борщ со свёклой».
+    Пустая строка означает, что искать нечего.
+    """
+    folded = search_term.replace('ё', 'е').replace('Ё', 'Е')
+    return ' '.join(f'"{token}"*' for token in re.findall(r'\w+', folded))
\ No newline at end of file
@@ -0,0 +1,457 @@
+"""HTTP/JSON-сервис рецептов для киосков.
+
+Процессы-обработчики делят один слушающий сокет: каждый сам разбирает
+HTTP и читает базу соединениями только для чтения (в режиме WAL читатели
+не мешают писателю и друг другу), поэтому чтение масштабируется по ядрам.
+Запись передаётся через очередь в главный процесс, где её по одной
+выполняет DatabaseManager — писатель у базы всегда один. Кэш рецептов
+в обработчиках сбрасывается по журналу изменений (см. changes.ChangeFeed).
+
+    GET    /recipes?after_id=&after_name=&limit=   страница списка
+    GET    /recipes?ids=1,2,3                      рецепты с ингредиентами
+    GET    /recipes/<id>                           рецепт с ингредиентами
+    GET    /search?q=&limit=                       поиск
+    GET    /match?ingredients=1,2,3&limit=&max_missing=
+    GET    /metrics                                замеры процесса-обработчика
+    POST   /recipes                                новый рецепт
+    PUT    /recipes/<id>                           изменение рецепта
+    DELETE /recipes/<id>                           удаление рецепта
+
+Запуск: python service.py [--db путь] [--host 127.0.0.1] [--port 8080] [--workers N]
+                         [--backup-dir каталог] [--archive-days 30]
+"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import re
+import socket
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from backup import BackupThread
+from changes import ChangeFeed
+from db_manager import DatabaseManager
+from maintenance import MaintenanceThread
+from shopping_archive import ARCHIVE_AFTER_DAYS
+
+logger = logging.getLogger('cookbook.service')
+
+# Методы DatabaseManager, которые обработчики могут передать писателю
+WRITE_METHODS = {'save_recipe_with_ingredients', 'update_recipe', 'delete_recipe'}
+
+MAX_PAGE = 1000
+
+
+class ApiError(Exception):
+    """Ошибка запроса с HTTP-статусом ответа"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(query, name, default=None, minimum=0, maximum=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise ApiError(400, f"Параметр {name} должен быть целым числом")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(400, f"Параметр {name} вне допустимого диапазона")
+    return value
+
+
+def _id_list(query, name):
+    try:
+        return [int(value) for value in ','.join(query.get(name, [])).split(',') if value]
+    except ValueError:
+        raise ApiError(400, f"Параметр {name} — список целых чисел через запятую")
+
+
+def _ingredients_json(ingredients):
+    return [{'name': name, 'unit': unit, 'quantity': quantity}
+            for name, unit, quantity in ingredients]
+
+
+def _is_number(value):
+    # bool — подкласс int, но true/false в JSON — не число
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _recipe_fields(body, partial=False):
+    """Поля рецепта из тела запроса"""
+    if not isinstance(body, dict):
+        raise ApiError(400, "Ожидается JSON-объект")
+    name = body.get('name') or ''
+    description = body.get('description') or ''
+    if not isinstance(name, str) or not isinstance(description, str):
+        raise ApiError(400, "name и description — строки")
+    name = name.strip()
+    if not name and not partial:
+        raise ApiError(400, "Название рецепта не может быть пустым")
+    cooking_time = body.get('cooking_time')
+    if cooking_time is not None and (not _is_number(cooking_time) or cooking_time != int(cooking_time)
+                                     or cooking_time < 0):
+        raise ApiError(400, "cooking_time — целое неотрицательное число минут")
+    ingredients = body.get('ingredients')
+    if ingredients is not None:
+        try:
+            ingredients = [(item['name'], item.get('unit'), item.get('quantity'))
+                           for item in ingredients]
+        except (TypeError, KeyError, AttributeError):
+            raise ApiError(400, "ingredients — список объектов с полями name, unit, quantity")
+        for ingredient_name, unit, quantity in ingredients:
+            if not isinstance(ingredient_name, str) or not ingredient_name.strip():
+                raise ApiError(400, "name ингредиента — непустая строка")
+            if unit is not None and not isinstance(unit, str):
+                raise ApiError(400, f"unit ингредиента «{ingredient_name}» — строка или null")
+            if quantity is not None and not _is_number(quantity):
+                raise ApiError(400, f"quantity ингредиента «{ingredient_name}» — число или null")
+    if cooking_time is not None:
+        cooking_time = int(cooking_time)
+    return name, description, cooking_time, ingredients
+
+
+class RecipeService:
+    """Маршруты API поверх DatabaseManager только для чтения и очереди записи"""
+
+    ROUTES = [
+        ('GET', re.compile(r'/recipes'), 'list_recipes'),
+        ('GET', re.compile(r'/recipes/(\d+)'), 'get_recipe'),
+        ('GET', re.compile(r'/search'), 'search'),
+        ('GET', re.compile(r'/match'), 'match'),
+        ('GET', re.compile(r'/metrics'), 'metrics'),
+        ('POST', re.compile(r'/recipes'), 'create_recipe'),
+        ('PUT', re.compile(r'/recipes/(\d+)'), 'update_recipe'),
+        ('DELETE', re.compile(r'/recipes/(\d+)'), 'delete_recipe'),
+    ]
+
+    def __init__(self, reader, write):
+        self.reader = reader
+        self.write = write
+        self.feed = ChangeFeed(reader, prune_every=None)
+        self._feed_lock = threading.Lock()
+
+    def dispatch(self, method, path, query, body):
+        """Обработка запроса: (статус, JSON-ответ)"""
+        handler, args = None, ()
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.fullmatch(path.rstrip('/') or '/')
+            if match:
+                if route_method == method:
+                    handler, args = getattr(self, name), match.groups()
+                    break
+                handler = handler or False
+        if not handler:
+            raise ApiError(405 if handler is False else 404, "Неизвестный запрос")
+
+        self.refresh()
+        return handler(query, body, *map(int, args))
+
+    def refresh(self):
+        """Сброс кэша и обновление индексов по записям с прошлого запроса"""
+        with self._feed_lock:
+            self.feed.poll()
+
+    def list_recipes(self, query, body):
+        ids = _id_list(query, 'ids')
+        if ids:
+            recipes = self.reader.get_recipes_with_ingredients(ids[:MAX_PAGE])
+            return 200, [{**details, 'ingredients': _ingredients_json(ingredients)}
+                         for details, ingredients in recipes.values()]
+        limit = _int_param(query, 'limit', 200, 1, MAX_PAGE)
+        after_id = _int_param(query, 'after_id')
+        after_name = query.get('after_name')
+        if (after_id is None) != (after_name is None):
+            # Курсор — пара (название, id): без одной из частей страница
+            # начиналась бы сначала, и клиент листал бы по кругу
+            raise ApiError(400, "Параметры after_id и after_name передаются вместе")
+        after = None if after_id is None else (after_id, after_name[0])
+        return 200, [{'id': recipe_id, 'name': name}
+                     for recipe_id, name in self.reader.get_recipes_page(after, limit)]
+
+    def get_recipe(self, query, body, recipe_id):
+        details = self.reader.get_recipe_details(recipe_id)
+        if details is None:
+            raise ApiError(404, f"Рецепт {recipe_id} не найден")
+        return 200, {**details, 'ingredients': _ingredients_json(self.reader.get_ingredients(recipe_id))}
+
+    def search(self, query, body):
+        term = query.get('q', [''])[0]
+        limit = _int_param(query, 'limit', 50, 1, MAX_PAGE)
+        return 200, [{'id': recipe_id, 'name': name}
+                     for recipe_id, name in self.reader.search_recipes(term, limit)]
+
+    def match(self, query, body):
+        ingredient_ids = _id_list(query, 'ingredients')
+        limit = _int_param(query, 'limit', 50, 1, MAX_PAGE)
+        max_missing = _int_param(query, 'max_missing')
+        return 200, [{'id': recipe_id, 'name': name, 'matched': matched,
+                      'total': total, 'missing': missing}
+                     for recipe_id, name, matched, total, missing
+                     in self.reader.match_recipes(ingredient_ids, limit, max_missing)]
+
+    def metrics(self, query, body):
+        return 200, {'pid': os.getpid(), **self.reader.metrics_snapshot()}
+
+    def create_recipe(self, query, body):
+        name, description, cooking_time, ingredients = _recipe_fields(body)
+        recipe_id = self.write('save_recipe_with_ingredients', name, description,
+                               cooking_time, ingredients or [])
+        if recipe_id is None:
+            raise ApiError(500, "Не удалось сохранить рецепт")
+        return 201, {'id': recipe_id}
+
+    def update_recipe(self, query, body, recipe_id):
+        current = self.reader.get_recipe_details(recipe_id)
+        if current is None:
+            raise ApiError(404, f"Рецепт {recipe_id} не найден")
+        name, description, cooking_time, ingredients = _recipe_fields(body, partial=True)
+        name = name or current['name']
+        description = body.get('description', current['description'])
+        cooking_time = current['cooking_time'] if cooking_time is None else cooking_time
+        if ingredients is None:
+            saved = self.write('update_recipe', recipe_id, name, description, cooking_time)
+        else:
+            saved = self.write('save_recipe_with_ingredients', name, description,
+                               cooking_time, ingredients, recipe_id=recipe_id) is not None
+        if not saved:
+            raise ApiError(500, "Не удалось обновить рецепт")
+        return 200, {'id': recipe_id}
+
+    def delete_recipe(self, query, body, recipe_id):
+        if self.reader.get_recipe_details(recipe_id) is None:
+            raise ApiError(404, f"Рецепт {recipe_id} не найден")
+        if not self.write('delete_recipe', recipe_id):
+            raise ApiError(500, "Не удалось удалить рецепт")
+        return 200, {'id': recipe_id}
+
+
+class WriteClient:
+    """Передача записи писателю в главном процессе и ожидание ответа"""
+
+    def __init__(self, worker_id, requests, replies, timeout=30.0):
+        self.worker_id = worker_id
+        self.requests = requests
+        self.replies = replies
+        self.timeout = timeout
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        threading.Thread(target=self._read_replies, name='write-replies', daemon=True).start()
+
+    def __call__(self, method, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        self.requests.put((self.worker_id, request_id, method, args, kwargs))
+        return future.result(self.timeout)
+
+    def _read_replies(self):
+        while True:
+            request_id, error, result = self.replies.get()
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
+
+
+def writer_loop(db_manager, requests, replies):
+    """Единственный писатель: запросы из очереди выполняются по одному"""
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        worker_id, request_id, method, args, kwargs = item
+        try:
+            if method not in WRITE_METHODS:
+                raise ValueError(f"Метод {method} недоступен для записи")
+            reply = (request_id, None, getattr(db_manager, method)(*args, **kwargs))
+        except Exception as e:
+            logger.error("Ошибка записи %s: %s", method, e)
+            reply = (request_id, str(e), None)
+        replies[worker_id].put(reply)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1: соединение киоска переиспользуется между запросами
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят отдельными записями: без TCP_NODELAY ответ
+    # ждал бы отложенного подтверждения клиента (~40 мс)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length)) if length else {}
+            except ValueError:
+                raise ApiError(400, "Тело запроса — не JSON")
+            status, payload = self.server.service.dispatch(
+                self.command, url.path, parse_qs(url.query), body)
+        except ApiError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            logger.error("Ошибка обработки %s %s: %s", self.command, self.path, e)
+            status, payload = 500, {'error': str(e)}
+
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class _WorkerHTTPServer(ThreadingHTTPServer):
+    """HTTP-сервер на уже открытом слушающем сокете главного процесса"""
+
+    daemon_threads = True
+
+    def __init__(self, sock, service):
+        super().__init__(sock.getsockname()[:2], RequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.service = service
+
+    def process_request_thread(self, request, client_address):
+        # Поток живёт, пока открыто HTTP-соединение; вместе с ним
+        # закрывается и его соединение SQLite из пула
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.service.reader.pool.release()
+
+
+def _worker_main(sock, db_path, worker_id, requests, replies):
+    reader = DatabaseManager(db_path, read_only=True)
+    service = RecipeService(reader, WriteClient(worker_id, requests, replies))
+    _WorkerHTTPServer(sock, service).serve_forever()
+
+
+class RecipeServer:
+    """Главный процесс сервиса: слушающий сокет, обработчики и писатель"""
+
+    def __init__(self, db_path=None, host='127.0.0.1', port=8080, workers=None,
+                 maintenance_interval=600.0, backup_dir=None, backup_interval=3600.0,
+                 archive_after_days=ARCHIVE_AFTER_DAYS):
+        self.db_manager = DatabaseManager(db_path)
+        self.db_path = self.db_manager.db_name
+        self.workers = workers or os.cpu_count() or 1
+        self.maintenance_interval = maintenance_interval
+        self.archive_after_days = archive_after_days
+        self.backup_dir = backup_dir
+        self.backup_interval = backup_interval
+        self.socket = socket.create_server((host, port), backlog=128)
+        self.address = self.socket.getsockname()[:2]
+        self._processes = []
+        self._requests = None
+        self._writer = None
+        self._maintenance = None
+        self._backup = None
+
+    @property
+    def url(self):
+        return f"http://{self.address[0]}:{self.address[1]}"
+
+    def start(self):
+        # К этому моменту главный процесс уже открыл соединения SQLite и
+        # запускает потоки, а соединения и блокировки нельзя переносить
+        # через fork: обработчики стартуют чистыми процессами (spawn) и
+        # открывают базу сами
+        context = multiprocessing.get_context('spawn')
+        self._requests = context.Queue()
+        replies = [context.Queue() for _ in range(self.workers)]
+        self._writer = threading.Thread(target=writer_loop, name='db-writer',
+                                        args=(self.db_manager, self._requests, replies))
+        self._writer.start()
+        for worker_id in range(self.workers):
+            process = context.Process(target=_worker_main, name=f'recipe-service-{worker_id}',
+                                      args=(self.socket, self.db_path, worker_id,
+                                            self._requests, replies[worker_id]),
+                                      daemon=True)
+            process.start()
+            self._processes.append(process)
+        if self.maintenance_interval:
+            self._maintenance = MaintenanceThread(self.db_manager, self.maintenance_interval,
+                                                  archive_after_days=self.archive_after_days)
+            self._maintenance.start()
+        if self.backup_dir:
+            self._backup = BackupThread(self.db_manager, self.backup_dir, self.backup_interval)
+            self._backup.start()
+        return self
+
+    def wait(self):
+        for process in self._processes:
+            process.join()
+
+    def stop(self):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        if self._maintenance is not None:
+            self._maintenance.stop()
+        if self._backup is not None:
+            self._backup.stop()
+        if self._requests is not None:
+            self._requests.put(None)
+            self._writer.join()
+        self.socket.close()
+        self.db_manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON-сервис рецептов")
+    parser.add_argument('--db', help="путь к базе (по умолчанию — база приложения)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, help="число процессов-обработчиков (по умолчанию — по числу ядер)")
+    parser.add_argument('--backup-dir', help="каталог резервных копий по расписанию (раз в час)")
+    parser.add_argument('--archive-days', type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="через сколько дней купленные позиции уходят в архив покупок")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    server = RecipeServer(args.db, args.host, args.port, args.workers,
+                          backup_dir=args.backup_dir, archive_after_days=args.archive_days).start()
+    print(f"✅ Сервис рецептов: {server.url} (обработчиков: {server.workers})")
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+import json
+
+# Единица → (базовая единица, множитель). Количества в совместимых единицах
+# пересчитываются в базовую и складываются; прочие единицы остаются как есть
+UNIT_CONVERSIONS = {
+    'г': ('г', 1.0),
+    'гр': ('г', 1.0),
+    'кг': ('г', 1000.0),
+    'мг': ('г', 0.001),
+    'g': ('г', 1.0),
+    'kg': ('г', 1000.0),
+    'мл': ('мл', 1.0),
+    'л': ('мл', 1000.0),
+    'ml': ('мл', 1.0),
+    'l': ('мл', 1000.0),
+    'ст. л.': ('мл', 15.0),
+    'ч. л.': ('мл', 5.0),
+    'стакан': ('мл', 250.0),
+    'шт': ('шт', 1.0),
+    'шт.': ('шт', 1.0),
+    'pcs': ('шт', 1.0),
+}
+
+# Крупные единицы для вывода: 1500 г показываем как 1.5 кг
+DISPLAY_UNITS = {'г': ('кг', 1000.0), 'мл': ('л', 1000.0)}
+
+_UNITS_CTE = 'units(unit, base_unit, factor) AS (VALUES {})'.format(
+    ', '.join('(?, ?, ?)' for _ in UNIT_CONVERSIONS)
+)
+_UNITS_PARAMS = [value for unit, (base, factor) in UNIT_CONVERSIONS.items()
+                 for value in (unit, base, factor)]
+
+
+def normalize_unit(unit):
+    """Единица для записи в базу: без пробелов по краям, известные — в нижнем регистре.
+
+    lower() в SQLite меняет регистр только латиницы, поэтому «КГ» или «Л»
+    не нашлись бы в UNIT_CONVERSIONS запросом — единицы приводятся к
+    ключам таблицы при записи. Незнакомые единицы остаются как есть.
+    """
+    if unit is None:
+        return None
+    unit = unit.strip()
+    key = unit.lower()
+    return key if key in UNIT_CONVERSIONS else unit or None
+
+
+def convert_quantity(quantity, unit, target_unit):
+    """Количество в единицах unit, пересчитанное в target_unit.
+
+    Единицы — уже нормализованные (normalize_unit). Без единицы с одной
+    из сторон количество не меняется. Несовместимые единицы (например,
+    «л» и «г») — ValueError.
+    """
+    if quantity is None or unit is None or target_unit is None or unit == target_unit:
+        return quantity
+    source, target = UNIT_CONVERSIONS.get(unit), UNIT_CONVERSIONS.get(target_unit)
+    if source is None or target is None or source[0] != target[0]:
+        raise ValueError(f"Единица «{unit}» несовместима с «{target_unit}»")
+    return quantity * source[1] / target[1]
+
+
+def format_quantity(quantity, unit):
+    """Количество для отображения, с переходом на крупную единицу"""
+    if quantity is None:
+        return unit or ''
+    if unit in DISPLAY_UNITS and quantity >= DISPLAY_UNITS[unit][1]:
+        unit, factor = DISPLAY_UNITS[unit]
+        quantity /= factor
+    return f"{quantity:g} {unit}" if unit else f"{quantity:g}"
+
+
+def aggregate_recipes(conn, recipes):
+    """Сводный список ингредиентов для набора рецептов.
+
+    recipes — словарь {recipe_id: множитель порций} или список ID (множитель 1).
+    Весь подсчёт делает один сгруппированный запрос; набор рецептов
+    передаётся одним JSON-параметром, поэтому размер не ограничен числом
+    параметров SQLite. Возвращает список (ингредиент, количество, единица).
+    """
+    if not isinstance(recipes, dict):
+        recipes = dict.fromkeys(recipes, 1.0)
+    plan = json.dumps({str(recipe_id): servings for recipe_id, servings in recipes.items()})
+
+    cursor = conn.execute(f'''
+        WITH {_UNITS_CTE},
+        plan(recipe_id, servings) AS (
+            SELECT CAST(key AS INTEGER), value FROM json_each(?)
+        )
+        SELECT i.name,
+               SUM(ri.quantity * p.servings * COALESCE(u.factor, 1)) AS total,
+               COALESCE(u.base_unit, i.unit) AS unit
+        FROM plan p
+        JOIN Recipe_Ingredients ri ON ri.recipe_id = p.recipe_id
+        JOIN Ingredients i ON i.id = ri.ingredient_id
+        LEFT JOIN units u ON u.unit = lower(trim(i.unit))
+        GROUP BY i.name, COALESCE(u.base_unit, i.unit)
+        ORDER BY i.name
+    ''', _UNITS_PARAMS + [plan])
+    return cursor.fetchall()
+
+
+def aggregate_shopping_list(conn, include_purchased=False):
+    """Сводка таблицы Shopping_List: одна строка на ингредиент и единицу"""
+    cursor = conn.execute(f'''
+        WITH {_UNITS_CTE}
+        SELECT i.name,
+               SUM(sl.quantity * COALESCE(u.factor, 1)) AS total,
+               COALESCE(u.base_unit, sl.unit) AS unit
+        FROM Shopping_List sl
+        JOIN Ingredients i ON i.id = sl.ingredient_id
+        LEFT JOIN units u ON u.unit = lower(trim(sl.unit))
+        WHERE sl.purchased = 0 OR ?
+        GROUP BY i.name, COALESCE(u.base_unit, sl.unit)
+        ORDER BY i.name
+    ''', _UNITS_PARAMS + [1 if include_purchased else 0])
+    return cursor.fetchall()
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""Архив купленных позиций и история покупок.
+
+Shopping_List — «горячая» таблица: окно списка покупок читает и сортирует
+её целиком при каждом открытии. Купленные позиции старше заданного срока
+переносятся в Shopping_List_Archive небольшими пачками в отдельных
+транзакциях (archive_purchased, запускается MaintenanceThread), поэтому
+горячая таблица остаётся маленькой. История покупок и частота покупок
+ингредиентов читаются из обеих таблиц.
+
+Даты — added_date позиции (время добавления в список): отдельного
+времени покупки в схеме нет.
+"""
+import datetime
+import time
+
+from shopping_aggregation import UNIT_CONVERSIONS
+
+# Купленные позиции старше этого срока (в днях) уходят в архив
+ARCHIVE_AFTER_DAYS = 30
+
+_COLUMNS = 'id, recipe_id, ingredient_id, quantity, unit, added_date'
+
+# Пересчёт в базовые единицы выражением CASE, а не соединением с таблицей
+# единиц, как в сводном списке: история может быть длинной, а соединение
+# перебирает все единицы для каждой позиции
+_UNIT_CASE = 'CASE lower(trim(unit)) {} ELSE {{}} END'.format(
+    ' '.join('WHEN ? THEN ?' for _ in UNIT_CONVERSIONS))
+_BASE_UNIT = _UNIT_CASE.format('unit')
+_FACTOR = _UNIT_CASE.format('1')
+_BASE_UNIT_PARAMS = [value for unit, (base, _) in UNIT_CONVERSIONS.items() for value in (unit, base)]
+_FACTOR_PARAMS = [value for unit, (_, factor) in UNIT_CONVERSIONS.items() for value in (unit, factor)]
+
+
+def archive_purchased(conn, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=1000, pause=0.01):
+    """Перенос купленных позиций старше older_than_days дней в архив.
+
+    Пачка из batch_size самых старых позиций копируется в архив и
+    удаляется из списка в одной транзакции, между пачками — пауза pause
+    секунд, поэтому запись из приложения ждёт не дольше одной пачки.
+    Позиции выбираются по индексу (purchased, added_date). Возвращает
+    число перенесённых позиций.
+    """
+    cutoff = conn.execute("SELECT datetime('now', ?)", (f'-{older_than_days} days',)).fetchone()[0]
+    # Одна и та же выборка для копирования и удаления: порядок однозначен
+    # благодаря id, а между запросами список никто не меняет
+    batch = '''
+        SELECT id FROM Shopping_List
+        WHERE purchased = 1 AND added_date < ?
+        ORDER BY added_date, id
+        LIMIT ?
+    '''
+    moved = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            count = conn.execute(f'''
+                INSERT INTO Shopping_List_Archive ({_COLUMNS})
+                SELECT {_COLUMNS} FROM Shopping_List WHERE id IN ({batch})
+            ''', (cutoff, batch_size)).rowcount
+            conn.execute(f'DELETE FROM Shopping_List WHERE id IN ({batch})', (cutoff, batch_size))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        moved += count
+        if count < batch_size:
+            break
+        time.sleep(pause)
+    return moved
+
+
+def clear_shopping_list(conn):
+    """Очистка списка покупок с сохранением купленных позиций в архиве.
+
+    Подходит и для соединений пула (isolation_level=None), и для обычных:
+    транзакция открывается явно и фиксируется conn.commit().
+    """
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(f'''
+            INSERT INTO Shopping_List_Archive ({_COLUMNS})
+            SELECT {_COLUMNS} FROM Shopping_List WHERE purchased = 1
+        ''')
+        conn.execute('DELETE FROM Shopping_List')
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _date_conditions(start, end, ingredient_id):
+    """Условия на added_date и ингредиент (границы дат включительно)"""
+    conditions, params = [], []
+    if start is not None:
+        conditions.append('added_date >= ?')
+        params.append(str(start))
+    if end is not None:
+        # Конец периода — целый день: '2024-05-31' включает 31 мая
+        conditions.append("added_date < date(?, '+1 day')")
+        params.append(str(end))
+    if ingredient_id is not None:
+        conditions.append('ingredient_id = ?')
+        params.append(ingredient_id)
+    return ''.join(f' AND {condition}' for condition in conditions), params
+
+
+def _purchases(start, end, ingredient_id, columns):
+    """Подзапрос купленных позиций из списка и архива за период"""
+    condition, params = _date_conditions(start, end, ingredient_id)
+    query = f'''
+        SELECT {columns} FROM Shopping_List WHERE purchased = 1{condition}
+        UNION ALL
+        SELECT {columns} FROM Shopping_List_Archive WHERE 1{condition}
+    '''
+    return query, params + params
+
+
+def purchase_history(conn, start=None, end=None, ingredient_id=None, limit=None):
+    """Купленные позиции за период, от новых к старым.
+
+    start и end — даты ('ГГГГ-ММ-ДД', datetime.date или datetime),
+    обе включительно; None — без границы. ingredient_id ограничивает
+    историю одним ингредиентом. Возвращает список (дата добавления,
+    ингредиент, количество, единица, рецепт); рецепт — None, если он
+    удалён.
+    """
+    purchases, params = _purchases(start, end, ingredient_id,
+                                   'added_date, ingredient_id, quantity, unit, recipe_id')
+    query = f'''
+        SELECT p.added_date, i.name, p.quantity, p.unit, r.name
+        FROM ({purchases}) p
+        JOIN Ingredients i ON i.id = p.ingredient_id
+        LEFT JOIN Recipes r ON r.id = p.recipe_id
+        ORDER BY p.added_date DESC
+    '''
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+
+def purchase_frequency(conn, start=None, end=None):
+    """Частота покупок ингредиентов за период.
+
+    Покупкой считается день: позиции одного ингредиента из разных
+    рецептов за один день складываются (в базовых единицах, как в
+    сводном списке). Возвращает список (ID ингредиента, название, число
+    покупок, всего куплено, единица, первая покупка, последняя покупка,
+    средний интервал в днях или None для единственной покупки) — от
+    самых частых к редким.
+    """
+    purchases, params = _purchases(start, end, None, 'ingredient_id, added_date, quantity, unit')
+    # Один проход без промежуточной группировки по дням: дни считает
+    # COUNT(DISTINCT), а интервал — первая и последняя покупка
+    cursor = conn.execute(f'''
+        SELECT p.ingredient_id, i.name, p.purchases, p.total, p.base_unit, p.first, p.last,
+               (julianday(p.last) - julianday(p.first)) / NULLIF(p.purchases - 1, 0)
+        FROM (
+            SELECT ingredient_id, {_BASE_UNIT} AS base_unit,
+                   COUNT(DISTINCT date(added_date)) AS purchases,
+                   SUM(quantity * {_FACTOR}) AS total,
+                   date(MIN(added_date)) AS first, date(MAX(added_date)) AS last
+            FROM ({purchases})
+            GROUP BY ingredient_id, base_unit
+        ) p
+        JOIN Ingredients i ON i.id = p.ingredient_id
+        ORDER BY p.purchases DESC, i.name
+    ''', _BASE_UNIT_PARAMS + _FACTOR_PARAMS + params)
+    return cursor.fetchall()
+
+
+def restock_predictions(conn, horizon_days=7, min_purchases=3, today=None):
+    """Ингредиенты, которые пора купить снова.
+
+    Следующая покупка ожидается через средний интервал после последней;
+    в прогноз попадают ингредиенты, купленные не меньше min_purchases
+    раз, если ожидаемая дата не позже чем через horizon_days дней и
+    ингредиента нет среди некупленных позиций списка. Возвращает список
+    (ID ингредиента, название, ожидаемая дата, обычное количество,
+    единица), от самых срочных.
+    """
+    today = today or datetime.date.today()
+    horizon = today + datetime.timedelta(days=horizon_days)
+    pending = {ingredient_id for (ingredient_id,) in conn.execute(
+        'SELECT DISTINCT ingredient_id FROM Shopping_List WHERE purchased = 0')}
+
+    predictions = []
+    for (ingredient_id, name, purchases, total, unit,
+         first, last, interval) in purchase_frequency(conn):
+        # Для интервала нужны хотя бы две покупки
+        if purchases < max(min_purchases, 2) or ingredient_id in pending:
+            continue
+        expected = datetime.date.fromisoformat(last) + datetime.timedelta(days=round(interval))
+        if expected <= horizon:
+            predictions.append((ingredient_id, name, expected, total / purchases, unit))
+    predictions.sort(key=lambda prediction: (prediction[2], prediction[1]))
+    return predictions
\ No newline at end of file
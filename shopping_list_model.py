@@ -0,0 +1,224 @@
+import bisect
+import json
+
+from PyQt6.QtCore import QAbstractTableModel, QEvent, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+
+class ShoppingListModel(QAbstractTableModel):
+    """Модель списка покупок: изменения применяются к одной строке"""
+
+    # Флажок «куплено» переключён в таблице: запись в базу делает окно
+    purchased_toggled = pyqtSignal(int, bool)
+
+    HEADERS = ["Куплено", "Ингредиент", "Количество", "Рецепт", "Действия"]
+    PURCHASED, INGREDIENT, QUANTITY, RECIPE, ACTIONS = range(5)
+
+    def __init__(self, conn, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        # Строки: [id, ингредиент, количество, единица, рецепт, куплено]
+        self._rows = []
+        self._row_by_id = {}    # id позиции -> строка (тот же список, что в _rows)
+
+    @staticmethod
+    def fetch_rows(conn, item_ids=None, recipe_ids=None):
+        """Запрос списка (можно выполнять в фоновом потоке).
+
+        item_ids или recipe_ids ограничивают запрос позициями с этими ID
+        или из этих рецептов — для точечного обновления модели.
+        """
+        condition, params = '', ()
+        if item_ids is not None:
+            condition, params = 'WHERE sl.id IN (SELECT value FROM json_each(?))', (json.dumps(list(item_ids)),)
+        elif recipe_ids is not None:
+            condition, params = 'WHERE sl.recipe_id IN (SELECT value FROM json_each(?))', (json.dumps(list(recipe_ids)),)
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT sl.id, i.name, sl.quantity, sl.unit, r.name, sl.purchased
+            FROM Shopping_List sl
+            JOIN Ingredients i ON sl.ingredient_id = i.id
+            JOIN Recipes r ON sl.recipe_id = r.id
+            {condition}
+            ORDER BY sl.purchased, i.name
+        ''', params)
+        return cursor.fetchall()
+
+    @staticmethod
+    def write_purchased(conn, item_id, purchased):
+        """Запись отметки о покупке в базу"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE Shopping_List SET purchased = ? WHERE id = ?
+        ''', (1 if purchased else 0, item_id))
+        conn.commit()
+
+    @staticmethod
+    def write_remove(conn, item_id):
+        """Удаление позиции из базы"""
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM Shopping_List WHERE id = ?', (item_id,))
+        conn.commit()
+
+    def load(self):
+        """Полная загрузка списка (при открытии окна и после очистки)"""
+        self.set_rows(self.fetch_rows(self.conn))
+
+    def set_rows(self, rows):
+        """Замена всех строк модели"""
+        self.beginResetModel()
+        self._rows = [list(row) for row in rows]
+        self._row_by_id = {values[0]: values for values in self._rows}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item_id, ingredient_name, quantity, unit, recipe_name, purchased = self._rows[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.INGREDIENT:
+                return ingredient_name
+            if column == self.QUANTITY:
+                return f"{quantity} {unit}" if unit != "по вкусу" else unit
+            if column == self.RECIPE:
+                return recipe_name
+            if column == self.ACTIONS:
+                return "🗑️"
+        elif role == Qt.ItemDataRole.CheckStateRole and column == self.PURCHASED:
+            return Qt.CheckState.Checked if purchased else Qt.CheckState.Unchecked
+        elif role == Qt.ItemDataRole.BackgroundRole and purchased and column != self.ACTIONS:
+            # Визуальное выделение купленных позиций
+            return Qt.GlobalColor.lightGray
+        elif role == Qt.ItemDataRole.UserRole:
+            return item_id
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == self.PURCHASED:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or index.column() != self.PURCHASED:
+            return False
+        item_id = self._rows[index.row()][0]
+        self.purchased_toggled.emit(item_id, Qt.CheckState(value) == Qt.CheckState.Checked)
+        return True
+
+    def _row_of(self, item_id):
+        """Номер строки позиции списка.
+
+        Строки отсортированы по _sort_key, поэтому строка ищется двоичным
+        поиском среди строк с тем же ключом, а не просмотром всего списка.
+        """
+        values = self._row_by_id.get(item_id)
+        if values is None:
+            return -1
+        key = self._sort_key(values)
+        row = bisect.bisect_left(self._rows, key, key=self._sort_key)
+        while row < len(self._rows) and self._sort_key(self._rows[row]) == key:
+            if self._rows[row] is values:
+                return row
+            row += 1
+        # Порядок строк разошёлся с ключом сортировки — ищем просмотром
+        return self._rows.index(values)
+
+    @staticmethod
+    def _sort_key(values):
+        """Порядок как в запросе load(): сначала некупленные, затем по названию"""
+        return (values[5], values[1])
+
+    def set_purchased(self, item_id, purchased):
+        """Отметка о покупке: одна строка в базе и одна строка в модели"""
+        self.write_purchased(self.conn, item_id, purchased)
+        self.apply_purchased(item_id, purchased)
+
+    def apply_purchased(self, item_id, purchased):
+        """Отметка о покупке только в модели"""
+        row = self._row_of(item_id)
+        if row < 0:
+            return
+        values = self._rows[row]
+        values[5] = 1 if purchased else 0
+
+        # Переносим строку на её место в сортировке, не трогая остальные.
+        # target — позиция в списке без этой строки: сначала ищем слева
+        # от неё, затем справа (со сдвигом на саму строку)
+        key = self._sort_key(values)
+        target = bisect.bisect_left(self._rows, key, 0, row, key=self._sort_key)
+        if target == row:
+            target = bisect.bisect_left(self._rows, key, row + 1, key=self._sort_key) - 1
+        if target != row:
+            # beginMoveRows ожидает позицию вставки до удаления строки
+            destination = target + 1 if target > row else target
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+            self._rows.pop(row)
+            self._rows.insert(target, values)
+            self.endMoveRows()
+            row = target
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def apply_rows(self, rows):
+        """Новые и изменённые позиции: каждая встаёт на своё место в сортировке"""
+        for values in rows:
+            values = list(values)
+            row = self._row_of(values[0])
+            if row >= 0:
+                if self._rows[row] == values:
+                    continue
+                self.apply_remove(values[0])
+            target = bisect.bisect_left(self._rows, self._sort_key(values), key=self._sort_key)
+            self.beginInsertRows(QModelIndex(), target, target)
+            self._rows.insert(target, values)
+            self._row_by_id[values[0]] = values
+            self.endInsertRows()
+
+    def remove_item(self, item_id):
+        """Удаление позиции: одна строка в базе и одна строка в модели"""
+        self.write_remove(self.conn, item_id)
+        self.apply_remove(item_id)
+
+    def apply_remove(self, item_id):
+        """Удаление позиции только из модели"""
+        row = self._row_of(item_id)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._row_by_id[self._rows.pop(row)[0]]
+        self.endRemoveRows()
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Кнопка удаления, нарисованная делегатом вместо виджета в каждой строке"""
+
+    delete_requested = pyqtSignal(int)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 2, -4, -2)
+        button.text = index.data()
+        button.state = QStyle.StateFlag.State_Enabled
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and option.rect.contains(event.position().toPoint())):
+            self.delete_requested.emit(index.data(Qt.ItemDataRole.UserRole))
+            return True
+        return super().editorEvent(event, model, option, index)
\ No newline at end of file
@@ -1,19 +1,40 @@
+import logging
+
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QCheckBox, QMessageBox)
-from PyQt6.QtCore import Qt
+                             QPushButton, QTableView,
+                             QHeaderView, QMessageBox)
+
+from change_hub import ChangeHub
+from changes import CREATED, DELETED, UPDATED
+from shopping_aggregation import aggregate_shopping_list, format_quantity
+from shopping_archive import clear_shopping_list
+from shopping_list_model import DeleteButtonDelegate, ShoppingListModel
+
+logger = logging.getLogger('cookbook.ui')
 
 class ShoppingListWindow(QDialog):
     """Окно для просмотра списка покупок"""
     
-    def __init__(self, conn, parent=None):
+    def __init__(self, conn, parent=None, db_worker=None):
         super().__init__(parent)
         self.conn = conn
+        # С db_worker запросы идут в фоновом потоке со своим соединением,
+        # без него — как раньше, через переданное соединение
+        self.db_worker = db_worker
+        self.model = ShoppingListModel(conn, self)
+        self.model.purchased_toggled.connect(self.on_purchased_toggled)
         self.setWindowTitle("🛒 Список покупок")
         self.setGeometry(400, 200, 700, 500)
         
         self.initUI()
         self.load_shopping_list()
+        
+        # Изменения из других окон применяются к отдельным строкам
+        self.change_hub = None
+        if db_worker:
+            self.change_hub = ChangeHub.shared(db_worker.db_manager)
+            self.change_hub.shopping_changed.connect(self.on_shopping_changed)
+            self.change_hub.recipes_changed.connect(self.on_recipes_changed)
     
     def initUI(self):
         """Инициализация интерфейса"""
@@ -24,10 +45,13 @@ class ShoppingListWindow(QDialog):
         title.setStyleSheet("font-size: 16px; font-weight: bold; margin: 10px;")
         layout.addWidget(title)
         
-        # Таблица списка покупок
-        self.shopping_table = QTableWidget()
-        self.shopping_table.setColumnCount(5)
-        self.shopping_table.setHorizontalHeaderLabels(["Куплено", "Ингредиент", "Количество", "Рецепт", "Действия"])
+        # Таблица списка покупок: флажок и кнопка удаления рисуются моделью
+        # и делегатом, а не отдельными виджетами в каждой строке
+        self.shopping_table = QTableView()
+        self.shopping_table.setModel(self.model)
+        self.delete_delegate = DeleteButtonDelegate(self.shopping_table)
+        self.delete_delegate.delete_requested.connect(self.delete_item)
+        self.shopping_table.setItemDelegateForColumn(ShoppingListModel.ACTIONS, self.delete_delegate)
         self.shopping_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         self.shopping_table.setColumnWidth(0, 80)
         self.shopping_table.setColumnWidth(2, 100)
@@ -38,12 +62,16 @@ class ShoppingListWindow(QDialog):
         # Кнопки управления
         buttons_layout = QHBoxLayout()
         
+        self.summary_button = QPushButton("📋 Сводный список")
+        self.summary_button.clicked.connect(self.show_summary)
+        
         self.clear_button = QPushButton("🧹 Очистить список")
         self.clear_button.clicked.connect(self.clear_shopping_list)
         
         self.close_button = QPushButton("Закрыть")
         self.close_button.clicked.connect(self.accept)
         
+        buttons_layout.addWidget(self.summary_button)
         buttons_layout.addWidget(self.clear_button)
         buttons_layout.addWidget(self.close_button)
         layout.addLayout(buttons_layout)
@@ -52,69 +80,79 @@ class ShoppingListWindow(QDialog):
     
     def load_shopping_list(self):
         """Загрузка списка покупок"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT sl.id, i.name, sl.quantity, sl.unit, r.name, sl.purchased
-            FROM Shopping_List sl
-            JOIN Ingredients i ON sl.ingredient_id = i.id
-            JOIN Recipes r ON sl.recipe_id = r.id
-            ORDER BY sl.purchased, i.name
-        ''')
-        
-        items = cursor.fetchall()
-        self.shopping_table.setRowCount(len(items))
-        
-        for row, (item_id, ingredient_name, quantity, unit, recipe_name, purchased) in enumerate(items):
-            # CheckBox для отметки о покупке
-            checkbox = QCheckBox()
-            checkbox.setChecked(bool(purchased))
-            checkbox.stateChanged.connect(lambda state, item_id=item_id: self.toggle_purchased(item_id, state))
-            self.shopping_table.setCellWidget(row, 0, checkbox)
-            
-            # Ингредиент
-            self.shopping_table.setItem(row, 1, QTableWidgetItem(ingredient_name))
-            
-            # Количество
-            quantity_text = f"{quantity} {unit}" if unit != "по вкусу" else unit
-            self.shopping_table.setItem(row, 2, QTableWidgetItem(quantity_text))
-            
-            # Рецепт
-            self.shopping_table.setItem(row, 3, QTableWidgetItem(recipe_name))
-            
-            # Кнопка удаления
-            delete_button = QPushButton("🗑️")
-            delete_button.clicked.connect(lambda checked, item_id=item_id: self.delete_item(item_id))
-            self.shopping_table.setCellWidget(row, 4, delete_button)
-            
-            # Визуальное выделение купленных items
-            if purchased:
-                for col in range(5):
-                    item = self.shopping_table.item(row, col)
-                    if item:
-                        item.setBackground(Qt.GlobalColor.lightGray)
+        if self.db_worker:
+            self.db_worker.run(ShoppingListModel.fetch_rows, key=('shopping_list', id(self)),
+                               callback=self.model.set_rows)
+        else:
+            self.model.load()
+    
+    def on_shopping_changed(self, changes):
+        """Позиции списка добавлены, изменены или удалены"""
+        if changes.reset:
+            self.load_shopping_list()
+            return
+        for item_id in changes.ids('shopping', DELETED):
+            self.model.apply_remove(item_id)
+        changed = changes.ids('shopping', CREATED, UPDATED)
+        if changed:
+            self.db_worker.run(ShoppingListModel.fetch_rows, changed, callback=self.model.apply_rows)
+    
+    def on_recipes_changed(self, changes):
+        """Переименованные рецепты: обновляются только их позиции"""
+        updated = changes.ids('recipes', UPDATED)
+        if updated and not changes.reset:
+            self.db_worker.run(ShoppingListModel.fetch_rows, recipe_ids=updated,
+                               callback=self.model.apply_rows)
+    
+    def on_purchased_toggled(self, item_id, purchased):
+        """Флажок «куплено» переключён в таблице"""
+        self.toggle_purchased(item_id, 2 if purchased else 0)
     
     def toggle_purchased(self, item_id, state):
         """Переключение статуса покупки"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE Shopping_List SET purchased = ? WHERE id = ?
-        ''', (1 if state == 2 else 0, item_id))
-        self.conn.commit()
-        
-        # Обновляем отображение
-        self.load_shopping_list()
+        # Обновляется только строка этой позиции
+        if self.db_worker:
+            self.model.apply_purchased(item_id, state == 2)
+            self.db_worker.run(ShoppingListModel.write_purchased, item_id, state == 2,
+                               errback=self.on_write_error)
+        else:
+            self.model.set_purchased(item_id, state == 2)
     
     def delete_item(self, item_id):
         """Удаление item из списка покупок"""
-        cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM Shopping_List WHERE id = ?', (item_id,))
-        self.conn.commit()
-        
-        self.load_shopping_list()
+        if self.db_worker:
+            self.model.apply_remove(item_id)
+            self.db_worker.run(ShoppingListModel.write_remove, item_id,
+                               errback=self.on_write_error)
+        else:
+            self.model.remove_item(item_id)
         QMessageBox.information(self, "Успех", "Позиция удалена из списка покупок!")
     
+    def on_write_error(self, error):
+        """Ошибка записи в фоне"""
+        # Таблица уже показывает изменение, которого нет в базе
+        logger.error("Ошибка изменения списка покупок: %s", error)
+        self.load_shopping_list()
+        QMessageBox.warning(self, "Ошибка", f"Не удалось изменить список покупок: {error}")
+    
+    def show_summary(self):
+        """Сводный список: одинаковые ингредиенты из разных рецептов объединены"""
+        if self.db_worker:
+            self.db_worker.run(aggregate_shopping_list, callback=self.show_summary_items)
+        else:
+            self.show_summary_items(aggregate_shopping_list(self.conn))
+    
+    def show_summary_items(self, items):
+        """Вывод сводного списка"""
+        if items:
+            summary_text = "\n".join(f"• {name}: {format_quantity(quantity, unit)}"
+                                     for name, quantity, unit in items)
+        else:
+            summary_text = "Все покупки сделаны!"
+        QMessageBox.information(self, "Сводный список покупок", summary_text)
+    
     def clear_shopping_list(self):
-        """Очистка всего списка покупок"""
+        """Очистка всего списка покупок (купленное остаётся в истории покупок)"""
         reply = QMessageBox.question(
             self, 
             "Подтверждение очистки", 
@@ -124,9 +162,18 @@ class ShoppingListWindow(QDialog):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            cursor = self.conn.cursor()
-            cursor.execute('DELETE FROM Shopping_List')
-            self.conn.commit()
-            
-            self.load_shopping_list()
-            QMessageBox.information(self, "Успех", "Список покупок очищен!")
\ No newline at end of file
+            if self.db_worker:
+                # Строки убираются сразу, удаление в базе идёт в фоне
+                self.model.set_rows([])
+                self.db_worker.run(clear_shopping_list, errback=self.on_write_error)
+            else:
+                clear_shopping_list(self.conn)
+                self.load_shopping_list()
+            QMessageBox.information(self, "Успех", "Список покупок очищен!")
+    
+    def done(self, result):
+        """Закрытие окна: уведомления об изменениях больше не нужны"""
+        if self.change_hub is not None:
+            self.change_hub.shopping_changed.disconnect(self.on_shopping_changed)
+            self.change_hub.recipes_changed.disconnect(self.on_recipes_changed)
+        super().done(result)
\ No newline at end of file